@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import os
 import time
 
 async def demo():
@@ -95,6 +96,18 @@ async def demo():
         await asyncio.sleep(0.1)
     print()
     
+    print("7. 异步读写文件（类似 fs.promises）")
+    # 直接在协程里 open().read() 会阻塞事件循环，async_file_io 把读写放到线程池中执行
+    from advanced import async_file_io
+    
+    paths = [f"async_demo_{i}.txt" for i in range(3)]
+    await asyncio.gather(*(async_file_io.write_atomic(path, f"文件 {path} 的内容") for path in paths))
+    contents = await async_file_io.read_many(paths)
+    print(f"   并发读取 {len(contents)} 个文件: {contents}")
+    for path in paths:
+        os.remove(path)
+    print()
+    
     print("💡 提示:")
     print("   - async def 类似 async function")
     print("   - await 类似 await")
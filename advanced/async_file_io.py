@@ -0,0 +1,206 @@
+"""
+异步文件操作
+对比 Node.js 的 fs.promises
+
+Python 的文件读写都是阻塞的系统调用，在协程里直接 open().read() 会卡住整个事件循环
+（其他协程都要等它读完）。这里把阻塞的调用放到一个有上限的线程池中执行，
+并用信号量限制同时进行的文件操作数，一次读取上万个文件也不会耗尽文件描述符或线程:
+- read_text() / read_bytes(): 读取整个文件（类似 fs.promises.readFile）
+- iter_lines(): 异步逐行读取，每次在线程池中读一批行，减少线程切换
+- write_atomic(): 原子替换整个文件（见 file_io.write_atomic）
+- read_many(): 并发读取多个文件，按输入顺序返回内容
+
+运行方式: python -m benchmarks.async_file_bench --files 10000
+"""
+
+import asyncio
+import functools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from advanced.file_io import DEFAULT_BUFFER_SIZE, _strip_line_end, write_atomic as _write_atomic
+
+
+def _read_text(path, encoding):
+    with open(path, "r", encoding=encoding) as f:
+        return f.read()
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _open_text(opened, path, encoding, buffer_size):
+    """打开文本文件，把文件对象放进 opened（调用方被取消时也能拿到并关闭它）"""
+    opened.append(open(path, "r", encoding=encoding, buffering=buffer_size, newline="\n"))
+
+
+def _read_lines(f, count):
+    """从已打开的文件中读取最多 count 行"""
+    lines = []
+    for line in f:
+        lines.append(line)
+        if len(lines) >= count:
+            break
+    return lines
+
+
+class AsyncFileIO:
+    """在有上限的线程池中执行文件操作的异步接口"""
+
+    def __init__(self, max_workers=None, max_concurrency=64):
+        """
+        Args:
+            max_workers: 线程池大小，默认 min(32, CPU 核数 + 4)（与 asyncio 默认线程池相同）
+            max_concurrency: 同时进行的文件操作数上限（同时打开的文件数不会超过它）
+        """
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="async-file")
+        # 信号量属于创建它的事件循环，每个事件循环各用一个
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _limit(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _run(self, func, *args, **kwargs):
+        """在线程池中执行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _hop(self, func, *args, **kwargs):
+        """
+        在信号量内执行一次线程池调用
+
+        线程中的调用无法中断: 被取消时仍然等它执行完（期间继续占用信号量）再传播取消，
+        调用方随后关闭文件时不会与线程中的读取同时进行。
+        """
+        async with self._limit():
+            future = self._run(func, *args, **kwargs)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                await asyncio.wait([future])
+                raise
+
+    async def read_text(self, path, encoding="utf-8"):
+        """读取整个文本文件"""
+        async with self._limit():
+            return await self._run(_read_text, path, encoding)
+
+    async def read_bytes(self, path):
+        """读取整个二进制文件"""
+        async with self._limit():
+            return await self._run(_read_bytes, path)
+
+    async def iter_lines(self, path, encoding="utf-8", buffer_size=DEFAULT_BUFFER_SIZE, batch_lines=1024,
+                         keepends=False):
+        """
+        异步逐行读取（类似 Node.js 的 for await (const line of rl)），行的定义与 file_io.iter_lines 相同
+
+        信号量只在打开文件和每次读取一批行时占用，不跨越 yield:
+        调用方处理行的时候（例如同时迭代多个文件）不会占着并发名额导致死锁。
+
+        Args:
+            batch_lines: 每次在线程池中读取的行数，越大线程切换越少
+        """
+        opened = []
+        try:
+            await self._hop(_open_text, opened, path, encoding, buffer_size)
+            while True:
+                lines = await self._hop(_read_lines, opened[0], batch_lines)
+                if not lines:
+                    return
+                for line in lines:
+                    yield line if keepends else _strip_line_end(line)
+        finally:
+            if opened:
+                await self._run(opened[0].close)
+
+    async def write_atomic(self, path, data, encoding="utf-8", fsync=True):
+        """原子地替换整个文件（先写临时文件再 os.replace）"""
+        async with self._limit():
+            return await self._run(_write_atomic, path, data, encoding=encoding, fsync=fsync)
+
+    async def read_many(self, paths, encoding="utf-8", return_exceptions=False, files_per_task=16):
+        """
+        并发读取多个文本文件（同时进行的读取数受 max_concurrency 限制）
+
+        不为每个文件创建一个任务（上万个任务会在同一轮事件循环中启动，造成卡顿），
+        而是启动最多 max_concurrency 个工作协程，每次取 files_per_task 个文件
+        交给线程池一起读取，线程切换的开销由一批文件分摊。
+
+        Args:
+            return_exceptions: True 时读取失败的文件在结果中放异常对象，否则抛出第一个异常
+            files_per_task: 每次提交给线程池的文件数
+
+        Returns:
+            与 paths 顺序对应的文件内容列表
+        """
+        paths = list(paths)
+        results = [None] * len(paths)
+        batches = iter(range(0, len(paths), files_per_task))
+
+        def read_batch(start):
+            for index in range(start, min(start + files_per_task, len(paths))):
+                try:
+                    results[index] = _read_text(paths[index], encoding)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+
+        async def worker():
+            # 所有工作协程共享同一个迭代器，取完为止
+            for start in batches:
+                async with self._limit():
+                    await self._run(read_batch, start)
+
+        workers = min(self.max_concurrency, (len(paths) + files_per_task - 1) // files_per_task)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    def close(self):
+        """关闭线程池（阻塞到已提交的文件操作全部完成，在协程中使用 aclose）"""
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """关闭线程池: 在默认线程池中等待已提交的文件操作完成，不阻塞事件循环"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+# 进程级默认实例（线程在第一次使用时才创建）
+default_io = AsyncFileIO()
+
+
+async def read_text(path, encoding="utf-8"):
+    return await default_io.read_text(path, encoding)
+
+
+async def read_bytes(path):
+    return await default_io.read_bytes(path)
+
+
+async def iter_lines(path, encoding="utf-8", buffer_size=DEFAULT_BUFFER_SIZE, batch_lines=1024, keepends=False):
+    async for line in default_io.iter_lines(path, encoding, buffer_size, batch_lines, keepends):
+        yield line
+
+
+async def write_atomic(path, data, encoding="utf-8", fsync=True):
+    return await default_io.write_atomic(path, data, encoding, fsync)
+
+
+async def read_many(paths, encoding="utf-8", return_exceptions=False, files_per_task=16):
+    return await default_io.read_many(paths, encoding, return_exceptions, files_per_task)
@@ -1,9 +1,406 @@
 """
 文件操作示例
 对比 Node.js 的 fs 模块
+
+f.read() / f.readlines() 会把整个文件读进内存，内存占用随文件大小增长。
+处理几 GB 的日志文件时使用下面的流式工具（类似 Node.js 的 fs.createReadStream + readline）:
+- iter_lines(): 惰性逐行读取，缓冲区大小可配置
+- iter_chunks(): 按固定大小读取二进制块
+- LineIndex: 一次性建立行偏移索引，之后通过 mmap 随机读取第 N 行
+
+大量追加写入时不要每条记录都 open(..., "a") 一次，整个文件重写时也不要直接覆盖原文件:
+- BatchedWriter: 保持一个文件句柄，攒够字节数或时间后一次写入（可选 fsync）
+- write_atomic() / atomic_replace(): 先写临时文件再 os.replace，崩溃时不会留下写了一半的文件
+- staged_dir(): 整个目录的版本，先写到旁边的临时目录，完成后再换上去
+- read_json() / write_json(): 经 utils.json_codec 读写 JSON 文件（默认紧凑格式，写入是原子的）
+
+运行方式:
+    python -m benchmarks.file_io_bench --size-mb 1024
+    python -m benchmarks.append_bench --records 1000000
 """
 
+import contextlib
+import mmap
 import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from utils.json_codec import codec
+
+# 默认读缓冲区 / 块大小
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# 进程的 umask（第一次新建文件时由 _get_umask 读取）
+_umask = None
+_umask_lock = threading.Lock()
+
+
+def _strip_line_end(line):
+    """去掉行尾的换行符: 先去掉一个 "\\n"，再去掉一个 "\\r"（str 和 bytes 都可以）"""
+    if line[-1:] in ("\n", b"\n"):
+        line = line[:-1]
+    if line[-1:] in ("\r", b"\r"):
+        line = line[:-1]
+    return line
+
+
+def iter_lines(path, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8", keepends=False):
+    """
+    惰性逐行读取文本文件，任何时刻内存中只有一个缓冲区
+
+    Node.js: readline.createInterface({ input: fs.createReadStream(path) })
+
+    行的定义与 LineIndex 相同: 只按 "\\n" 分行，行中间单独的 "\\r"（旧 Mac 格式）不分行，
+    keepends=False 时去掉行尾的 "\\n" 和紧挨着它的一个 "\\r"（文件末尾没有 "\\n" 时也去掉末尾的 "\\r"）。
+    所以 list(iter_lines(path)) 与 [index[i] for i in range(len(index))] 完全一致。
+
+    Args:
+        path: 文件路径
+        buffer_size: 读缓冲区大小（字节），越大系统调用越少
+        encoding: 文本编码
+        keepends: 是否保留行尾的换行符
+    """
+    with open(path, "r", encoding=encoding, buffering=buffer_size, newline="\n") as f:
+        if keepends:
+            yield from f
+        else:
+            # 与 _strip_line_end 相同，展开写省掉每行一次函数调用（一行最多只有一个 "\n"）
+            for line in f:
+                line = line.rstrip("\n")
+                yield line[:-1] if line[-1:] == "\r" else line
+
+
+def iter_chunks(path, chunk_size=DEFAULT_BUFFER_SIZE):
+    """
+    按固定大小读取二进制块（最后一块可能更小）
+
+    Node.js: fs.createReadStream(path, { highWaterMark: chunkSize })
+    """
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class LineIndex:
+    """
+    按行号随机访问大文件
+
+    创建时扫描一遍文件，记录每行的起始偏移（每行 8 字节）；之后 index[n] 直接从
+    mmap 中切出第 n 行，不需要从头读。文件内容由操作系统的页缓存按需载入。
+
+    用法:
+        with LineIndex("app.log") as index:
+            print(len(index), index[1_000_000])
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # 空文件不能 mmap
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = self._build_offsets(size)
+
+    def _build_offsets(self, size):
+        """行起始偏移，末尾附加文件大小作为最后一行的结束位置"""
+        offsets = array("Q", [0])
+        find = self._mmap.find
+        position = find(b"\n")
+        while position != -1:
+            offsets.append(position + 1)
+            position = find(b"\n", position + 1)
+        if offsets[-1] == size:
+            offsets[-1:] = array("Q")  # 文件以换行结尾时没有多出的空行
+        offsets.append(size)
+        return offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def line_bytes(self, n):
+        """第 n 行的原始字节（不含行尾的换行符，规则见 iter_lines；n 从 0 开始，支持负数）"""
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"行号超出范围: {n}（共 {len(self)} 行）")
+        return _strip_line_end(self._mmap[self._offsets[n]:self._offsets[n + 1]])
+
+    def __getitem__(self, n):
+        return self.line_bytes(n).decode(self.encoding)
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class BatchedWriter:
+    """
+    批量追加写入: 只打开一次文件，写入先进入内存缓冲区，
+    缓冲的字节数达到 max_bytes 或最早一条记录等待超过 max_delay 秒时，
+    一次性写入文件（group commit），fsync=True 时每次提交后同步到磁盘
+
+    用法:
+        with BatchedWriter("events.log") as writer:
+            for event in events:
+                writer.write_line(event)
+    """
+
+    def __init__(self, path, encoding="utf-8", max_bytes=DEFAULT_BUFFER_SIZE, max_delay=1.0, fsync=False):
+        """
+        Args:
+            path: 文件路径（追加模式打开）
+            encoding: 文本编码
+            max_bytes: 缓冲区达到这么多字节时提交
+            max_delay: 记录在缓冲区中最多停留的秒数（后台线程定时提交），None 表示只按字节数提交
+            fsync: 每次提交后是否调用 os.fsync（断电也不丢已提交的数据，但更慢）
+        """
+        self.path = path
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.commits = 0
+        self.closed = False
+        self._file = open(path, "ab")
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._first_buffered_at = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+        if max_delay is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="batched-writer", daemon=True)
+            self._flusher.start()
+
+    def write(self, text):
+        """写入一段文本（不自动加换行）"""
+        self.write_bytes(text.encode(self.encoding))
+
+    def write_bytes(self, data):
+        """写入已编码的字节（调用方负责编码与 encoding 一致）"""
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"写入已关闭的文件: {self.path}")
+            if not self._buffer:
+                self._first_buffered_at = time.monotonic()
+            self._buffer.append(data)
+            self._buffered_bytes += len(data)
+            if self._buffered_bytes >= self.max_bytes:
+                self._commit()
+
+    def write_line(self, line):
+        """写入一行（自动加换行）"""
+        self.write(line + "\n")
+
+    def writelines(self, lines):
+        """写入多行（自动加换行），整批只加一次锁"""
+        self.write("".join(line + "\n" for line in lines))
+
+    def _commit(self):
+        """把缓冲区一次性写入文件（调用方持有锁）"""
+        if not self._buffer:
+            return
+        self._file.write(b"".join(self._buffer))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._first_buffered_at = None
+        self.commits += 1
+
+    def flush(self):
+        """立即提交缓冲区中的所有记录"""
+        with self._lock:
+            self._commit()
+
+    def _flush_periodically(self):
+        interval = self.max_delay / 2
+        while not self._closed.wait(interval):
+            with self._lock:
+                if self._first_buffered_at is not None and time.monotonic() - self._first_buffered_at >= self.max_delay:
+                    self._commit()
+
+    def close(self):
+        """提交剩余记录并关闭文件"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._closed.set()
+            self._commit()
+            self._file.close()
+        if self._flusher is not None:
+            self._flusher.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _fsync_path(path, flags):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_proc_umask():
+    """从 /proc/self/status 读取 umask（Linux 4.7+），读不到时返回 None"""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _get_umask():
+    """
+    进程的 umask（第一次需要时读取，之后使用缓存的值）
+
+    Linux 上直接读 /proc；其他系统只能先设置再恢复，这期间其他线程新建的文件会用临时的 umask，
+    所以不在导入时做，并且整个进程只做一次
+    """
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            umask = _read_proc_umask()
+            if umask is None:
+                umask = os.umask(0o022)
+                os.umask(umask)
+            _umask = umask
+        return _umask
+
+
+def _new_file_mode(path):
+    """替换后文件的权限: 沿用原文件的权限，新文件按 umask 计算（与 open() 创建的文件相同）"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_get_umask()
+
+
+@contextlib.contextmanager
+def atomic_replace(path, fsync=True):
+    """
+    原子地替换文件: 产出同目录下的临时文件路径，with 块正常结束后用它覆盖 path
+
+    - 临时文件的权限改成与原文件相同（mkstemp 创建的文件是 0600）
+    - fsync=True 时替换前同步临时文件，替换后在 POSIX 上同步所在目录（目录项的修改也要落盘，
+      否则断电后可能看到旧文件甚至没有文件）
+    - with 块中出现异常时删除临时文件，原文件不受影响
+
+    用法:
+        with atomic_replace("data.jsonl") as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(...)
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    # 临时文件必须和目标在同一个文件系统上，os.replace 才是原子操作
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        if fsync:
+            _fsync_path(tmp_path, os.O_RDWR)
+        os.chmod(tmp_path, _new_file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if fsync and os.name == "posix":
+        _fsync_path(directory, os.O_RDONLY)
+
+
+def write_atomic(path, data, encoding="utf-8", fsync=True):
+    """
+    原子地替换整个文件: 先写同目录下的临时文件，再用 os.replace 覆盖（见 atomic_replace）
+
+    任何时刻读到的要么是完整的旧文件，要么是完整的新文件；
+    写入过程中崩溃只会留下临时文件，原文件不受影响。
+
+    Args:
+        path: 目标文件路径
+        data: str 或 bytes
+        encoding: data 为 str 时使用的编码
+        fsync: 把临时文件和目录同步到磁盘（否则断电后可能得到空文件）
+    """
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    with atomic_replace(path, fsync=fsync) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+
+@contextlib.contextmanager
+def staged_dir(path):
+    """
+    原子地生成整个目录: 产出旁边的临时目录 .<目录名>.partial，with 块正常结束后改名为 path
+
+    - path 已存在时先把旧目录挪开，新目录就位后再删除（已打开或 mmap 的旧文件仍然可以读取）
+    - with 块中出现异常时删除临时目录，已有的 path 不受影响，也不会留下空目录或半个目录
+
+    用法:
+        with staged_dir("corpus.tok") as tmp_dir:
+            (tmp_dir / "data.bin").write_bytes(...)
+    """
+    path = Path(path)
+    # 临时目录与目标在同一文件系统中，保证 rename 是原子操作
+    staging = path.with_name(f".{path.name}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    try:
+        yield staging
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    old_dir = None
+    if path.exists():
+        old_dir = path.with_name(f".{path.name}.old-{int(time.time())}")
+        os.replace(path, old_dir)
+    os.replace(staging, path)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def write_json(path, obj, indent=None, fsync=True):
+    """
+    把对象序列化后原子地写入 JSON 文件
+
+    Args:
+        indent: None 为紧凑格式（体积最小），2 为便于阅读的缩进格式
+    """
+    write_atomic(path, codec.dumpb(obj, indent=indent), fsync=fsync)
+
+
+def read_json(path):
+    """读取 JSON 文件"""
+    with open(path, "rb") as f:
+        return codec.loads(f.read())
+
 
 def demo():
     """演示 Python 的文件操作"""
@@ -27,20 +424,19 @@ def demo():
     print()
     
     print("3. 逐行读取（类似 readline）")
-    with open("test.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    
+    # iter_lines 每次只读一行，不会像 readlines() 那样把整个文件读进内存
     print("   逐行内容:")
-    for i, line in enumerate(lines, 1):
+    for i, line in enumerate(iter_lines("test.txt"), 1):
         print(f"   第 {i} 行: {line.strip()}")
     print()
     
     print("4. 追加内容（类似 fs.appendFileSync）")
     # Node.js: fs.appendFileSync('test.txt', '\n追加的内容')
-    with open("test.txt", "a", encoding="utf-8") as f:
-        f.write("\n这是追加的内容")
+    # 追加很多条时用 BatchedWriter: 只打开一次文件，攒成一批再写入
+    with BatchedWriter("test.txt") as writer:
+        writer.write("\n这是追加的内容")
     
-    print("   ✅ 已追加内容到 test.txt")
+    print(f"   ✅ 已追加内容到 test.txt（提交 {writer.commits} 次）")
     print()
     
     print("5. 检查文件是否存在（类似 fs.existsSync）")
@@ -56,8 +452,6 @@ def demo():
     print()
     
     print("7. 读取 JSON 文件")
-    import json
-    
     # 创建示例 JSON 数据
     data = {
         "name": "Python 学习项目",
@@ -66,19 +460,24 @@ def demo():
         "languages": ["Python", "JavaScript"]
     }
     
-    # 写入 JSON
-    with open("data.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 写入 JSON（先写临时文件再替换，中途崩溃不会损坏原来的 data.json）
+    write_json("data.json", data, indent=2)
     
-    print("   ✅ 已创建 data.json")
+    print(f"   ✅ 已创建 data.json（JSON 后端: {codec.backend}）")
     
     # 读取 JSON
-    with open("data.json", "r", encoding="utf-8") as f:
-        loaded_data = json.load(f)
+    loaded_data = read_json("data.json")
     
     print(f"   读取的 JSON 数据: {loaded_data}")
     print()
     
+    print("8. 大文件: 分块读取和按行号随机访问")
+    total = sum(len(chunk) for chunk in iter_chunks("test.txt", chunk_size=16))
+    print(f"   按 16 字节分块读取，共 {total} 字节")
+    with LineIndex("test.txt") as index:
+        print(f"   共 {len(index)} 行，最后一行: {index[-1]}")
+    print()
+    
     print("💡 提示: Python 的 'with' 语句会自动关闭文件")
     print("   类似 Node.js 的 try-finally 或使用 fs.promises")
 
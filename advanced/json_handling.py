@@ -1,9 +1,246 @@
 """
 JSON 处理示例
 对比 Node.js 的 JSON 对象
+
+json.load() 必须把整个文档读进内存。数据量大时使用下面的流式工具:
+- iter_jsonl() / JsonlWriter / write_jsonl(): JSON Lines（每行一个 JSON 值）的流式读写，
+  格式错误的行报告行号后跳过，不会中断整个文件
+- iter_json_array(): 增量解析，逐个产出 JSON 数组（如 {"users": [...]} 中的 users）的元素，
+  内存中只保留当前元素和一个读缓冲区
+
+JSON Lines 的读写经过 utils.json_codec（安装了 orjson / ujson 时自动使用，输出紧凑格式）；
+iter_json_array 依赖标准库 JSONDecoder.raw_decode 做增量解析。
 """
 
 import json
+import os
+import re
+import tempfile
+import warnings
+
+from advanced.file_io import BatchedWriter, atomic_replace, iter_lines
+from utils.json_codec import codec
+
+# iter_json_array 每次读取的字符数
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_NUMBER_CHARS = "0123456789.eE+-"
+# 最长的 JSON 字面量（-Infinity），被截断的字面量一定比它短
+_MAX_TOKEN_LENGTH = len("-Infinity")
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+def _warn_bad_line(path, line_no, line, error):
+    warnings.warn(f"{path} 第 {line_no} 行不是有效的 JSON，已跳过: {error}", stacklevel=3)
+
+
+def iter_jsonl(path, encoding="utf-8", on_error=None):
+    """
+    逐行读取 JSON Lines 文件，每次产出一个解析后的值
+
+    空行直接跳过；格式错误的行调用 on_error(line_no, line, error) 后跳过
+    （默认发出警告），不会像 json.load 那样整个文件解析失败。
+
+    Args:
+        path: 文件路径
+        encoding: 文本编码
+        on_error: 遇到格式错误的行时的回调，参数为 (行号（从 1 开始）, 原始行, JSONDecodeError)
+    """
+    for line_no, line in enumerate(iter_lines(path, encoding=encoding), 1):
+        if not line.strip():
+            continue
+        try:
+            yield codec.loads(line)
+        except json.JSONDecodeError as e:
+            if on_error is None:
+                _warn_bad_line(path, line_no, line, e)
+            else:
+                on_error(line_no, line, e)
+
+
+class JsonlWriter:
+    """
+    追加写入 JSON Lines 文件（每个值序列化成一行紧凑 JSON，经 BatchedWriter 批量写入）
+
+    JSON Lines 规定使用 UTF-8 编码，写入的就是 json_codec 输出的 UTF-8 字节
+
+    用法:
+        with JsonlWriter("events.jsonl") as writer:
+            writer.write({"id": 1, "event": "click"})
+    """
+
+    def __init__(self, path, **writer_options):
+        """
+        Args:
+            path: 文件路径（追加模式）
+            writer_options: 传给 BatchedWriter 的参数（max_bytes / max_delay / fsync 等）
+        """
+        self.path = path
+        self.count = 0
+        self._writer = BatchedWriter(path, **writer_options)
+
+    def write(self, value):
+        self._writer.write_bytes(codec.dumpb(value) + b"\n")
+        self.count += 1
+
+    def write_all(self, values):
+        for value in values:
+            self.write(value)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_jsonl(path, values, fsync=True, **writer_options):
+    """
+    把可迭代对象中的值写成一个新的 JSON Lines 文件（流式写入临时文件，完成后原子替换）
+
+    Args:
+        fsync: 替换前后把文件和目录同步到磁盘（见 file_io.atomic_replace）
+
+    Returns:
+        写入的行数
+    """
+    # 写完才替换，不需要后台定时提交
+    writer_options.setdefault("max_delay", None)
+    with atomic_replace(path, fsync=fsync) as tmp_path:
+        with JsonlWriter(tmp_path, **writer_options) as writer:
+            writer.write_all(values)
+    return writer.count
+
+
+class _JsonStream:
+    """从文本文件中按需读取字符，供增量解析使用"""
+
+    def __init__(self, f, chunk_size):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.offset = 0  # buffer[0] 在文件中的字符位置
+        self.eof = False
+
+    def _fill(self):
+        """再读一块数据，返回是否读到了新内容"""
+        if self.eof:
+            return False
+        # 丢掉已经解析过的部分，缓冲区大小不随文件增长
+        if self.pos:
+            self.offset += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def error(self, message, pos=None):
+        return ValueError(f"{message}（第 {self.offset + (self.pos if pos is None else pos)} 个字符）")
+
+    def peek(self):
+        """跳过空白，返回下一个字符（文件结束时返回空字符串）"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(f"应为 {' 或 '.join(repr(c) for c in chars)}，实际为 {char!r}")
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """解析下一个完整的 JSON 值（数据不完整时继续读取）"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # 数字可能被读缓冲区截断（如 12|34、-1|.5e3），后面还有数字字符时再读一块确认
+                is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                truncated = end == len(self.buffer) or (is_number and self.buffer[end] in _NUMBER_CHARS)
+                if not truncated or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                # 只有字符串没结束或错误出现在缓冲区末尾时，才可能是数据还没读完；否则立即报错
+                incomplete = e.msg.startswith("Unterminated string") or e.pos >= len(self.buffer) - _MAX_TOKEN_LENGTH
+                if self.eof or not incomplete:
+                    raise self.error(f"JSON 格式错误: {e.msg}", e.pos) from None
+            self._fill()
+
+    def iter_array(self):
+        """逐个产出当前位置的数组的元素"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        raw_decode = self._decoder.raw_decode
+        skip = _WHITESPACE.match
+        while True:
+            # 快速路径: 元素和后面的分隔符都已在缓冲区中
+            buffer = self.buffer
+            try:
+                value, end = raw_decode(buffer, skip(buffer, self.pos).end())
+                after = skip(buffer, end).end()
+                separator = buffer[after] if after < len(buffer) else ""
+            except json.JSONDecodeError:
+                separator = ""
+            # 值后面紧跟着分隔符，说明值是完整的（不会是被截断的数字）
+            if separator in (",", "]"):
+                self.pos = after + 1
+                yield value
+                if separator == "]":
+                    return
+                continue
+            # 慢速路径: 数据不完整，边读边解析
+            yield self.decode()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_array(path, key=None, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    增量解析 JSON 文件中的数组，逐个产出元素
+
+    Args:
+        path: 文件路径
+        key: 数组所在的键，None 表示整个文档就是数组；嵌套的键用点号分隔，如 "data.users"
+            （查找途中经过的其他字段会被完整解析后丢弃）
+        encoding: 文本编码
+        chunk_size: 每次读取的字符数
+
+    用法:
+        for user in iter_json_array("complex_data.json", key="users"):
+            print(user["name"])
+    """
+    with open(path, "r", encoding=encoding) as f:
+        stream = _JsonStream(f, chunk_size)
+        for name in key.split(".") if key else []:
+            # 在当前对象中找到 name 对应的值，跳过其他字段
+            stream.expect("{")
+            while True:
+                if stream.peek() == "}":
+                    raise KeyError(f"{path} 中找不到键: {key}")
+                field = stream.decode()
+                stream.expect(":")
+                if field == name:
+                    break
+                stream.decode()
+                if stream.expect(",}") == "}":
+                    raise KeyError(f"{path} 中找不到键: {key}")
+
+        yield from stream.iter_array()
+
 
 def demo():
     """演示 Python 的 JSON 处理"""
@@ -43,7 +280,7 @@ def demo():
         }
     }
     
-    json_output = json.dumps(complex_data, ensure_ascii=False, indent=2)
+    json_output = codec.dumps(complex_data, indent=2)
     print("   复杂 JSON 结构:")
     print(json_output)
     print()
@@ -73,7 +310,7 @@ def demo():
         {"id": 3, "name": "项目 C"}
     ]
     
-    items_json = json.dumps(items, ensure_ascii=False, indent=2)
+    items_json = codec.dumps(items, indent=2)
     print("   JSON 数组:")
     print(items_json)
     print()
@@ -84,10 +321,43 @@ def demo():
         json.loads(invalid_json)
     except json.JSONDecodeError as e:
         print(f"   ❌ JSON 解析错误: {e}")
+    
+    # JSON Lines 文件每行独立解析: 坏掉的行报告行号后跳过，其余行照常读取
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jsonl_path = os.path.join(tmp_dir, "items.jsonl")
+        write_jsonl(jsonl_path, items)
+        with open(jsonl_path, "a", encoding="utf-8") as f:
+            f.write("{'id': 4}\n")
+            f.write('{"id": 5, "name": "项目 E"}\n')
+        
+        def report(line_no, line, error):
+            print(f"   ⚠️ 第 {line_no} 行格式错误，已跳过: {line}")
+        
+        records = list(iter_jsonl(jsonl_path, on_error=report))
+        print(f"   JSONL 读取到 {len(records)} 条有效记录: {[record['id'] for record in records]}")
+    print()
+    
+    print("7. 流式解析大数组（逐个读取元素，不把整个文件读进内存）")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "complex_data.json")
+        with open(data_path, "w", encoding="utf-8") as f:
+            codec.dump(complex_data, f, indent=2)
+        for user in iter_json_array(data_path, key="users"):
+            print(f"   用户: {user['name']} <{user['email']}>")
+    print()
+    
+    print("8. 紧凑输出与更快的 JSON 后端")
+    # 紧凑格式没有任何空白，类似 JSON.stringify(data)；indent=2 类似 JSON.stringify(data, null, 2)
+    compact = codec.dumpb(complex_data)
+    pretty = codec.dumpb(complex_data, indent=2)
+    print(f"   当前后端: {codec.backend}" + ("（pip install orjson 后自动使用 orjson）" if codec.backend == "json" else ""))
+    print(f"   紧凑: {len(compact)} 字节, 缩进: {len(pretty)} 字节")
+    print(f"   {compact.decode('utf-8')}")
     print()
     
     print("💡 提示:")
     print("   - json.dumps() 类似 JSON.stringify()")
     print("   - json.loads() 类似 JSON.parse()")
     print("   - json.dump() / json.load() 用于文件操作")
+    print("   - 大文件用 JSON Lines（iter_jsonl / JsonlWriter）或 iter_json_array 流式处理")
 
@@ -0,0 +1,333 @@
+"""
+并行、可续传、带完整性校验的模型下载器
+替代逐个调用 from_pretrained 的串行下载
+
+- 同一模型的多个文件并发下载（线程池限制并发数）
+- 未下载完的文件保留在临时目录，下次运行时从断点继续（HTTP Range）
+- 每个文件下载完成后按清单（manifest）校验 sha256 / git blob sha1 和大小
+- 所有文件都校验通过后，才把临时目录原子地改名为目标目录（模型仓库中的新版本），
+  所以下载到一半的目录永远不会被当成可用的模型
+- 支持本地镜像目录作为下载源，可以离线测试
+
+本地镜像目录的结构:
+    mirror/
+    └── uer/roberta-base-finetuned-chinanews-chinese/
+        ├── manifest.json        （可选，用 write_manifest() 生成）
+        ├── config.json
+        └── ...
+
+运行方式: python -m advanced.model_downloader [模型键名...] [--mirror 目录]
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+MANIFEST_FILE = "manifest.json"
+
+# 只下载推理需要的文件（跳过 TensorFlow / Flax 权重等）
+DEFAULT_ALLOW_PATTERNS = (
+    "*.json", "*.txt", "*.model", "*.safetensors", "pytorch_model*.bin",
+)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadError(Exception):
+    """下载或校验失败"""
+
+
+def _git_blob_sha1(size):
+    """git blob 的 sha1 = sha1("blob <大小>\\0" + 内容)"""
+    digest = hashlib.sha1()
+    digest.update(f"blob {size}\0".encode())
+    return digest
+
+
+def _new_hashers(entry):
+    """按清单中提供的校验和类型创建哈希对象"""
+    hashers = {}
+    if entry.get("sha256"):
+        hashers["sha256"] = hashlib.sha256()
+    if entry.get("git_sha1"):
+        hashers["git_sha1"] = _git_blob_sha1(entry["size"])
+    return hashers
+
+
+def _select_files(entries, allow_patterns):
+    """按文件名过滤；有 safetensors 权重时不再下载 .bin 权重"""
+    selected = [
+        entry for entry in entries
+        if any(fnmatch.fnmatch(Path(entry["path"]).name, pattern) for pattern in allow_patterns)
+    ]
+    if any(entry["path"].endswith(".safetensors") for entry in selected):
+        selected = [entry for entry in selected if not entry["path"].endswith(".bin")]
+    return selected
+
+
+def build_manifest(directory):
+    """计算本地目录的清单（文件路径、大小、sha256），不写入任何文件"""
+    directory = Path(directory)
+    files = []
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.name != MANIFEST_FILE:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(block)
+            files.append({
+                "path": path.relative_to(directory).as_posix(),
+                "size": path.stat().st_size,
+                "sha256": digest.hexdigest(),
+            })
+    return {"files": files}
+
+
+def write_manifest(directory):
+    """为本地目录生成清单并写入 manifest.json，返回清单内容"""
+    manifest = build_manifest(directory)
+    with open(Path(directory) / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+class MirrorSource:
+    """本地镜像目录作为下载源"""
+
+    def __init__(self, mirror_dir, repo_id):
+        self.root = Path(mirror_dir) / repo_id
+        if not self.root.is_dir():
+            raise DownloadError(f"镜像目录中没有 {repo_id}: {self.root}")
+
+    def list_files(self):
+        """
+        读取镜像中的 manifest.json
+
+        没有清单时在内存中现算（不写入镜像，镜像通常是只读的共享目录）；
+        这样的校验和来自镜像本身，只能发现复制过程中的损坏，发现不了镜像文件本身的问题，
+        发布镜像时应当用 write_manifest() 生成清单。
+        """
+        manifest_path = self.root / MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)["files"]
+        return build_manifest(self.root)["files"]
+
+    def open(self, path, offset=0):
+        """打开源文件，从 offset 开始读取"""
+        f = open(self.root / path, "rb")
+        f.seek(offset)
+        return f
+
+
+class HubSource:
+    """Hugging Face Hub（或镜像站，如 HF_ENDPOINT=https://hf-mirror.com）作为下载源"""
+
+    def __init__(self, repo_id, endpoint=None, revision="main", timeout=None):
+        self.repo_id = repo_id
+        self.endpoint = (endpoint or os.environ.get("HF_ENDPOINT", "https://huggingface.co")).rstrip("/")
+        self.revision = revision
+        self.timeout = timeout or float(os.environ.get("HF_HUB_DOWNLOAD_TIMEOUT", "300"))
+
+    def _request(self, url, headers=None):
+        request = urllib.request.Request(url, headers=headers or {})
+        token = os.environ.get("HF_TOKEN")
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def list_files(self):
+        """通过 API 获取文件列表；LFS 文件带 sha256，普通文件带 git blob sha1"""
+        revision = urllib.parse.quote(self.revision, safe="")
+        url = f"{self.endpoint}/api/models/{self.repo_id}/revision/{revision}?blobs=true"
+        with self._request(url) as response:
+            info = json.load(response)
+        files = []
+        for sibling in info.get("siblings", []):
+            lfs = sibling.get("lfs") or {}
+            entry = {"path": sibling["rfilename"], "size": lfs.get("size", sibling.get("size"))}
+            if lfs.get("sha256"):
+                entry["sha256"] = lfs["sha256"]
+            elif sibling.get("blobId"):
+                entry["git_sha1"] = sibling["blobId"]
+            files.append(entry)
+        return files
+
+    def open(self, path, offset=0):
+        """
+        从 offset 开始下载（服务器不支持 Range 时抛出异常，由调用方从头重试）
+
+        本地文件已经完整时（清单中没有大小），服务器对 Range 返回 416；
+        Content-Range 中的总大小等于 offset 时返回空流，由调用方照常校验校验和
+        """
+        url = f"{self.endpoint}/{self.repo_id}/resolve/{self.revision}/{urllib.parse.quote(path)}"
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            response = self._request(url, headers)
+        except urllib.error.HTTPError as e:
+            if not offset or e.code != 416:
+                raise
+            # 416 的 Content-Range 形如 "bytes */12345"
+            total = (e.headers.get("Content-Range") or "").rpartition("/")[2]
+            e.close()
+            if total == str(offset):
+                return io.BytesIO()
+            raise DownloadError(f"续传位置超出文件大小: {path}") from None
+        if offset and response.status != 206:
+            response.close()
+            raise DownloadError(f"服务器不支持断点续传: {path}")
+        return response
+
+
+class ModelDownloader:
+    """把一个模型仓库下载到本地目录"""
+
+    def __init__(self, source, target_dir, max_workers=4, allow_patterns=DEFAULT_ALLOW_PATTERNS, partial_dir=None):
+        """
+        Args:
+            source: MirrorSource 或 HubSource
+            target_dir: 最终的模型目录（如模型仓库中的一个版本目录）
+            max_workers: 最大并发下载数
+            allow_patterns: 要下载的文件名模式
+            partial_dir: 临时目录，默认为目标目录旁边的 .<目录名>.partial
+        """
+        self.source = source
+        self.target_dir = Path(target_dir)
+        # 临时目录与目标目录在同一文件系统中，保证最后的 rename 是原子操作
+        self.partial_dir = Path(partial_dir) if partial_dir else \
+            self.target_dir.with_name(f".{self.target_dir.name}.partial")
+        self.max_workers = max_workers
+        self.allow_patterns = allow_patterns
+
+    def _verify(self, path, entry, hashers):
+        """校验大小和校验和，失败时删除文件并抛出 DownloadError"""
+        size = path.stat().st_size
+        errors = []
+        if entry.get("size") is not None and size != entry["size"]:
+            errors.append(f"大小 {size} != {entry['size']}")
+        for name, hasher in hashers.items():
+            if hasher.hexdigest() != entry[name]:
+                errors.append(f"{name} 不匹配")
+        if errors:
+            path.unlink()
+            raise DownloadError(f"{entry['path']} 校验失败（{'，'.join(errors)}），已删除，请重试")
+
+    def _download_file(self, entry):
+        """下载单个文件（已下载的部分先计入哈希，然后从断点继续）"""
+        path = self.partial_dir / entry["path"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        hashers = _new_hashers(entry)
+
+        offset = path.stat().st_size if path.exists() else 0
+        if entry.get("size") is not None and offset > entry["size"]:
+            path.unlink()
+            offset = 0
+        if offset:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    for hasher in hashers.values():
+                        hasher.update(block)
+
+        if entry.get("size") is None or offset < entry["size"]:
+            try:
+                stream = self.source.open(entry["path"], offset)
+            except DownloadError:
+                # 不支持续传: 从头下载
+                path.unlink()
+                return self._download_file(entry)
+            with stream, open(path, "ab") as f:
+                for block in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    f.write(block)
+                    for hasher in hashers.values():
+                        hasher.update(block)
+
+        self._verify(path, entry, hashers)
+        return entry["path"], offset
+
+    def download(self, executor=None, finalize=None):
+        """
+        下载所有文件并原子地替换目标目录
+
+        Args:
+            executor: 共享的线程池（多个模型同时下载时用于限制总并发），默认自己创建
+            finalize: 提交前对临时目录做的处理（如转换权重格式），返回 True 表示改动了文件
+
+        Returns:
+            目标目录路径
+        """
+        entries = _select_files(self.source.list_files(), self.allow_patterns)
+        if not entries:
+            raise DownloadError("下载源中没有可用的模型文件")
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+        try:
+            futures = [executor.submit(self._download_file, entry) for entry in entries]
+            for future in futures:
+                path, resumed_from = future.result()
+                note = f"（从 {resumed_from} 字节处续传）" if resumed_from else ""
+                print(f"   ✅ {path}{note}")
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True)
+
+        if finalize is not None and finalize(self.partial_dir):
+            # 文件有变化，按实际内容重新生成清单
+            write_manifest(self.partial_dir)
+        else:
+            with open(self.partial_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump({"files": entries}, f, ensure_ascii=False, indent=2)
+        self._commit()
+        return self.target_dir
+
+    def _commit(self):
+        """把临时目录改名为目标目录；已有旧目录时先挪开再删除"""
+        old_dir = None
+        if self.target_dir.exists():
+            old_dir = self.target_dir.with_name(f".{self.target_dir.name}.old-{int(time.time())}")
+            os.replace(self.target_dir, old_dir)
+        os.replace(self.partial_dir, self.target_dir)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def make_source(repo_id, mirror_dir=None):
+    """创建下载源: 指定了镜像目录（或 SENTIMENT_MODEL_MIRROR 环境变量）时使用本地镜像"""
+    mirror_dir = mirror_dir or os.environ.get("SENTIMENT_MODEL_MIRROR")
+    if mirror_dir:
+        return MirrorSource(mirror_dir, repo_id)
+    return HubSource(repo_id)
+
+
+def main(argv=None):
+    from advanced.sentiment_analysis import MODEL_CONFIGS, download_all_models
+
+    parser = argparse.ArgumentParser(description="并行下载情感分析模型")
+    parser.add_argument("models", nargs="*", help="模型键名（默认全部）")
+    parser.add_argument("--mirror", help="本地镜像目录（离线下载）")
+    parser.add_argument("--workers", type=int, default=4, help="最大并发下载数")
+    parser.add_argument("--force", action="store_true", help="已存在时也重新下载")
+    args = parser.parse_args(argv)
+
+    download_all_models(
+        args.models or list(MODEL_CONFIGS.keys()),
+        force_download=args.force,
+        mirror_dir=args.mirror,
+        max_workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
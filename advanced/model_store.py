@@ -0,0 +1,287 @@
+"""
+模型仓库（model store）
+统一管理本地模型目录的位置和布局，支持多版本并存和原子切换
+
+目录布局:
+    <仓库根目录>/
+    └── chinese/
+        ├── current -> revisions/20240501-120000   （符号链接，指向正在使用的版本）
+        ├── revisions/
+        │   ├── 20240501-120000/                    （一个完整的模型目录）
+        │   └── 20240420-093000/
+        ├── usage.json                              （各版本最近一次启用的时间，用于 LRU 清理）
+        └── .download.partial/                      （下载中的临时目录，可断点续传）
+
+- MODEL_CONFIGS[...]["local_path"] 指向 <模型>/current，加载代码不需要关心版本
+- 新版本先完整下载/复制到 revisions/ 下，再把 current 原子地换成新的链接（类似蓝绿部署）
+- 命令行的 import / activate 在切换前为新版本导出正在使用的 int8 / onnx 变体
+  （见 sentiment_analysis.activate_revision；ModelStore.activate 本身只切换链接）
+- 每个模型只保留最近使用的 keep_revisions 个版本，更旧的版本自动删除
+
+仓库位置的配置（优先级从高到低）:
+1. 环境变量 SENTIMENT_MODEL_STORE、SENTIMENT_KEEP_REVISIONS
+2. 配置文件（SENTIMENT_CONFIG 环境变量指定，默认当前目录下的 sentiment_config.json）:
+       {"model_store": "/data/models", "keep_revisions": 3}
+3. 默认: Windows 上为 C:/models，其他系统为 ~/.cache/python-for-ai/models
+
+运行方式:
+    python -m advanced.model_store list
+    python -m advanced.model_store import chinese C:/models/chinese-sentiment
+    python -m advanced.model_store activate chinese 20240420-093000
+    python -m advanced.model_store gc
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+CONFIG_FILE = "sentiment_config.json"
+CURRENT_LINK = "current"
+REVISIONS_DIR = "revisions"
+USAGE_FILE = "usage.json"
+STAGING_DIR = ".download.partial"
+
+
+def _default_root():
+    if sys.platform == "win32":
+        return Path("C:/models")
+    return Path.home() / ".cache" / "python-for-ai" / "models"
+
+
+def load_config():
+    """读取模型仓库配置（环境变量覆盖配置文件）"""
+    config = {"model_store": None, "keep_revisions": 2}
+    config_path = Path(os.environ.get("SENTIMENT_CONFIG", CONFIG_FILE))
+    if config_path.is_file():
+        with open(config_path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    if os.environ.get("SENTIMENT_MODEL_STORE"):
+        config["model_store"] = os.environ["SENTIMENT_MODEL_STORE"]
+    if os.environ.get("SENTIMENT_KEEP_REVISIONS"):
+        config["keep_revisions"] = int(os.environ["SENTIMENT_KEEP_REVISIONS"])
+    config["model_store"] = Path(config["model_store"]).expanduser() if config["model_store"] else _default_root()
+    return config
+
+
+def _replace_link(link, target):
+    """
+    原子地把 link 指向 target
+
+    先在旁边创建临时链接，再用 os.replace 覆盖（POSIX 上 rename 是原子操作，
+    任何时刻读取 link 要么是旧版本要么是新版本）。
+    Windows 上创建符号链接需要开发者模式，否则退回目录联接（junction），
+    此时切换分两步完成，中间有极短的时间 link 不存在。
+    """
+    tmp_link = link.with_name(f".{link.name}.{os.getpid()}.tmp")
+    if tmp_link.is_symlink() or tmp_link.exists():
+        tmp_link.unlink()
+    try:
+        # 使用相对路径，整个仓库目录可以整体移动
+        os.symlink(os.path.relpath(target, link.parent), tmp_link, target_is_directory=True)
+        os.replace(tmp_link, link)
+    except OSError:
+        if sys.platform != "win32":
+            raise
+        import _winapi
+        _winapi.CreateJunction(str(Path(target).resolve()), str(tmp_link))
+        old_link = link.with_name(f".{link.name}.old")
+        if link.exists():
+            os.replace(link, old_link)
+        os.replace(tmp_link, link)
+        if old_link.exists():
+            os.rmdir(old_link)
+
+
+class ModelStore:
+    """按模型、按版本组织的本地模型目录"""
+
+    def __init__(self, root=None, keep_revisions=None):
+        """
+        Args:
+            root: 仓库根目录，默认读取配置
+            keep_revisions: 每个模型保留的版本数（包括正在使用的版本），默认读取配置
+        """
+        config = load_config()
+        self.root = Path(root) if root else config["model_store"]
+        self.keep_revisions = max(1, keep_revisions or config["keep_revisions"])
+
+    def model_dir(self, model_key):
+        return self.root / model_key
+
+    def model_keys(self):
+        """仓库中已有版本的模型键名"""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.iterdir() if (path / REVISIONS_DIR).is_dir())
+
+    def current_path(self, model_key):
+        """正在使用的版本（即 MODEL_CONFIGS 中的 local_path）"""
+        return self.model_dir(model_key) / CURRENT_LINK
+
+    def revision_path(self, model_key, revision):
+        return self.model_dir(model_key) / REVISIONS_DIR / revision
+
+    def staging_path(self, model_key):
+        """下载用的临时目录（名字固定，中断后可以续传）"""
+        return self.model_dir(model_key) / STAGING_DIR
+
+    def owns(self, path):
+        """path 是否是本仓库管理的 current 路径"""
+        path = Path(path)
+        return path.name == CURRENT_LINK and path.parent.parent == self.root
+
+    def new_revision_name(self, model_key):
+        """按时间生成新版本名（同一秒内重复时加序号）"""
+        base = time.strftime("%Y%m%d-%H%M%S")
+        name, counter = base, 1
+        while self.revision_path(model_key, name).exists():
+            name, counter = f"{base}-{counter}", counter + 1
+        return name
+
+    def current_revision(self, model_key):
+        """正在使用的版本名，没有时返回 None"""
+        current = self.current_path(model_key)
+        if not current.exists():
+            return None
+        return Path(os.path.realpath(current)).name
+
+    def _load_usage(self, model_key):
+        path = self.model_dir(model_key) / USAGE_FILE
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_usage(self, model_key, usage):
+        path = self.model_dir(model_key) / USAGE_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(usage, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def list_revisions(self, model_key):
+        """
+        列出模型的所有版本，按最近使用时间从新到旧排序
+
+        Returns:
+            [(版本名, 最近启用时间戳或 None), ...]
+        """
+        revisions_dir = self.model_dir(model_key) / REVISIONS_DIR
+        if not revisions_dir.is_dir():
+            return []
+        usage = self._load_usage(model_key)
+        names = [path.name for path in revisions_dir.iterdir() if path.is_dir() and not path.name.startswith(".")
+                 and not path.name.endswith(("-int8", "-onnx"))]
+        return sorted(((name, usage.get(name)) for name in names), key=lambda item: (item[1] or 0, item[0]),
+                      reverse=True)
+
+    def activate(self, model_key, revision):
+        """
+        原子地把 current 切换到指定版本，并按 LRU 清理旧版本
+
+        Returns:
+            被删除的旧版本列表
+        """
+        target = self.revision_path(model_key, revision)
+        if not (target / "config.json").exists():
+            raise FileNotFoundError(f"版本目录不完整或不存在: {target}")
+        _replace_link(self.current_path(model_key), target)
+        usage = self._load_usage(model_key)
+        usage[revision] = time.time()
+        self._save_usage(model_key, usage)
+        return self.gc(model_key)
+
+    def gc(self, model_key, keep=None):
+        """
+        删除最久未使用的版本，只保留 keep 个（正在使用的版本永远不删）
+
+        已加载到内存（或 mmap）的旧版本在删除后仍可继续使用，直到进程释放它。
+
+        Returns:
+            被删除的版本列表
+        """
+        keep = max(1, keep or self.keep_revisions)
+        current = self.current_revision(model_key)
+        candidates = [name for name, _ in self.list_revisions(model_key) if name != current]
+        removed = candidates[max(0, keep - (1 if current else 0)):]
+        usage = self._load_usage(model_key)
+        for name in removed:
+            path = self.revision_path(model_key, name)
+            # 同时删除该版本导出的 int8 / onnx 变体（见 sentiment_backends.variant_path）
+            for variant in (path, path.with_name(f"{name}-int8"), path.with_name(f"{name}-onnx")):
+                shutil.rmtree(variant, ignore_errors=True)
+            usage.pop(name, None)
+        if removed:
+            self._save_usage(model_key, usage)
+        return removed
+
+    def import_directory(self, model_key, source, revision=None, activate=True):
+        """
+        把已有的模型目录（如旧版布局的 C:/models/chinese-sentiment）复制为一个新版本
+
+        Returns:
+            新版本名
+        """
+        revision = revision or self.new_revision_name(model_key)
+        target = self.revision_path(model_key, revision)
+        staging = target.with_name(f".{revision}.partial")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(source, staging)
+        os.replace(staging, target)
+        if activate:
+            self.activate(model_key, revision)
+        return revision
+
+
+# 进程级默认仓库（导入时只读取配置，不创建任何目录）
+model_store = ModelStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="管理本地模型仓库的版本")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="列出所有模型的版本")
+    import_parser = subparsers.add_parser("import", help="把已有的模型目录导入为新版本并启用")
+    import_parser.add_argument("model", help="模型键名")
+    import_parser.add_argument("source", help="模型目录")
+    import_parser.add_argument("--revision", help="版本名（默认按时间生成）")
+    activate_parser = subparsers.add_parser("activate", help="切换到指定版本")
+    activate_parser.add_argument("model", help="模型键名")
+    activate_parser.add_argument("revision", help="版本名")
+    gc_parser = subparsers.add_parser("gc", help="清理最久未使用的版本")
+    gc_parser.add_argument("--keep", type=int, help="每个模型保留的版本数")
+    args = parser.parse_args(argv)
+
+    store = model_store
+    print(f"📁 模型仓库: {store.root}")
+    if args.command in ("import", "activate"):
+        # 经 activate_revision 切换: 先为新版本导出正在使用的 int8 / onnx 变体
+        from advanced.sentiment_analysis import activate_revision
+    if args.command == "import":
+        revision = store.import_directory(args.model, args.source, revision=args.revision, activate=False)
+        activate_revision(args.model, revision)
+        print(f"✅ 已导入 {args.model} 版本 {revision} 并启用")
+    elif args.command == "activate":
+        removed = activate_revision(args.model, args.revision)
+        print(f"✅ {args.model} 已切换到 {args.revision}" + (f"，清理旧版本: {', '.join(removed)}" if removed else ""))
+    elif args.command == "gc":
+        for model_key in store.model_keys():
+            removed = store.gc(model_key, keep=args.keep)
+            if removed:
+                print(f"🗑️ {model_key}: 删除 {', '.join(removed)}")
+    else:
+        for model_key in store.model_keys():
+            current = store.current_revision(model_key)
+            print(f"\n{model_key}:")
+            for name, used in store.list_revisions(model_key):
+                marker = "*" if name == current else " "
+                used_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(used)) if used else "从未启用"
+                print(f"  {marker} {name}  （最近启用: {used_at}）")
+
+
+if __name__ == "__main__":
+    main()
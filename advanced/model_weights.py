@@ -0,0 +1,305 @@
+"""
+safetensors 权重的只读内存映射加载
+多个工作进程加载同一个模型时共享同一份物理内存
+
+from_pretrained 会把权重复制到每个进程自己的内存里，N 个进程就占 N 份；
+这里直接把 model.safetensors 以只读方式 mmap，模型参数指向映射的内存，
+物理页由操作系统的页缓存统一管理，所有进程共享。
+
+- convert_to_safetensors(): 下载完成后把 pytorch_model.bin 转换成 model.safetensors
+- convert_model(): 转换已下载的模型（模型仓库中的模型转换成一个新版本再启用，不修改正在使用的版本）
+- load_mmap_model(): 只读 mmap 加载（参数不可写，只适用于推理）
+- memory_report(): 读取 /proc/<pid>/smaps，统计进程独占和共享的内存页（仅 Linux）
+
+运行方式:
+    python -m advanced.model_weights convert chinese english   # 转换已下载的旧模型
+    python -m advanced.model_weights report chinese --processes 4
+"""
+
+import argparse
+import json
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import warnings
+from pathlib import Path
+
+SAFETENSORS_FILE = "model.safetensors"
+SAFETENSORS_INDEX_FILE = "model.safetensors.index.json"
+
+# 设置 SENTIMENT_MMAP_WEIGHTS=0 可以关闭 mmap 加载，回到 from_pretrained
+MMAP_ENABLED = os.environ.get("SENTIMENT_MMAP_WEIGHTS", "1") not in ("0", "false", "")
+
+# safetensors 头部中的 dtype 名称 -> torch dtype 属性名
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def safetensors_files(model_dir):
+    """模型目录中的 safetensors 权重文件列表（支持分片），没有时返回空列表"""
+    model_dir = Path(model_dir)
+    index_path = model_dir / SAFETENSORS_INDEX_FILE
+    if index_path.exists():
+        with open(index_path, "r", encoding="utf-8") as f:
+            weight_map = json.load(f)["weight_map"]
+        return [model_dir / name for name in dict.fromkeys(weight_map.values())]
+    if (model_dir / SAFETENSORS_FILE).exists():
+        return [model_dir / SAFETENSORS_FILE]
+    return []
+
+
+def convert_to_safetensors(model_dir):
+    """
+    把模型目录中的 pytorch_model.bin 转换成 safetensors 格式（已是 safetensors 时跳过）
+
+    目录中有清单（manifest.json）时按转换后的文件重新生成。
+    会原地修改 model_dir，不要对正在使用的模型版本调用（见 convert_model）。
+
+    Returns:
+        是否做了转换
+    """
+    from advanced.model_downloader import MANIFEST_FILE, write_manifest
+    from advanced.sentiment_analysis import transformers
+
+    model_dir = Path(model_dir)
+    if safetensors_files(model_dir):
+        return False
+    bin_files = sorted(model_dir.glob("pytorch_model*.bin"))
+    if not bin_files:
+        return False
+
+    # save_pretrained 会正确处理共享（tied）的权重和旧版参数名
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(str(model_dir))
+    model.save_pretrained(str(model_dir), safe_serialization=True)
+    for path in bin_files + [model_dir / "pytorch_model.bin.index.json"]:
+        if path.exists():
+            path.unlink()
+    if (model_dir / MANIFEST_FILE).exists():
+        write_manifest(model_dir)
+    print(f"   🔁 已转换为 safetensors: {model_dir}")
+    return True
+
+
+def convert_model(model_key):
+    """
+    把已下载的模型转换成 safetensors 格式
+
+    模型仓库中的模型: 复制正在使用的版本，在副本上转换，完成后作为新版本启用
+    （经 activate_revision 切换，缓存中的模型会被热替换）；正在使用的版本不会被修改，
+    转换失败也不影响它。自定义路径（不在仓库中）的模型原地转换。
+
+    Returns:
+        新版本名；原地转换或不需要转换时返回 None
+    """
+    from advanced.sentiment_analysis import MODEL_CONFIGS, activate_revision, model_store
+
+    local_path = Path(MODEL_CONFIGS[model_key]["local_path"])
+    if safetensors_files(local_path) or not any(local_path.glob("pytorch_model*.bin")):
+        return None
+    if not model_store.owns(local_path):
+        convert_to_safetensors(local_path)
+        return None
+
+    revision = model_store.new_revision_name(model_key)
+    target = model_store.revision_path(model_key, revision)
+    staging = target.with_name(f".{revision}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        shutil.copytree(os.path.realpath(local_path), staging)
+        convert_to_safetensors(staging)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    activate_revision(model_key, revision)
+    return revision
+
+
+def _mmap_safetensors(path):
+    """以只读方式映射一个 safetensors 文件，返回 {参数名: 指向映射内存的张量}"""
+    from advanced.sentiment_analysis import torch
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header_size = struct.unpack("<Q", mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_size])
+    data_start = 8 + header_size
+
+    with warnings.catch_warnings():
+        # 只读内存会触发 "buffer is not writable" 警告；推理不会写参数，可以忽略
+        warnings.simplefilter("ignore", UserWarning)
+        # 张量持有 mmap 对象的引用，模型存在期间映射不会被关闭
+        buffer = torch.frombuffer(mapped, dtype=torch.uint8)
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        begin, end = info["data_offsets"]
+        dtype_name = _DTYPES.get(info["dtype"])
+        if dtype_name is None or not hasattr(torch, dtype_name):
+            raise ValueError(f"{path} 中的参数 {name} 使用了不支持 mmap 加载的类型 {info['dtype']}")
+        dtype = getattr(torch, dtype_name)
+        tensors[name] = buffer[data_start + begin:data_start + end].view(dtype).view(info["shape"])
+    return tensors
+
+
+def load_mmap_model(model_dir):
+    """
+    加载模型，参数直接指向只读映射的 safetensors 文件
+
+    注意: 参数所在内存不可写，只能用于推理（对参数做原地修改会导致进程崩溃）
+
+    Returns:
+        模型；目录中没有 safetensors 文件或参数名不匹配时返回 None，由调用方回退到 from_pretrained
+    """
+    from advanced.sentiment_analysis import transformers
+
+    files = safetensors_files(model_dir)
+    if not files:
+        return None
+
+    state_dict = {}
+    try:
+        for path in files:
+            state_dict.update(_mmap_safetensors(path))
+    except ValueError as e:
+        warnings.warn(f"{e}，改用 from_pretrained 加载")
+        return None
+
+    config = transformers.AutoConfig.from_pretrained(str(model_dir))
+    # 跳过随机初始化，参数马上会被替换
+    from transformers.modeling_utils import no_init_weights
+    with no_init_weights():
+        model = transformers.AutoModelForSequenceClassification.from_config(config)
+
+    # assign=True: 直接使用映射的张量，而不是复制到模型已分配的内存里
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    tied = {name for name, _ in model.named_parameters(remove_duplicate=False)} - set(state_dict)
+    missing = [key for key in result.missing_keys if key not in tied]
+    if missing:
+        warnings.warn(f"{model_dir} 的权重缺少 {len(missing)} 个参数（如 {missing[0]}），改用 from_pretrained 加载")
+        return None
+    return model.eval()
+
+
+def memory_report(pid=None, weight_suffix=".safetensors"):
+    """
+    统计进程的内存页（单位 KB，仅 Linux）
+
+    Returns:
+        {"rss", "pss", "private", "shared", "weights_rss", "weights_private", "weights_shared"}，
+        不支持的系统返回 None
+        - private: 只属于该进程的页（进程退出后释放的内存）
+        - shared: 与其他进程共享的页
+        - weights_*: 其中属于 safetensors 权重文件映射的部分
+    """
+    smaps = Path(f"/proc/{pid or 'self'}/smaps")
+    if not smaps.exists():
+        return None
+
+    report = dict.fromkeys(["rss", "pss", "private", "shared", "weights_rss", "weights_private", "weights_shared"], 0)
+    is_weights = False
+    with open(smaps, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split()
+            if not fields[0].endswith(":"):
+                # 映射区域的标题行: 地址 权限 偏移 设备 inode [路径]
+                is_weights = len(fields) >= 6 and fields[-1].endswith(weight_suffix)
+                continue
+            key, value = fields[0][:-1], fields[1] if len(fields) > 1 else "0"
+            if not value.isdigit():
+                continue
+            value = int(value)
+            if key == "Rss":
+                report["rss"] += value
+                if is_weights:
+                    report["weights_rss"] += value
+            elif key == "Pss":
+                report["pss"] += value
+            elif key in ("Private_Clean", "Private_Dirty"):
+                report["private"] += value
+                if is_weights:
+                    report["weights_private"] += value
+            elif key in ("Shared_Clean", "Shared_Dirty"):
+                report["shared"] += value
+                if is_weights:
+                    report["weights_shared"] += value
+    return report
+
+
+def _report_worker(model_key, model_path, barrier, queue):
+    """工作进程: 加载模型并推理一次，等所有进程都加载完后上报内存统计"""
+    from advanced.sentiment_analysis import MODEL_CONFIGS
+    from advanced.sentiment_engine import SentimentEngine
+
+    if model_path:
+        MODEL_CONFIGS.setdefault(model_key, {"name": model_key, "display_name": model_key})
+        MODEL_CONFIGS[model_key]["local_path"] = Path(model_path)
+    SentimentEngine(model_key).classify(["预热"])
+    barrier.wait()
+    queue.put((os.getpid(), memory_report()))
+    barrier.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="safetensors 权重转换 / 多进程共享内存报告")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser("convert", help="把已下载模型的 .bin 权重转换成 safetensors")
+    convert_parser.add_argument("models", nargs="*", help="模型键名（默认全部）")
+    report_parser = subparsers.add_parser("report", help="启动多个进程加载同一模型，对比独占/共享内存")
+    report_parser.add_argument("model", nargs="?", default="chinese", help="模型键名")
+    report_parser.add_argument("--model-path", help="覆盖模型的本地路径")
+    report_parser.add_argument("--processes", type=int, default=2, help="进程数")
+    args = parser.parse_args(argv)
+
+    from advanced.sentiment_analysis import MODEL_CONFIGS
+
+    if args.command == "convert":
+        for model_key in args.models or list(MODEL_CONFIGS):
+            local_path = MODEL_CONFIGS[model_key]["local_path"]
+            if not local_path.exists():
+                print(f"⚠️ {model_key} 尚未下载: {local_path}")
+            elif safetensors_files(local_path):
+                print(f"✅ {model_key} 已是 safetensors 格式")
+            else:
+                revision = convert_model(model_key)
+                if revision:
+                    print(f"✅ {model_key} 已转换为新版本 {revision} 并启用")
+        return
+
+    if memory_report() is None:
+        print("⚠️ 内存报告需要 /proc/<pid>/smaps（仅 Linux 支持）")
+        return
+
+    print("=" * 60)
+    print(f"{args.processes} 个进程加载 {args.model} 模型的内存占用（mmap: {'开启' if MMAP_ENABLED else '关闭'}）")
+    print("=" * 60)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.processes)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_report_worker, args=(args.model, args.model_path, barrier, queue))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    reports = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    print(f"\n{'PID':>8}{'RSS':>10}{'PSS':>10}{'独占':>10}{'共享':>10}{'权重独占':>10}{'权重共享':>10}   (MB)")
+    for pid, report in sorted(reports):
+        values = [report[key] / 1024 for key in
+                  ("rss", "pss", "private", "shared", "weights_private", "weights_shared")]
+        print(f"{pid:>8}" + "".join(f"{value:>10.1f}" for value in values))
+    print("\n💡 权重共享的页在所有进程中只占一份物理内存；PSS 把共享页按进程数平摊")
+
+
+if __name__ == "__main__":
+    main()
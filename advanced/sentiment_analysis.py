@@ -5,23 +5,40 @@ Transformers 情感分析示例
 模型已下载到本地，从本地路径加载使用，无需网络连接
 """
 
+import importlib
 import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
 
-# 配置本地模型存储目录 - C盘根目录下的models文件夹
-MODELS_DIR = Path("C:/models")
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
+if not __package__:
+    # 直接运行脚本（python advanced/sentiment_analysis.py）时 sys.path 中只有 advanced/ 目录，
+    # 先把仓库根目录加进去，下面的 advanced.* / utils.* 导入才能找到
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# 模型配置
+from advanced.model_store import model_store
+from utils.metrics import metrics
+
+# 本地模型仓库目录（见 advanced/model_store.py）
+# 可通过 SENTIMENT_MODEL_STORE 环境变量或 sentiment_config.json 配置，
+# 默认 Windows 上为 C:/models，其他系统为 ~/.cache/python-for-ai/models
+# 注意: 目录在第一次下载模型时才会创建，导入本模块不会产生文件系统副作用
+MODELS_DIR = model_store.root
+
+# 模型配置（local_path 指向仓库中该模型的 current 版本）
 MODEL_CONFIGS = {
     "chinese": {
         "name": "uer/roberta-base-finetuned-chinanews-chinese",
-        "local_path": MODELS_DIR / "chinese-sentiment",
+        "local_path": model_store.current_path("chinese"),
         "display_name": "中文情感分析模型"
     },
     "english": {
         "name": "distilbert-base-uncased-finetuned-sst-2-english",
-        "local_path": MODELS_DIR / "english-sentiment",
+        "local_path": model_store.current_path("english"),
         "display_name": "英文情感分析模型"
     }
 }
@@ -36,18 +53,64 @@ if 'HF_ENDPOINT' not in os.environ:
 if 'HF_HUB_DOWNLOAD_TIMEOUT' not in os.environ:
     os.environ['HF_HUB_DOWNLOAD_TIMEOUT'] = '300'  # 5分钟超时
 
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
 
 
-def download_model(model_key="chinese", force_download=False):
+class _LazyModule:
+    """
+    延迟导入的模块代理
+
+    torch / transformers 导入一次需要好几秒，而 main.py 只是打印本模块的提示。
+    这里先放一个占位对象，第一次访问属性（如 torch.float16）时才真正 import。
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            # importlib 内部有导入锁，多线程同时首次访问也是安全的
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "已加载" if self._module is not None else "未加载"
+        return f"<延迟导入模块 {self._name!r}（{state}）>"
+
+
+torch = _LazyModule("torch")
+transformers = _LazyModule("transformers")
+
+# 分类器缓存的内存预算（单位：MB），可通过环境变量覆盖；0 或空表示不限制
+CACHE_MAX_MEMORY_MB = float(os.environ.get("SENTIMENT_CACHE_MAX_MB", "0") or 0)
+
+# 推理后端: 原始 fp32 PyTorch、动态 INT8 量化、ONNX Runtime
+# int8 / onnx 需要先运行 python -m advanced.sentiment_backends export 生成
+BACKENDS = ("pytorch", "int8", "onnx")
+
+
+def download_model(model_key="chinese", force_download=False, mirror_dir=None, max_workers=4, executor=None):
     """
     下载模型到本地
     
+    所有文件并发下载到临时目录，校验通过后才原子地改名为模型仓库中的新版本目录，
+    再把 current 切换过去并热替换缓存中的模型，中断后再次调用会从断点继续
+    （见 advanced/model_downloader.py、advanced/model_store.py）。
+    只有 pytorch_model.bin 的模型会在提交前转换成 safetensors，以便 mmap 共享加载
+    
     Args:
         model_key: 模型键名 ("chinese" 或 "english")
         force_download: 是否强制重新下载
+        mirror_dir: 本地镜像目录（默认读取 SENTIMENT_MODEL_MIRROR 环境变量，未设置则从 HF_ENDPOINT 下载）
+        max_workers: 最大并发下载数
+        executor: 共享的下载线程池（download_all_models 用它限制总并发）
     """
+    from advanced.model_downloader import ModelDownloader, make_source
+    from advanced.model_weights import convert_to_safetensors
+    
     if model_key not in MODEL_CONFIGS:
         raise ValueError(f"未知的模型键: {model_key}")
     
@@ -60,26 +123,35 @@ def download_model(model_key="chinese", force_download=False):
         print(f"✅ {config['display_name']} 已存在于本地: {local_path}")
         return str(local_path)
     
+    # 旧版布局（C:/models/chinese-sentiment）中已下载的模型直接导入仓库，不再重新下载
+    legacy_path = MODELS_DIR / f"{model_key}-sentiment"
+    if model_store.owns(local_path) and not force_download and (legacy_path / "config.json").exists():
+        print(f"📦 导入旧版目录中的 {config['display_name']}: {legacy_path}")
+        revision = model_store.import_directory(model_key, legacy_path, activate=False)
+        activate_revision(model_key, revision)
+        return str(local_path)
+    
     print(f"\n📥 正在下载 {config['display_name']}...")
     print(f"   模型: {model_name}")
     print(f"   保存到: {local_path}")
     print("   这可能需要几分钟时间，请耐心等待...\n")
     
     try:
-        # 确保目录存在
-        local_path.mkdir(parents=True, exist_ok=True)
-        
-        # 下载模型和分词器（先下载到临时位置，然后保存到指定路径）
-        print("   正在下载模型文件...")
-        # 注意: from_pretrained 不支持 timeout 参数
-        # 超时设置需要通过环境变量 HF_HUB_DOWNLOAD_TIMEOUT 或 requests 库配置
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        
-        # 保存到指定路径
-        print("   正在保存到本地...")
-        tokenizer.save_pretrained(str(local_path))
-        model.save_pretrained(str(local_path))
+        source = make_source(model_name, mirror_dir)
+        if model_store.owns(local_path):
+            # 下载为仓库中的新版本，完成后原子地切换 current
+            revision = model_store.new_revision_name(model_key)
+            target = model_store.revision_path(model_key, revision)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            downloader = ModelDownloader(source, target, max_workers=max_workers,
+                                         partial_dir=model_store.staging_path(model_key))
+            downloader.download(executor=executor, finalize=convert_to_safetensors)
+            activate_revision(model_key, revision)
+        else:
+            # 自定义的 local_path（不在模型仓库中）: 直接下载到该目录
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            downloader = ModelDownloader(source, local_path, max_workers=max_workers)
+            downloader.download(executor=executor, finalize=convert_to_safetensors)
         
         print(f"✅ {config['display_name']} 下载完成！")
         print(f"   保存位置: {local_path}\n")
@@ -89,9 +161,10 @@ def download_model(model_key="chinese", force_download=False):
     except Exception as e:
         print(f"❌ 下载失败: {e}")
         print("\n提示:")
-        print("1. 检查网络连接")
+        print("1. 检查网络连接，重新运行会从断点继续下载")
         print("2. 如果使用镜像，确保 HF_ENDPOINT 环境变量已设置")
         print("3. 可以手动设置镜像: os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'")
+        print("4. 离线环境可以设置 SENTIMENT_MODEL_MIRROR 指向本地镜像目录")
         raise
 
 
@@ -106,7 +179,9 @@ def get_model_path(model_key="chinese", auto_download=True):
     config = MODEL_CONFIGS[model_key]
     local_path = config["local_path"]
     
-    if local_path.exists():
+    with metrics.span("sentiment_stage_seconds", stage="get_model_path"):
+        exists = local_path.exists()
+    if exists:
         return str(local_path)
     elif auto_download:
         return download_model(model_key)
@@ -116,6 +191,351 @@ def get_model_path(model_key="chinese", auto_download=True):
         )
 
 
+def _normalize_dtype(dtype):
+    """把 dtype 统一成字符串形式（如 "float16"），便于作为缓存键"""
+    if dtype is None:
+        return None
+    return str(dtype).replace("torch.", "")
+
+
+def _model_nbytes(model):
+    """估算模型权重占用的内存（state_dict 中所有张量，包括量化后打包的权重）"""
+    if hasattr(model, "nbytes"):
+        return model.nbytes
+
+    def tensor_bytes(value):
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(item) for item in value)
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        return 0
+
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
+
+
+class _LoadedModel:
+    """缓存中的一份已加载模型（分词器 + 权重），供多个 pipeline 共享"""
+
+    def __init__(self, model, tokenizer, nbytes, load_seconds, revision=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.nbytes = nbytes
+        self.load_seconds = load_seconds
+        self.revision = revision
+        self.pipelines = {}
+
+
+class ClassifierCache:
+    """
+    进程级分类器缓存
+
+    - 按 (模型键, dtype, device, 后端) 只加载一次权重
+    - 不同的任务参数（如 top_k）共享同一份权重，只各自创建一个轻量 pipeline
+    - 超出内存预算时按 LRU 淘汰最久未使用的模型
+    - 记录加载耗时和命中/未命中次数
+    """
+
+    def __init__(self, max_memory_mb=None):
+        """
+        Args:
+            max_memory_mb: 内存预算（MB），None 表示使用 CACHE_MAX_MEMORY_MB，0 表示不限制
+        """
+        if max_memory_mb is None:
+            max_memory_mb = CACHE_MAX_MEMORY_MB
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self._models = OrderedDict()
+        # 正在加载的模型: model_id -> Future。加载在全局锁外进行，
+        # 不同模型可以并行加载，同一模型的并发请求等待同一次加载
+        self._loading = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.model_loads = 0
+        self.evictions = 0
+        self.reloads = 0
+        # 每个模型的代数: 热替换或失效时加一，SentimentEngine 据此判断是否需要切换到新模型
+        self._generations = {}
+        # 同一时刻只做一次热替换，避免重复加载
+        self._reload_lock = threading.Lock()
+
+    def _load_model(self, model_key, dtype, device, backend):
+        """从本地路径加载分词器和模型"""
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的推理后端: {backend}（可选: {', '.join(BACKENDS)}）")
+
+        start = time.perf_counter()
+        # 解析 current 链接，记录实际加载的版本（之后切换版本不影响已加载的模型）
+        revision = None
+        if backend == "pytorch":
+            from advanced.model_weights import MMAP_ENABLED, load_mmap_model
+            model_path = os.path.realpath(get_model_path(model_key, auto_download=True))
+            revision = Path(model_path).name
+            tokenizer = transformers.AutoTokenizer.from_pretrained(model_path)
+            model = None
+            if dtype is None and MMAP_ENABLED:
+                # 参数直接指向只读映射的 safetensors 文件，多个进程共享同一份物理内存
+                model = load_mmap_model(model_path)
+            if model is None:
+                kwargs = {}
+                if dtype is not None:
+                    kwargs["torch_dtype"] = getattr(torch, dtype)
+                model = transformers.AutoModelForSequenceClassification.from_pretrained(model_path, **kwargs)
+        else:
+            from advanced.sentiment_backends import load_backend_model
+            model, tokenizer = load_backend_model(model_key, backend)
+        if device is not None:
+            model.to(device)
+        model.eval()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.model_loads += 1
+        metrics.observe("sentiment_model_load_seconds", elapsed, model=model_key, backend=backend)
+        return _LoadedModel(model, tokenizer, _model_nbytes(model), elapsed, revision)
+
+    def _evict(self, keep):
+        """按 LRU 淘汰模型，直到总内存回到预算以内（刚加载的模型不会被淘汰）"""
+        if self.max_memory_bytes <= 0:
+            return
+        while self.memory_bytes() > self.max_memory_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            del self._models[oldest]
+            self.evictions += 1
+            metrics.inc("sentiment_classifier_cache_evictions_total")
+
+    def _get_entry(self, model_key, dtype, device, backend):
+        model_id = (model_key, dtype, device, backend)
+        with self._lock:
+            entry = self._models.get(model_id)
+            if entry is not None:
+                self._models.move_to_end(model_id)
+                return entry
+            future = self._loading.get(model_id)
+            if future is None:
+                future = self._loading[model_id] = Future()
+                generation = self._generations.get(model_key, 0)
+            else:
+                generation = None
+        if generation is None:
+            # 其他线程正在加载同一个模型，等它完成（加载失败时抛出同样的异常）
+            return future.result()
+
+        try:
+            entry = self._load_model(model_key, dtype, device, backend)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(model_id, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._loading.pop(model_id, None)
+            # 加载期间模型被失效 / 热替换过时不放入缓存（加载的可能是旧版本），只返回给本次调用
+            if self._generations.get(model_key, 0) == generation:
+                self._models[model_id] = entry
+                self._evict(keep=model_id)
+        future.set_result(entry)
+        return entry
+
+    def get_model(self, model_key="chinese", dtype=None, device=None, backend="pytorch"):
+        """
+        获取缓存中的模型和分词器（不存在则加载）
+
+        Returns:
+            (model, tokenizer)
+        """
+        entry = self._get_entry(model_key, _normalize_dtype(dtype), device, backend)
+        return entry.model, entry.tokenizer
+
+    def get(self, model_key="chinese", dtype=None, device=None, backend="pytorch", **task_options):
+        """
+        获取情感分析 pipeline
+
+        Args:
+            model_key: 模型键名
+            dtype: 权重精度，如 "float32"、"bfloat16"
+            device: 运行设备，如 "cpu"、"cuda:0"
+            backend: 推理后端（"pytorch" 或 "int8"；onnx 后端请使用 SentimentEngine）
+            **task_options: 传给 pipeline 的任务参数，如 top_k=None
+        """
+        if backend == "onnx":
+            raise ValueError("onnx 后端不支持 pipeline，请使用 SentimentEngine(backend='onnx')")
+        dtype = _normalize_dtype(dtype)
+        options_key = tuple(sorted(task_options.items()))
+        model_id = (model_key, dtype, device, backend)
+        with self._lock:
+            entry = self._models.get(model_id)
+            if entry is not None and options_key in entry.pipelines:
+                self.hits += 1
+                metrics.inc("sentiment_classifier_cache_requests_total", model=model_key, result="hit")
+                self._models.move_to_end(model_id)
+                return entry.pipelines[options_key]
+            self.misses += 1
+        metrics.inc("sentiment_classifier_cache_requests_total", model=model_key, result="miss")
+
+        # 加载模型和创建 pipeline 都在锁外进行，不阻塞其他模型的请求
+        entry = self._get_entry(model_key, dtype, device, backend)
+        classifier = self._build_pipeline(entry, device, task_options)
+        with self._lock:
+            # 并发创建时保留先放入的那个
+            return entry.pipelines.setdefault(options_key, classifier)
+
+    def _build_pipeline(self, entry, device, task_options):
+        """用已加载的模型创建一个轻量 pipeline"""
+        with metrics.span("sentiment_stage_seconds", stage="pipeline_build"):
+            return transformers.pipeline(
+                "sentiment-analysis",
+                model=entry.model,
+                tokenizer=entry.tokenizer,
+                device=device,
+                **task_options,
+            )
+
+    def reload(self, model_key):
+        """
+        热替换某个模型（如模型仓库切换了版本）
+
+        先在锁外加载新版本（以及已创建过的 pipeline），期间请求继续使用旧模型；
+        全部加载完成后在锁内一次性替换，不会出现冷启动。
+        SentimentEngine 在下一次调用时切换到新模型，正在进行的调用仍用旧模型完成，
+        旧模型在不再被引用后释放（释放时间记录在 sentiment_model_drain_seconds 指标中）。
+
+        Returns:
+            替换的缓存项数
+        """
+        with self._reload_lock:
+            return self._reload(model_key)
+
+    def _reload(self, model_key):
+        start = time.perf_counter()
+        with self._lock:
+            old_entries = {model_id: entry for model_id, entry in self._models.items() if model_id[0] == model_key}
+        fresh = {}
+        for model_id, old_entry in old_entries.items():
+            _, dtype, device, backend = model_id
+            try:
+                entry = self._load_model(model_key, dtype, device, backend)
+            except Exception as e:
+                # 如新版本的 int8 / onnx 变体导出失败: 保留旧模型继续服务，不让请求失败
+                print(f"⚠️ 无法加载 {model_id} 的新版本，继续使用旧版本: {e}")
+                metrics.inc("sentiment_model_reload_errors_total", model=model_key)
+                continue
+            for options_key in old_entry.pipelines:
+                entry.pipelines[options_key] = self._build_pipeline(entry, device, dict(options_key))
+            fresh[model_id] = entry
+        with self._lock:
+            for model_id, entry in fresh.items():
+                if model_id in self._models:
+                    # 直接赋值，保持在 LRU 中的位置不变
+                    self._models[model_id] = entry
+            self._generations[model_key] = self._generations.get(model_key, 0) + 1
+            self.reloads += 1
+        swapped_at = time.time()
+
+        # 旧模型不会被立即销毁: 正在处理的批次（以及还持有它的引擎 / pipeline）用完后才释放
+        for model_id in fresh:
+            self._track_release(model_key, old_entries[model_id].model, swapped_at)
+
+        metrics.inc("sentiment_classifier_cache_reloads_total", model=model_key)
+        metrics.observe("sentiment_model_reload_seconds", time.perf_counter() - start, model=model_key)
+        metrics.set("sentiment_model_swap_timestamp_seconds", swapped_at, model=model_key)
+        return len(fresh)
+
+    @staticmethod
+    def _track_release(model_key, model, swapped_at):
+        """旧模型被垃圾回收时记录从切换到释放经过的时间"""
+        def released():
+            metrics.inc("sentiment_model_released_total", model=model_key)
+            metrics.observe("sentiment_model_drain_seconds", time.time() - swapped_at, model=model_key)
+
+        try:
+            weakref.finalize(model, released)
+        except TypeError:
+            # 不支持弱引用的对象，不做统计
+            pass
+
+    def generation(self, model_key):
+        """模型的当前代数（每次热替换或失效后加一）"""
+        return self._generations.get(model_key, 0)
+
+    def memory_bytes(self):
+        """当前缓存中所有模型的权重总大小"""
+        return sum(entry.nbytes for entry in self._models.values())
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "model_loads": self.model_loads,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "memory_mb": self.memory_bytes() / 1024 / 1024,
+                "max_memory_mb": self.max_memory_bytes / 1024 / 1024,
+                "models": [
+                    {
+                        "model_key": key,
+                        "dtype": dtype,
+                        "device": device,
+                        "backend": backend,
+                        "revision": entry.revision,
+                        "memory_mb": entry.nbytes / 1024 / 1024,
+                        "load_seconds": entry.load_seconds,
+                        "pipelines": len(entry.pipelines),
+                    }
+                    for (key, dtype, device, backend), entry in self._models.items()
+                ],
+            }
+
+    def invalidate(self, model_key):
+        """移除某个模型的所有缓存（如本地模型文件已更新），下次使用时重新加载"""
+        with self._lock:
+            for model_id in [model_id for model_id in self._models if model_id[0] == model_key]:
+                del self._models[model_id]
+            self._generations[model_key] = self._generations.get(model_key, 0) + 1
+
+    def clear(self):
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._models.clear()
+
+
+# 进程级共享的分类器缓存
+classifier_cache = ClassifierCache()
+
+
+def activate_revision(model_key, revision):
+    """
+    把模型切换到仓库中的指定版本，并热替换缓存中已加载的模型
+
+    切换前先为新版本导出正在使用的版本已有的 int8 / onnx 变体，
+    导出失败时不切换（继续使用当前版本）。
+
+    Returns:
+        被 LRU 清理掉的旧版本列表
+    """
+    from advanced.sentiment_backends import export_variants
+
+    for backend in export_variants(model_key, model_store.revision_path(model_key, revision)):
+        print(f"📦 已为 {model_key} 版本 {revision} 导出 {backend} 变体")
+    removed = model_store.activate(model_key, revision)
+    classifier_cache.reload(model_key)
+    return removed
+
+
+def get_classifier(model_key="chinese", dtype=None, device=None, backend="pytorch", **task_options):
+    """
+    从进程级缓存获取情感分析 pipeline（同一模型只加载一次）
+
+    用法:
+        classifier = get_classifier("chinese")
+        classifier = get_classifier("chinese", top_k=None)  # 与上面共享权重
+    """
+    return classifier_cache.get(model_key, dtype=dtype, device=device, backend=backend, **task_options)
+
+
 def basic_sentiment_analysis():
     """基本情感分析示例（使用本地模型）"""
     print("=" * 60)
@@ -123,13 +543,10 @@ def basic_sentiment_analysis():
     print("=" * 60)
     
     try:
-        # 获取本地模型路径（如果不存在会自动下载）
-        model_path = get_model_path("chinese", auto_download=True)
-        
-        # 从本地路径加载模型
-        classifier = pipeline("sentiment-analysis", model=model_path)
-        
-        print(f"classifier.model.config.id2label: {classifier.model.config.id2label}")
+        # 按文本语言选择中文或英文模型
+        from advanced.sentiment_postprocess import display_label
+        from advanced.sentiment_router import SentimentRouter
+        router = SentimentRouter()
 
         # 测试文本
         texts = [
@@ -137,20 +554,25 @@ def basic_sentiment_analysis():
             "这部电影太糟糕了，完全不值得看。",
             "产品还不错，但价格有点贵。",
             "服务态度很好，推荐大家来试试。",
-            "中国足球战胜了巴西男足"
+            "中国足球战胜了巴西男足",
+            "The service was friendly and fast."
         ]
         
         print("\n分析结果：")
         for text in texts:
+            # 从缓存获取分类器（首次调用时加载本地模型，如果不存在会自动下载）
+            model_key = router.model_for(text)
+            classifier = get_classifier(model_key)
             result = classifier(text)
             label = result[0]['label']
             score = result[0]['score']
             
-            # 转换标签为中文
+            # 转换标签为中文（各模型的标签不同，不能只判断 "POSITIVE"）
             print(f"result: {result[0]}")
-            label_cn = "正面" if label == "POSITIVE" else "负面"
+            label_cn = display_label(label)
             
             print(f"\n文本: {text}")
+            print(f"  模型: {model_key}")
             print(f"  情感: {label_cn}")
             print(f"  置信度: {score:.4f}")
         
@@ -167,32 +589,33 @@ def batch_sentiment_analysis():
     print("=" * 60)
     
     try:
-        # 获取本地模型路径
-        model_path = get_model_path("chinese", auto_download=True)
-        
-        # 从本地路径加载模型
-        classifier = pipeline("sentiment-analysis", model=model_path)
+        # 按语言分组后交给各模型的批量推理引擎（长度分桶 + 动态填充），
+        # 与 get_classifier() 共享模型权重
+        from advanced.sentiment_postprocess import display_label
+        from advanced.sentiment_router import SentimentRouter
+        router = SentimentRouter()
         
-        # 批量文本
+        # 批量文本（中英文混合）
         texts = [
             "这个餐厅的菜品非常美味，环境也很优雅。",
             "快递太慢了，等了整整一周才收到。",
+            "The delivery was late and the box was damaged.",
             "客服回复很快，问题解决得很及时。",
             "产品质量一般，性价比不高。",
             "非常满意，会再次购买！"
         ]
         
         print("\n批量分析结果：")
-        # 批量处理（更高效）
-        results = classifier(texts)
+        # 批量处理（更高效，每个模型只运行一次）
+        results = router.classify(texts, batch_size=32)
         
         for text, result in zip(texts, results):
             label = result['label']
             score = result['score']
-            label_cn = "正面" if label == "POSITIVE" else "负面"
+            label_cn = display_label(label)
             
             print(f"\n文本: {text}")
-            print(f"  情感: {label_cn} (置信度: {score:.4f})")
+            print(f"  情感: {label_cn} (置信度: {score:.4f}, 模型: {result['model']})")
         
     except Exception as e:
         print(f"❌ 错误: {e}")
@@ -207,48 +630,26 @@ def detailed_sentiment_analysis():
     print("=" * 60)
     
     try:
-        # 获取本地模型路径
-        model_path = get_model_path("chinese", auto_download=True)
-        
-        # 从本地路径加载模型
-        classifier = pipeline("sentiment-analysis", 
-                             model=model_path,
-                             top_k=None)  # 返回所有类别的分数
+        from advanced.sentiment_router import SentimentRouter
+        router = SentimentRouter()
         
         texts = [
             "这个电影太精彩了！",
-            "服务态度很差，不推荐。"
+            "服务态度很差，不推荐。",
+            "What a wonderful movie!"
         ]
         
         print("\n详细分析结果：")
-        for text in texts:
-            try:
-                results = classifier(text)
-                print(f"\n文本: {text}")
-                
-                # 处理返回结果：top_k=None 时返回格式为 [[{...}, {...}]]
-                # 单个文本时，results 是 [[{label: 'POSITIVE', score: 0.9}, {label: 'NEGATIVE', score: 0.1}]]
-                if isinstance(results, list):
-                    # 获取第一个（也是唯一一个）文本的所有结果
-                    if len(results) > 0 and isinstance(results[0], list):
-                        text_results = results[0]
-                    else:
-                        text_results = results
-                    
-                    # 显示所有类别的分数
-                    for result in text_results:
-                        if isinstance(result, dict):
-                            label = result.get('label', 'UNKNOWN')
-                            score = result.get('score', 0.0)
-                            label_cn = "正面" if label == "POSITIVE" else "负面"
-                            print(f"  {label_cn}: {score:.4f}")
-                        else:
-                            print(f"  结果格式异常: {result}")
-                else:
-                    print(f"  无法解析结果类型: {type(results)}")
-            except Exception as e:
-                print(f"\n文本: {text}")
-                print(f"  ❌ 处理出错: {e}")
+        # 每个模型批量计算一次，得到列式结果: 类别下标数组 + 概率矩阵（所有类别的分数）
+        # 不再逐条解析 top_k=None 返回的 [[{...}, {...}]] 嵌套列表
+        for model_key, indices in router.route(texts).items():
+            engine = router.engine(model_key)
+            batch = engine.classify_batch([texts[i] for i in indices])
+            names = batch.label_map.display_names
+            for index, label_id, row in zip(indices, batch.label_ids.tolist(), batch.scores.tolist()):
+                print(f"\n文本: {texts[index]}（模型: {model_key}, 预测: {names[label_id]}）")
+                for name, score in zip(names, row):
+                    print(f"  {name}: {score:.4f}")
         
     except Exception as e:
         print(f"❌ 错误: {e}")
@@ -259,21 +660,39 @@ def detailed_sentiment_analysis():
     print("\n" + "=" * 60 + "\n")
 
 
-def download_all_models():
-    """下载所有模型到本地"""
+def download_all_models(model_keys=None, force_download=False, mirror_dir=None, max_workers=4):
+    """下载所有模型到本地（多个模型同时下载，共享同一个限制并发的线程池）"""
+    from concurrent.futures import ThreadPoolExecutor
+    
     print("\n" + "=" * 60)
     print("下载所有模型到本地")
     print("=" * 60)
     print(f"\n模型保存目录: {MODELS_DIR}\n")
     
-    for model_key in MODEL_CONFIGS.keys():
-        try:
-            download_model(model_key, force_download=False)
-        except Exception as e:
-            print(f"❌ 下载 {model_key} 模型失败: {e}\n")
+    model_keys = list(model_keys or MODEL_CONFIGS.keys())
+    failed = []
+    # 两个线程池: 一个按模型调度，一个真正下载文件（总并发不超过 max_workers）
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download") as file_executor, \
+            ThreadPoolExecutor(max_workers=len(model_keys)) as model_executor:
+        futures = {
+            model_key: model_executor.submit(
+                download_model, model_key, force_download=force_download,
+                mirror_dir=mirror_dir, executor=file_executor,
+            )
+            for model_key in model_keys
+        }
+        for model_key, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(model_key)
+                print(f"❌ 下载 {model_key} 模型失败: {e}\n")
     
     print("=" * 60)
-    print("所有模型下载完成！")
+    if failed:
+        print(f"部分模型下载失败: {', '.join(failed)}（重新运行会从断点继续）")
+    else:
+        print("所有模型下载完成！")
     print("=" * 60 + "\n")
 
 
@@ -306,6 +725,10 @@ def demo():
         # 详细分析
         # detailed_sentiment_analysis()
         
+        stats = classifier_cache.stats()
+        print(f"📊 分类器缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次, "
+              f"模型加载 {stats['model_loads']} 次")
+        
         print("\n✅ 所有示例运行完成！")
     except Exception as e:
         print(f"\n❌ 运行出错: {e}")
@@ -316,14 +739,33 @@ def demo():
         print("4. 检查磁盘空间是否充足")
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    """命令行入口"""
     import sys
     
+    argv = sys.argv[1:] if argv is None else argv
+    
     # 支持命令行参数
-    if len(sys.argv) > 1 and sys.argv[1] == "download":
+    if len(argv) > 0 and argv[0] == "download":
         # 下载所有模型
         download_all_models()
+    elif len(argv) > 0 and argv[0] == "score":
+        # 流式打分 JSONL / CSV 文件: score 输入文件 输出文件 [选项]
+        from advanced.sentiment_scoring import main as score_main
+        score_main(argv[1:])
+    elif len(argv) > 0 and argv[0] == "preload":
+        # 并行预加载并预热所有模型: preload [模型键名...] [--ready-file 文件]
+        from advanced.sentiment_preload import main as preload_main
+        preload_main(argv[1:])
     else:
         # 运行示例
         demo()
 
+
+if __name__ == "__main__":
+    if not __package__:
+        # 直接运行脚本时改为调用包内的同一模块，保证 advanced.* 的导入和进程级缓存只有一份
+        from advanced.sentiment_analysis import main
+    
+    main()
+
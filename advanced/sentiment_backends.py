@@ -0,0 +1,319 @@
+"""
+CPU 推理后端: 动态 INT8 量化 和 ONNX Runtime
+在模型仓库（见 advanced/model_store.py）中每个版本旁边导出优化后的版本，加载时通过 backend= 选择
+
+    <仓库根目录>/chinese/
+    ├── current -> revisions/20240501-120000
+    └── revisions/
+        ├── 20240501-120000/         原始 fp32 模型（backend="pytorch"）
+        ├── 20240501-120000-int8/    动态 INT8 量化（backend="int8"）
+        └── 20240501-120000-onnx/    ONNX Runtime（backend="onnx"，需要 pip install onnxruntime）
+
+导出先写到旁边的临时目录，完成后才改名为 <版本>-int8 / <版本>-onnx（见 file_io.staged_dir），
+导出失败不会留下半个变体目录。
+
+运行方式:
+    python -m advanced.sentiment_backends export [chinese english]
+    python -m advanced.sentiment_backends compare --model chinese --labeled samples.jsonl
+"""
+
+import argparse
+import inspect
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from advanced.file_io import staged_dir
+from advanced.sentiment_analysis import BACKENDS, MODEL_CONFIGS, get_model_path, torch, transformers
+
+QUANTIZED_WEIGHTS = "quantized_model.pt"
+ONNX_MODEL = "model.onnx"
+
+
+def _variant_dir(model_dir, backend):
+    """model_dir 对应的优化版本目录（与它并列，如 revisions/<版本>-int8）"""
+    # model_dir 是 current 链接时，先解析到实际的版本目录
+    model_dir = Path(os.path.realpath(model_dir))
+    return model_dir.with_name(f"{model_dir.name}-{backend}")
+
+
+def variant_path(model_key, backend):
+    """优化版本的保存目录（与原模型目录并列；模型仓库中按版本各自导出）"""
+    local_path = Path(MODEL_CONFIGS[model_key]["local_path"])
+    if backend == "pytorch":
+        return local_path
+    return _variant_dir(local_path, backend)
+
+
+def _quantize(model):
+    """对所有 Linear 层做动态 INT8 量化（权重离线量化，激活值运行时量化）"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_int8(model_key="chinese", model_dir=None):
+    """导出动态 INT8 量化版本，返回保存目录（model_dir 默认为正在使用的版本）"""
+    model_path = model_dir or get_model_path(model_key, auto_download=True)
+    output_dir = _variant_dir(model_path, "int8")
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_path)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+    quantized = _quantize(model)
+
+    # 量化后的模型不能用 save_pretrained 保存，这里单独保存 state_dict
+    with staged_dir(output_dir) as staging:
+        tokenizer.save_pretrained(str(staging))
+        model.config.save_pretrained(str(staging))
+        torch.save(quantized.state_dict(), staging / QUANTIZED_WEIGHTS)
+    return output_dir
+
+
+def export_onnx(model_key="chinese", opset_version=17, model_dir=None):
+    """导出 ONNX 版本（batch 和序列长度都是动态维度），返回保存目录（model_dir 默认为正在使用的版本）"""
+    model_path = model_dir or get_model_path(model_key, auto_download=True)
+    output_dir = _variant_dir(model_path, "onnx")
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_path)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+
+    class LogitsOnly(torch.nn.Module):
+        """只输出 logits，导出的计算图更简单"""
+
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, input_ids, attention_mask):
+            return self.wrapped(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    dummy = tokenizer(["示例文本"], return_tensors="pt", return_token_type_ids=False)
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # 新版 torch 默认走 dynamo 导出（依赖 onnxscript），这里固定用 TorchScript 导出
+        kwargs["dynamo"] = False
+    with staged_dir(output_dir) as staging:
+        torch.onnx.export(
+            LogitsOnly(model),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(staging / ONNX_MODEL),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset_version,
+            **kwargs,
+        )
+        tokenizer.save_pretrained(str(staging))
+        model.config.save_pretrained(str(staging))
+    return output_dir
+
+
+class OnnxSequenceClassifier:
+    """
+    ONNX Runtime 模型的轻量包装
+
+    提供 SentimentEngine 用到的接口（config / device / eval / 调用返回 .logits），
+    所以引擎代码不需要区分后端。
+    """
+
+    def __init__(self, model_dir, num_threads=None):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("onnx 后端需要安装 onnxruntime: pip install onnxruntime") from None
+
+        model_dir = Path(model_dir)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / ONNX_MODEL), options, providers=["CPUExecutionProvider"]
+        )
+        self.config = transformers.AutoConfig.from_pretrained(str(model_dir))
+        self.device = torch.device("cpu")
+        self.nbytes = (model_dir / ONNX_MODEL).stat().st_size
+
+    def eval(self):
+        return self
+
+    def to(self, device):
+        if torch.device(device).type != "cpu":
+            raise ValueError("onnx 后端只支持 CPU")
+        return self
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        feeds = {
+            "input_ids": input_ids.cpu().numpy(),
+            "attention_mask": attention_mask.cpu().numpy(),
+        }
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def load_backend_model(model_key, backend):
+    """
+    加载 int8 / onnx 后端的模型和分词器（供 ClassifierCache 调用）
+
+    Returns:
+        (model, tokenizer)
+    """
+    model_dir = variant_path(model_key, backend)
+    if not model_dir.exists():
+        raise FileNotFoundError(
+            f"{backend} 版本不存在于 {model_dir}，"
+            f"请先运行: python -m advanced.sentiment_backends export {model_key}"
+        )
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(str(model_dir))
+    if backend == "onnx":
+        return OnnxSequenceClassifier(model_dir), tokenizer
+
+    # int8: 按配置创建空模型，量化出相同的结构后再载入量化权重
+    config = transformers.AutoConfig.from_pretrained(str(model_dir))
+    model = _quantize(transformers.AutoModelForSequenceClassification.from_config(config).eval())
+    # 量化权重中包含打包参数，不是纯张量，需要关闭 weights_only
+    state_dict = torch.load(model_dir / QUANTIZED_WEIGHTS, weights_only=False)
+    model.load_state_dict(state_dict)
+    return model, tokenizer
+
+
+def export_variants(model_key, model_dir):
+    """
+    为即将启用的版本目录导出正在使用的版本已有的 int8 / onnx 变体（已存在的跳过）
+
+    切换版本之前调用（见 sentiment_analysis.activate_revision），否则切换后
+    backend="int8" / "onnx" 的引擎找不到新版本的变体。导出失败时抛出异常，调用方不应再切换。
+
+    Returns:
+        导出的后端列表
+    """
+    current_dir = Path(os.path.realpath(MODEL_CONFIGS[model_key]["local_path"]))
+    model_dir = Path(os.path.realpath(model_dir))
+    if not current_dir.exists() or current_dir == model_dir:
+        return []
+    exported = []
+    for backend, export in (("int8", export_int8), ("onnx", export_onnx)):
+        if _variant_dir(current_dir, backend).exists() and not _variant_dir(model_dir, backend).exists():
+            export(model_key, model_dir=model_dir)
+            exported.append(backend)
+    return exported
+
+
+def export_all(model_keys=None):
+    """为每个模型导出 int8 和 onnx 版本"""
+    for model_key in model_keys or MODEL_CONFIGS.keys():
+        print(f"\n📦 {MODEL_CONFIGS[model_key]['display_name']}")
+        output_dir = export_int8(model_key)
+        print(f"   ✅ INT8 量化版本: {output_dir}")
+        try:
+            output_dir = export_onnx(model_key)
+            print(f"   ✅ ONNX 版本: {output_dir}")
+        except ImportError as e:
+            print(f"   ⚠️ 跳过 ONNX 导出: {e}")
+
+
+def load_labeled_samples(path):
+    """读取带标签的样本（JSONL，每行 {"text": ..., "label": ...}）"""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                samples.append((record["text"], record.get("label")))
+    return samples
+
+
+def compare_backends(model_key="chinese", samples=None, backends=BACKENDS, batch_size=32):
+    """
+    比较各后端的准确率和延迟
+
+    Args:
+        samples: [(文本, 标签), ...]；标签为 None 时只统计与 pytorch 结果的一致率
+        backends: 要比较的后端
+
+    Returns:
+        每个后端一行的统计结果列表
+    """
+    from advanced.sentiment_engine import SentimentEngine
+
+    if samples is None:
+        samples = [
+            ("这个餐厅的菜品非常美味，环境也很优雅。", None),
+            ("快递太慢了，等了整整一周才收到。", None),
+            ("客服回复很快，问题解决得很及时。", None),
+            ("产品质量一般，性价比不高。", None),
+        ] * 25
+    texts = [text for text, _ in samples]
+    gold = [label for _, label in samples]
+
+    rows = []
+    reference = None
+    for backend in backends:
+        try:
+            engine = SentimentEngine(model_key, backend=backend)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"   ⚠️ 跳过 {backend}: {e}")
+            continue
+
+        engine.classify(texts[:batch_size], batch_size=batch_size)  # 预热
+
+        latencies = []
+        for text in texts[:50]:
+            start = time.perf_counter()
+            engine.classify([text])
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        start = time.perf_counter()
+        predictions = [result["label"] for result in engine.classify(texts, batch_size=batch_size)]
+        batch_seconds = time.perf_counter() - start
+
+        if reference is None:
+            reference = predictions
+        row = {
+            "backend": backend,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "throughput": len(texts) / batch_seconds,
+            "agreement": sum(a == b for a, b in zip(predictions, reference)) / len(texts),
+            "accuracy": None,
+        }
+        labeled = [(p, g) for p, g in zip(predictions, gold) if g is not None]
+        if labeled:
+            row["accuracy"] = sum(str(p) == str(g) for p, g in labeled) / len(labeled)
+        rows.append(row)
+
+    print(f"\n{'后端':<10}{'单条 p50(ms)':>14}{'吞吐(条/秒)':>14}{'准确率':>10}{'一致率':>10}")
+    for row in rows:
+        accuracy = f"{row['accuracy']:.2%}" if row["accuracy"] is not None else "-"
+        print(f"{row['backend']:<10}{row['p50_ms']:>14.2f}{row['throughput']:>14.1f}"
+              f"{accuracy:>10}{row['agreement']:>10.2%}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导出和比较 CPU 推理后端")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="导出 int8 / onnx 版本")
+    export_parser.add_argument("models", nargs="*", help="模型键名（默认全部）")
+
+    compare_parser = subparsers.add_parser("compare", help="比较各后端的准确率和延迟")
+    compare_parser.add_argument("--model", default="chinese", help="模型键名")
+    compare_parser.add_argument("--labeled", help="带标签的样本文件（JSONL）")
+    compare_parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="要比较的后端")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_all(args.models)
+    else:
+        samples = load_labeled_samples(args.labeled) if args.labeled else None
+        compare_backends(args.model, samples, backends=args.backends)
+
+
+if __name__ == "__main__":
+    main()
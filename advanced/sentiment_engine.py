@@ -0,0 +1,397 @@
+"""
+批量情感分析推理引擎
+绕过 pipeline 的逐条调用，直接对分词结果做批量前向计算
+
+核心做法:
+1. 一次性分词（不填充），得到每条文本的 token 长度
+2. 按长度排序后切分成批次，长度相近的文本放在同一批（长度分桶）
+3. 每个批次只填充到本批最长的长度（动态填充），减少无效计算
+4. 在 torch.inference_mode() 下运行模型
+5. 按原始输入顺序拼成 logits 矩阵，一次 softmax 后得到列式结果（见 sentiment_postprocess）
+
+模型热替换（classifier_cache.reload）后，引擎在下一次调用开始时自动切换到新模型；
+正在进行的调用仍然用旧模型完成。
+
+长文本模式（long_text="mean" / "max" / "weighted"）:
+超过最大长度的文本不再被截断，而是切成相互重叠的 token 窗口，
+所有文本的窗口放在一起分桶批量计算，最后按文本聚合各窗口的概率。
+
+运行方式: python -m advanced.sentiment_engine
+"""
+
+import copy
+import functools
+import threading
+import time
+
+from advanced.sentiment_analysis import classifier_cache, torch
+from advanced.sentiment_postprocess import LabelMap, SentimentBatch, softmax
+from utils.metrics import SIZE_BUCKETS, metrics
+
+# 长文本模式下各窗口概率的聚合方式
+AGGREGATIONS = ("mean", "max", "weighted")
+
+
+def _uses_model(method):
+    """
+    装饰器: 最外层调用开始时检查模型是否已被热替换，是则切换到新模型
+
+    调用期间持有引擎的锁，一次调用（包括其中的所有批次）固定使用同一个模型
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            if (self._depth == 0 and not self._pinned
+                    and classifier_cache.generation(self.model_key) != self._generation):
+                self._bind()
+            self._depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._depth -= 1
+    return wrapper
+
+
+class SentimentEngine:
+    """批量情感分析引擎"""
+
+    def __init__(self, model_key="chinese", dtype=None, device=None, max_length=512, backend="pytorch",
+                 long_text=None):
+        """
+        Args:
+            model_key: 模型键名（见 MODEL_CONFIGS）
+            dtype: 权重精度，如 "float32"、"bfloat16"
+            device: 运行设备，如 "cpu"、"cuda:0"
+            max_length: 最大 token 数，超出部分截断
+            backend: 推理后端，"pytorch"、"int8" 或 "onnx"（见 sentiment_backends）
+            long_text: 长文本聚合方式（"mean"、"max"、"weighted"），None 表示直接截断
+        """
+        if long_text is not None and long_text not in AGGREGATIONS:
+            raise ValueError(f"未知的聚合方式: {long_text}（可选: {', '.join(AGGREGATIONS)}）")
+        self.model_key = model_key
+        self.dtype = dtype
+        self.device = device
+        self.backend = backend
+        self.long_text = long_text
+        self._max_length = max_length
+        # 同一个引擎上的调用串行执行（模型推理本身已经使用多线程）
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pinned = False
+        self._bind()
+
+    def _bind(self):
+        """从缓存获取模型，与 get_classifier() 共享同一份权重"""
+        self._generation = classifier_cache.generation(self.model_key)
+        self.model, self.tokenizer = classifier_cache.get_model(
+            self.model_key, dtype=self.dtype, device=self.device, backend=self.backend
+        )
+        self.max_length = min(self._max_length, self._model_max_length())
+        self.id2label = self.model.config.id2label
+        self.label_map = LabelMap(self.id2label)
+        pad_token_id = self.tokenizer.pad_token_id
+        self.pad_token_id = pad_token_id if pad_token_id is not None else 0
+
+    @_uses_model
+    def _pin(self):
+        """
+        切换到最新的模型（如已热替换）后，返回固定使用这个模型的浅拷贝（之后热替换也不切换）
+
+        跨越多次 yield 的生成器用它保证整个迭代使用同一个模型和分词器，
+        又不需要在 yield 之间一直持有引擎的锁
+        """
+        pinned = copy.copy(self)
+        pinned._lock = threading.RLock()
+        pinned._depth = 0
+        pinned._pinned = True
+        return pinned
+
+    def _model_max_length(self):
+        """模型位置编码支持的最大长度"""
+        limit = getattr(self.model.config, "max_position_embeddings", None) or 512
+        # RoBERTa 类模型的位置编码有 2 个偏移位
+        if getattr(self.model.config, "model_type", "") in ("roberta", "xlm-roberta", "camembert"):
+            limit -= 2
+        return limit
+
+    @_uses_model
+    def tokenize(self, texts):
+        """分词（不填充），返回每条文本的 input_ids 列表"""
+        with metrics.span("sentiment_stage_seconds", stage="tokenize"):
+            encoded = self.tokenizer(
+                list(texts),
+                truncation=True,
+                max_length=self.max_length,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )
+        return encoded["input_ids"]
+
+    def _pad_batch(self, sequences):
+        """把一批 input_ids 填充到本批最长的长度，返回模型输入张量"""
+        longest = max(len(ids) for ids in sequences)
+        input_ids = torch.full((len(sequences), longest), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), longest), dtype=torch.long)
+        for row, ids in enumerate(sequences):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        device = self.model.device
+        return {"input_ids": input_ids.to(device), "attention_mask": attention_mask.to(device)}
+
+    def forward(self, sequences):
+        """对一批已分词的序列做前向计算，返回 logits 矩阵（float32，CPU 上）"""
+        metrics.observe("sentiment_batch_size", len(sequences), buckets=SIZE_BUCKETS, model=self.model_key)
+        with metrics.span("sentiment_stage_seconds", stage="forward"), torch.inference_mode():
+            logits = self.model(**self._pad_batch(sequences)).logits
+            return logits.float().cpu()
+
+    @_uses_model
+    def predict_logits_ids(self, input_ids, batch_size=32):
+        """
+        对已分词的序列做批量前向计算
+
+        Returns:
+            与输入顺序一致的 logits 矩阵，形状为 (文本数, 类别数)
+        """
+        # 按长度排序，相邻的文本长度相近，切片后即为长度分桶
+        order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+        logits = torch.empty((len(input_ids), len(self.label_map)))
+
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            logits[indices] = self.forward([input_ids[i] for i in indices])
+
+        return logits
+
+    @_uses_model
+    def predict_proba_ids(self, input_ids, batch_size=32):
+        """与 predict_logits_ids 相同，但返回整个矩阵一次 softmax 后的概率"""
+        return softmax(self.predict_logits_ids(input_ids, batch_size=batch_size))
+
+    def _to_batch(self, probs):
+        """概率矩阵 -> 列式结果 SentimentBatch"""
+        with metrics.span("sentiment_stage_seconds", stage="postprocess"):
+            return SentimentBatch(probs, self.label_map)
+
+    def _to_results(self, probs):
+        """概率矩阵 -> [{"label": ..., "score": ...}, ...]"""
+        with metrics.span("sentiment_stage_seconds", stage="postprocess"):
+            return SentimentBatch(probs, self.label_map).to_dicts()
+
+    @_uses_model
+    def classify_ids(self, input_ids, batch_size=32):
+        """
+        对已分词的序列做批量分类
+
+        Args:
+            input_ids: 每条文本的 token id 列表
+            batch_size: 每批的文本数
+
+        Returns:
+            与输入顺序一致的 [{"label": ..., "score": ...}, ...]
+        """
+        return self._to_results(self.predict_proba_ids(input_ids, batch_size=batch_size))
+
+    @_uses_model
+    def classify_batch(self, texts, batch_size=32):
+        """
+        批量情感分类，返回列式结果（大批量时避免逐条构造 dict）
+
+        Returns:
+            SentimentBatch: label_ids（类别下标数组）+ scores（概率矩阵），to_dicts() 可转换为 dict 列表
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return self._to_batch(torch.empty((0, len(self.label_map))))
+        if self.long_text is not None:
+            return self._to_batch(self.predict_proba_long(texts, batch_size=batch_size, aggregate=self.long_text)[0])
+        return self._to_batch(self.predict_proba_ids(self.tokenize(texts), batch_size=batch_size))
+
+    @_uses_model
+    def window_size(self, overlap=None):
+        """
+        长文本切分的 (窗口内容长度, 步长)
+
+        Args:
+            overlap: 相邻窗口重叠的 token 数，默认为窗口长度的 1/4
+        """
+        # 窗口内容长度 = 最大长度 - 特殊 token（如 [CLS] [SEP]）
+        window = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        overlap = window // 4 if overlap is None else overlap
+        if not 0 <= overlap < window:
+            raise ValueError(f"overlap 必须在 [0, {window}) 范围内")
+        return window, window - overlap
+
+    @_uses_model
+    def split_windows(self, texts, overlap=None):
+        """
+        把每条文本切成相互重叠的 token 窗口
+
+        Args:
+            texts: 文本列表
+            overlap: 相邻窗口重叠的 token 数，默认为窗口长度的 1/4
+
+        Returns:
+            (窗口 input_ids 列表, 每个窗口所属的文本下标, 每个窗口的有效 token 数)
+        """
+        window, step = self.window_size(overlap)
+
+        # verbose=False: 不截断时不打印“超出最大长度”的警告
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, truncation=False, verbose=False)
+        windows, owners, lengths = [], [], []
+        for doc, tokens in enumerate(encoded["input_ids"]):
+            start = 0
+            while True:
+                chunk = tokens[start:start + window]
+                windows.append(self.tokenizer.build_inputs_with_special_tokens(chunk))
+                owners.append(doc)
+                lengths.append(max(len(chunk), 1))
+                if start + window >= len(tokens):
+                    break
+                start += step
+        return windows, owners, lengths
+
+    @_uses_model
+    def classify_long(self, texts, batch_size=32, aggregate="mean", overlap=None):
+        """
+        长文本分类: 切窗口 -> 所有窗口一起分桶批量计算 -> 按文本聚合
+
+        Args:
+            texts: 文本列表
+            batch_size: 每批的窗口数
+            aggregate: "mean"（平均）、"max"（各类别取最大后归一化）、"weighted"（按窗口 token 数加权平均）
+            overlap: 相邻窗口重叠的 token 数
+
+        Returns:
+            与输入顺序一致的 [{"label": ..., "score": ..., "windows": 窗口数}, ...]
+        """
+        probs, counts = self.predict_proba_long(texts, batch_size=batch_size, aggregate=aggregate, overlap=overlap)
+        results = self._to_results(probs)
+        for result, count in zip(results, counts.int().tolist()):
+            result["windows"] = count
+        return results
+
+    @_uses_model
+    def predict_proba_long(self, texts, batch_size=32, aggregate="mean", overlap=None):
+        """
+        长文本的概率矩阵（参数同 classify_long）
+
+        Returns:
+            (概率矩阵, 每条文本的窗口数)
+        """
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"未知的聚合方式: {aggregate}（可选: {', '.join(AGGREGATIONS)}）")
+        windows, owners, lengths = self.split_windows(texts, overlap=overlap)
+        window_probs = self.predict_proba_ids(windows, batch_size=batch_size)
+
+        owners = torch.tensor(owners)
+        counts = torch.bincount(owners, minlength=len(texts)).float()
+        if aggregate == "max":
+            probs = torch.zeros((len(texts), window_probs.shape[1]))
+            probs = probs.scatter_reduce(0, owners[:, None].expand_as(window_probs), window_probs, reduce="amax")
+            probs = probs / probs.sum(dim=-1, keepdim=True)
+        else:
+            weights = torch.tensor(lengths, dtype=torch.float) if aggregate == "weighted" else torch.ones(len(windows))
+            probs = torch.zeros((len(texts), window_probs.shape[1]))
+            probs.index_add_(0, owners, window_probs * weights[:, None])
+            probs = probs / probs.sum(dim=-1, keepdim=True)
+        return probs, counts
+
+    def classify_pretokenized(self, corpus, batch_size=32, chunk_size=4096):
+        """
+        直接对预分词语料打分，跳过分词（见 sentiment_pretokenize）
+
+        Args:
+            corpus: TokenizedCorpus
+            batch_size: 每批的文本数
+            chunk_size: 每次从语料中取出的文本数（在其中按长度分桶）
+
+        Yields:
+            每个 chunk 的结果列表，按语料顺序
+
+        整个语料固定使用开始迭代时的模型: 迭代期间发生热替换时，剩下的 chunk 仍然用旧模型打分
+        （分词器指纹只对这个模型校验过），新模型在下一次调用时才生效
+        """
+        from advanced.sentiment_pretokenize import tokenizer_fingerprint
+
+        engine = self._pin()
+        if corpus.meta["tokenizer"] != tokenizer_fingerprint(engine.tokenizer, engine.max_length):
+            raise ValueError(
+                f"预分词语料 {corpus.path} 使用的分词器或截断长度与模型 {self.model_key} 不一致，请重新预分词"
+            )
+        for chunk in corpus.iter_chunks(chunk_size):
+            yield engine.classify_ids(chunk, batch_size=batch_size)
+
+    @_uses_model
+    def classify(self, texts, batch_size=32):
+        """
+        批量情感分类
+
+        Args:
+            texts: 文本列表
+            batch_size: 每批的文本数
+
+        Returns:
+            与输入顺序一致的 [{"label": ..., "score": ...}, ...]
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return []
+        if self.long_text is not None:
+            return self.classify_long(texts, batch_size=batch_size, aggregate=self.long_text)
+        return self.classify_ids(self.tokenize(texts), batch_size=batch_size)
+
+
+def demo():
+    """对比逐条调用 pipeline 和批量引擎的吞吐量"""
+    from advanced.sentiment_analysis import get_classifier
+
+    print("=" * 60)
+    print("批量推理引擎 vs 逐条调用 pipeline")
+    print("=" * 60)
+
+    # 长短混合的评论
+    texts = [
+        "很好！",
+        "快递太慢了，等了整整一周才收到。",
+        "这个餐厅的菜品非常美味，环境也很优雅，服务员态度热情周到，下次还会再来。",
+        "一般般",
+        "产品质量一般，性价比不高，客服回复也很慢，包装还有破损，整体体验比较差，不推荐购买。",
+    ] * 20
+
+    engine = SentimentEngine("chinese")
+    classifier = get_classifier("chinese")
+
+    start = time.perf_counter()
+    for text in texts:
+        classifier(text)
+    per_text_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = engine.classify(texts, batch_size=32)
+    batched_seconds = time.perf_counter() - start
+
+    print(f"\n文本数: {len(texts)}")
+    print(f"逐条调用: {len(texts) / per_text_seconds:.1f} 条/秒")
+    print(f"批量引擎: {len(texts) / batched_seconds:.1f} 条/秒")
+    print(f"加速比: {per_text_seconds / batched_seconds:.2f}x")
+
+    print("\n前几条结果:")
+    for text, result in list(zip(texts, results))[:5]:
+        print(f"  {text[:20]:<20}  {result['label']} ({result['score']:.4f})")
+
+
+    print("\n长文本模式（滑动窗口）:")
+    long_review = "这个餐厅的菜品非常美味，环境也很优雅。" * 60 + "但是结账时服务员态度很差，让人很不愉快。" * 20
+    long_engine = SentimentEngine("chinese", long_text="weighted")
+    truncated = engine.classify([long_review])[0]
+    windowed = long_engine.classify([long_review])[0]
+    print(f"  文本长度: {len(long_review)} 字")
+    print(f"  截断: {truncated['label']} ({truncated['score']:.4f})")
+    print(f"  窗口聚合: {windowed['label']} ({windowed['score']:.4f}), 共 {windowed['windows']} 个窗口")
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,140 @@
+"""
+高 QPS 场景的精简分类器
+只返回预测类别和概率，绕过 pipeline 的通用处理流程
+
+pipeline(...)(text) 每次调用都要解析参数、检查框架、构造 dict，短文本时这些开销
+甚至超过前向计算本身。FastSentimentClassifier 直接包装分词器和模型:
+1. 使用底层 Rust 分词器（tokenizers.Tokenizer），截断参数在创建时设置好
+2. 按 max_batch_size x max_length 预先分配输入张量，每次调用只填充需要的部分
+3. 只计算 argmax 和对应的概率，返回 (类别下标, 概率)
+
+运行方式: python -m benchmarks.fast_path
+"""
+
+import threading
+from collections import namedtuple
+
+from advanced.sentiment_analysis import classifier_cache, torch
+from advanced.sentiment_postprocess import LabelMap
+
+
+# 一次绑定得到的模型、分词器和输入缓冲区: 热替换时整体替换，调用方拿到的是一致的一组
+_Binding = namedtuple("_Binding", "model backend tokenizer max_length pad_token_id input_ids attention_mask")
+
+
+class FastSentimentClassifier:
+    """只输出 argmax 标签和概率的精简分类器"""
+
+    def __init__(self, model_key="chinese", max_length=128, max_batch_size=32, device=None):
+        """
+        Args:
+            model_key: 模型键名（见 MODEL_CONFIGS）
+            max_length: 最大 token 数（决定预分配缓冲区的宽度），超出部分截断
+            max_batch_size: 单次调用最多的文本数（决定预分配缓冲区的高度）
+            device: 运行设备
+        """
+        self.model_key = model_key
+        self.max_batch_size = max_batch_size
+        self._requested_max_length = max_length
+        self.device = device
+        self._lock = threading.Lock()
+        self._bind()
+
+    def _bind(self):
+        """从共享缓存获取模型，准备分词器和输入缓冲区"""
+        self._generation = classifier_cache.generation(self.model_key)
+        self.model, self.tokenizer = classifier_cache.get_model(self.model_key, device=self.device)
+        limit = getattr(self.model.config, "max_position_embeddings", None) or 512
+        if getattr(self.model.config, "model_type", "") in ("roberta", "xlm-roberta", "camembert"):
+            limit -= 2
+        self.max_length = min(self._requested_max_length, limit)
+        self.label_map = LabelMap(self.model.config.id2label)
+
+        # 复制一份底层分词器再设置截断，不影响共享的 tokenizer 对象
+        backend = getattr(self.tokenizer, "backend_tokenizer", None)
+        if backend is not None:
+            from tokenizers import Tokenizer
+            backend = Tokenizer.from_str(backend.to_str())
+            backend.enable_truncation(self.max_length)
+            backend.no_padding()
+
+        pad_token_id = self.tokenizer.pad_token_id
+        pad_token_id = pad_token_id if pad_token_id is not None else 0
+        shape = (self.max_batch_size, self.max_length)
+        device = self.model.device
+        self._binding = _Binding(
+            self.model, backend, self.tokenizer, self.max_length, pad_token_id,
+            torch.full(shape, pad_token_id, dtype=torch.long, device=device),
+            torch.zeros(shape, dtype=torch.long, device=device),
+        )
+
+    @staticmethod
+    def _encode(binding, texts):
+        """分词，返回每条文本的 token id 列表"""
+        if binding.backend is not None:
+            if len(texts) == 1:
+                return [binding.backend.encode(texts[0]).ids]
+            return [encoding.ids for encoding in binding.backend.encode_batch(texts)]
+        return binding.tokenizer(
+            texts, truncation=True, max_length=binding.max_length,
+            return_attention_mask=False, return_token_type_ids=False,
+        )["input_ids"]
+
+    def predict(self, texts):
+        """
+        批量预测（不超过 max_batch_size 条）
+
+        Returns:
+            (类别下标列表, 概率列表)
+        """
+        texts = list(texts)
+        if not texts:
+            return [], []
+        if len(texts) > self.max_batch_size:
+            raise ValueError(f"单次最多 {self.max_batch_size} 条文本，请分批调用或调大 max_batch_size")
+        # 在锁内取出当前的绑定: 分词在锁外进行，但分词器、截断长度和缓冲区始终属于同一个模型
+        with self._lock:
+            if classifier_cache.generation(self.model_key) != self._generation:
+                self._bind()
+            binding = self._binding
+
+        sequences = self._encode(binding, texts)
+        count = len(sequences)
+        longest = max(len(ids) for ids in sequences)
+        with self._lock, torch.inference_mode():
+            input_ids = binding.input_ids[:count, :longest]
+            attention_mask = binding.attention_mask[:count, :longest]
+            input_ids.fill_(binding.pad_token_id)
+            attention_mask.zero_()
+            for row, ids in enumerate(sequences):
+                input_ids[row, :len(ids)] = torch.as_tensor(ids)
+                attention_mask[row, :len(ids)] = 1
+            logits = binding.model(input_ids=input_ids, attention_mask=attention_mask).logits
+            scores, label_ids = logits.float().softmax(dim=-1).max(dim=-1)
+            return label_ids.tolist(), scores.tolist()
+
+    def predict_one(self, text):
+        """
+        预测单条文本
+
+        Returns:
+            (类别下标, 概率)
+        """
+        label_ids, scores = self.predict([text])
+        return label_ids[0], scores[0]
+
+    def classify(self, texts, batch_size=None):
+        """
+        与 SentimentEngine.classify 接口一致: 返回 [{"label": ..., "score": ...}, ...]
+
+        （构造 dict 有额外开销，追求吞吐量时请直接使用 predict）
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        batch_size = min(batch_size or self.max_batch_size, self.max_batch_size)
+        labels = self.label_map.labels
+        results = []
+        for start in range(0, len(texts), batch_size):
+            label_ids, scores = self.predict(texts[start:start + batch_size])
+            results.extend({"label": labels[index], "score": score} for index, score in zip(label_ids, scores))
+        return results
@@ -0,0 +1,202 @@
+"""
+多进程分片情感分析
+单个 Python 进程里的一个模型用不满多核机器，这里用进程池把输入分片到多个工作进程
+
+- 每个工作进程在启动时加载一次模型（进程池的 initializer）
+- 每个进程的 torch 线程数 = CPU 核数 / 进程数，避免线程超额订阅
+- 输入切成固定大小的分片，executor.map 保证结果按原始顺序合并
+
+ParallelSentimentScorer 与 SentimentEngine 一样提供 classify(texts, batch_size)，
+可以直接传给 sentiment_scoring.score_file(engine=...)。
+
+运行方式: python -m advanced.sentiment_parallel
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 工作进程内的引擎（每个进程一份，由 _init_worker 创建）
+_worker_engine = None
+# 工作进程加载的模型版本指纹（见 sentiment_result_cache.model_revision）
+_worker_revision = None
+# 所有工作进程共享的屏障（warmup 用它确认每个进程都已启动）
+_worker_ready = None
+
+
+def _init_worker(model_key, model_path, num_threads, long_text, ready):
+    """工作进程初始化: 限制线程数并加载模型"""
+    global _worker_engine, _worker_revision, _worker_ready
+    _worker_ready = ready
+    from advanced import sentiment_analysis
+    from advanced.sentiment_engine import SentimentEngine
+    from advanced.sentiment_result_cache import model_revision
+
+    sentiment_analysis.torch.set_num_threads(num_threads)
+    # 进程之间已经并行，算子间并行只会抢占 CPU
+    try:
+        sentiment_analysis.torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    # spawn 方式启动的子进程不会继承父进程对 MODEL_CONFIGS 的修改，这里显式传入路径；
+    # 先解析 current 链接: 进程池按需启动进程，切换版本后启动的进程会加载新版本，
+    # 版本指纹必须来自本进程实际加载的目录
+    config = sentiment_analysis.MODEL_CONFIGS.setdefault(model_key, {"name": model_key, "display_name": model_key})
+    config["local_path"] = Path(os.path.realpath(model_path))
+    _worker_engine = SentimentEngine(model_key, long_text=long_text)
+    _worker_revision = model_revision(model_key)
+
+
+def _wait_ready(timeout):
+    """
+    等到所有工作进程都执行到这里（每个进程各领到一个任务）
+
+    进程先执行 initializer（加载模型）才会领取任务，所以屏障放行时所有进程都已加载完模型。
+    """
+    _worker_ready.wait(timeout)
+    # 顺便跑一次推理，让第一次真实请求不用承担算子初始化的开销
+    _worker_engine.classify(["预热"], batch_size=1)
+    return os.getpid()
+
+
+def _window_size():
+    """工作进程中引擎的长文本窗口参数"""
+    return _worker_engine.window_size()
+
+
+def _classify_shard(args):
+    """在工作进程中对一个分片做分类，同时返回所用模型的版本指纹"""
+    texts, batch_size = args
+    return _worker_revision, _worker_engine.classify(texts, batch_size=batch_size)
+
+
+class ParallelSentimentScorer:
+    """多进程情感分析（用法同 SentimentEngine，也支持 with 语句）"""
+
+    def __init__(self, model_key="chinese", workers=None, threads_per_worker=None, shard_size=256,
+                 long_text=None):
+        """
+        Args:
+            model_key: 模型键名
+            workers: 工作进程数，默认等于 CPU 核数
+            threads_per_worker: 每个进程的 torch 线程数，默认 CPU 核数 / 进程数
+            shard_size: 每个分片的文本数（越小负载越均衡，调度开销越大）
+            long_text: 长文本聚合方式（见 SentimentEngine）
+        """
+        from advanced.sentiment_analysis import get_model_path
+
+        cpu_count = os.cpu_count() or 1
+        self.workers = workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+        self.shard_size = shard_size
+        self.long_text = long_text
+
+        # 在父进程中确定模型路径（需要时先下载），避免多个子进程同时下载
+        model_path = get_model_path(model_key, auto_download=True)
+        # fork 会复制父进程中 torch 的线程池状态，容易死锁，统一使用 spawn
+        context = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_key, model_path, self.threads_per_worker, long_text, context.Barrier(self.workers)),
+        )
+
+    def classify(self, texts, batch_size=32):
+        """
+        分片并行分类
+
+        Returns:
+            与输入顺序一致的 [{"label": ..., "score": ...}, ...]
+        """
+        return self.classify_with_revisions(texts, batch_size)[0]
+
+    def classify_with_revisions(self, texts, batch_size=32):
+        """
+        分片并行分类，同时返回每条结果由哪个模型版本计算
+
+        各工作进程加载模型的时间不同，模型仓库切换版本后，不同分片可能来自不同版本；
+        结果缓存（sentiment_result_cache）用这里的版本而不是父进程看到的版本作为缓存键。
+
+        Returns:
+            (结果列表, 与结果一一对应的版本指纹列表)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        shards = [
+            (texts[start:start + self.shard_size], batch_size)
+            for start in range(0, len(texts), self.shard_size)
+        ]
+        results = []
+        revisions = []
+        for revision, shard_results in self._executor.map(_classify_shard, shards):
+            results.extend(shard_results)
+            revisions.extend([revision] * len(shard_results))
+        return results, revisions
+
+    def window_size(self):
+        """长文本切分的 (窗口内容长度, 步长)，由工作进程中的引擎计算"""
+        return self._executor.submit(_window_size).result()
+
+    def warmup(self, timeout=600):
+        """
+        启动所有工作进程并等它们加载完模型
+
+        进程池按需启动进程，普通任务可能全被先启动的几个进程处理掉；
+        这里提交 workers 个在屏障上互相等待的任务，只有每个进程各领到一个时才会放行。
+
+        Args:
+            timeout: 等待所有进程就绪的最长秒数，超时抛出 threading.BrokenBarrierError
+
+        Returns:
+            已就绪的工作进程 PID 列表
+        """
+        return sorted(set(self._executor.map(_wait_ready, [timeout] * self.workers)))
+
+    def close(self):
+        """关闭进程池"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def demo():
+    """对比单进程和多进程的吞吐量"""
+    from advanced.sentiment_engine import SentimentEngine
+
+    print("=" * 60)
+    print("多进程分片情感分析")
+    print("=" * 60)
+
+    texts = [
+        "这个餐厅的菜品非常美味，环境也很优雅。",
+        "快递太慢了，等了整整一周才收到。",
+        "客服回复很快，问题解决得很及时。",
+        "产品质量一般，性价比不高。",
+    ] * 500
+
+    engine = SentimentEngine("chinese")
+    start = time.perf_counter()
+    engine.classify(texts)
+    single = time.perf_counter() - start
+    print(f"\n单进程: {len(texts) / single:.1f} 条/秒")
+
+    with ParallelSentimentScorer("chinese") as scorer:
+        scorer.warmup()
+        start = time.perf_counter()
+        scorer.classify(texts)
+        parallel = time.perf_counter() - start
+        print(f"{scorer.workers} 个进程 x {scorer.threads_per_worker} 线程: "
+              f"{len(texts) / parallel:.1f} 条/秒")
+
+
+if __name__ == "__main__":
+    demo()
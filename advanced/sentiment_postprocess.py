@@ -0,0 +1,120 @@
+"""
+情感分析结果后处理
+直接处理批量输出的 logits 矩阵，避免逐条构造嵌套的 list / dict
+
+核心做法:
+1. 模型加载后只读取一次 id2label，按类别下标排好标签名和中文显示名
+2. 对整个 logits 矩阵做一次向量化 softmax
+3. 结果以列式存储: 预测类别下标数组 + 概率矩阵（SentimentBatch）
+4. 需要时再转换成 pipeline 风格的 [{"label": ..., "score": ...}, ...]
+
+注意: 不同模型的标签各不相同（如 SST-2 英文模型是 POSITIVE / NEGATIVE，
+uer/roberta-base-finetuned-chinanews-chinese 是新闻类别），
+不能用 label == "POSITIVE" 判断正负面，应使用 display_label()。
+"""
+
+import re
+
+# 常见情感标签的中文显示名（按小写前缀匹配，如 "positive (stars 4 and 5)"）
+SENTIMENT_DISPLAY_NAMES = {
+    "positive": "正面",
+    "pos": "正面",
+    "negative": "负面",
+    "neg": "负面",
+    "neutral": "中性",
+}
+
+_LABEL_WORD = re.compile(r"[a-z]+")
+
+
+def display_label(label):
+    """
+    把模型标签转换成中文显示名
+
+    情感类标签（POSITIVE、negative (stars 1, 2 and 3) 等）转换成 正面 / 负面 / 中性，
+    其他标签（如新闻类别、LABEL_0）原样返回。
+    """
+    match = _LABEL_WORD.match(str(label).lower())
+    if match and match.group() in SENTIMENT_DISPLAY_NAMES:
+        return SENTIMENT_DISPLAY_NAMES[match.group()]
+    return str(label)
+
+
+class LabelMap:
+    """按类别下标排列的标签名，每个模型只构造一次"""
+
+    def __init__(self, id2label):
+        # config.id2label 的键可能是 int 也可能是 str
+        id2label = {int(index): label for index, label in id2label.items()}
+        self.labels = tuple(id2label[index] for index in range(len(id2label)))
+        self.display_names = tuple(display_label(label) for label in self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def softmax(logits):
+    """对整个 logits 矩阵做一次 softmax（float32 计算，避免半精度溢出）"""
+    return logits.float().softmax(dim=-1)
+
+
+class SentimentBatch:
+    """
+    一批文本的列式分类结果
+
+    Attributes:
+        label_ids: 预测类别下标，numpy 数组，形状 (文本数,)
+        scores: 各类别概率，numpy 数组，形状 (文本数, 类别数)
+        label_map: LabelMap
+    """
+
+    def __init__(self, probs, label_map):
+        """
+        Args:
+            probs: softmax 后的概率矩阵（torch.Tensor）
+            label_map: LabelMap
+        """
+        self.scores = probs.numpy()
+        self.label_ids = self.scores.argmax(axis=-1)
+        self.label_map = label_map
+
+    def __len__(self):
+        return len(self.label_ids)
+
+    @property
+    def top_scores(self):
+        """每条文本预测类别的概率"""
+        return self.scores[range(len(self.label_ids)), self.label_ids]
+
+    @property
+    def labels(self):
+        """每条文本的预测标签名"""
+        names = self.label_map.labels
+        return [names[index] for index in self.label_ids.tolist()]
+
+    @property
+    def display_labels(self):
+        """每条文本的中文显示名"""
+        names = self.label_map.display_names
+        return [names[index] for index in self.label_ids.tolist()]
+
+    def to_dicts(self, top_k=1):
+        """
+        转换成 pipeline 风格的结果
+
+        Args:
+            top_k: 1 返回 [{"label": ..., "score": ...}, ...]；
+                   None 返回每条文本所有类别按概率降序的列表 [[{...}, {...}], ...]
+        """
+        names = self.label_map.labels
+        if top_k == 1:
+            return [
+                {"label": names[index], "score": score}
+                for index, score in zip(self.label_ids.tolist(), self.top_scores.tolist())
+            ]
+        order = (-self.scores).argsort(axis=-1)[:, :top_k].tolist()
+        rows = self.scores.tolist()
+        return [
+            [{"label": names[index], "score": row[index]} for index in indices]
+            for indices, row in zip(order, rows)
+        ]
@@ -0,0 +1,180 @@
+"""
+模型预加载与就绪探针
+服务启动时提前加载所有模型并预热，第一条真实请求不再承担加载和首次推理的开销
+
+做法:
+1. 多个模型在线程池中并行加载（权重进入进程级 classifier_cache，与其他入口共享）
+2. 每个模型用合成的 token 序列在几个典型长度上各跑一批，触发首次推理的内存分配、
+   算子选择等一次性开销；pipeline 也各构建并调用一次
+3. 全部完成后设置就绪标志（threading.Event），可选写入就绪文件，
+   编排系统（如 Kubernetes 的 exec 探针: test -f /tmp/sentiment-ready）据此判断是否接入流量
+4. 报告每个模型的加载和预热耗时
+
+运行方式:
+    python -m advanced.sentiment_analysis preload --ready-file /tmp/sentiment-ready
+    python -m advanced.sentiment_preload chinese english --seq-lengths 16 128 512
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.metrics import metrics
+
+# 预热使用的序列长度（token 数，超过模型最大长度时截到最大长度）
+DEFAULT_SEQ_LENGTHS = (16, 64, 256)
+
+
+class ModelPreloader:
+    """并行加载并预热多个模型，完成后设置就绪标志"""
+
+    def __init__(self, model_keys=None, seq_lengths=DEFAULT_SEQ_LENGTHS, batch_size=8, max_workers=None,
+                 ready_file=None):
+        """
+        Args:
+            model_keys: 要预加载的模型键名，默认 MODEL_CONFIGS 中的全部模型
+            seq_lengths: 预热批次的序列长度
+            batch_size: 每个预热批次的文本数
+            max_workers: 并行加载的线程数，默认每个模型一个线程
+            ready_file: 就绪后写入的文件（内容为 JSON 报告），失败或重新开始时删除
+        """
+        from advanced.sentiment_analysis import MODEL_CONFIGS
+
+        self.model_keys = list(model_keys or MODEL_CONFIGS.keys())
+        self.seq_lengths = tuple(seq_lengths)
+        self.batch_size = batch_size
+        self.max_workers = max_workers or len(self.model_keys)
+        self.ready_file = Path(ready_file) if ready_file else None
+        self.ready = threading.Event()
+        self.report = {}
+        self._thread = None
+
+    def is_ready(self):
+        """就绪探针: 所有模型都已加载并预热成功"""
+        return self.ready.is_set()
+
+    def _warm_model(self, model_key):
+        """加载并预热一个模型，返回该模型的耗时报告"""
+        from advanced.sentiment_analysis import get_classifier
+        from advanced.sentiment_engine import SentimentEngine
+
+        start = time.perf_counter()
+        engine = SentimentEngine(model_key)
+        load_seconds = time.perf_counter() - start
+
+        # 直接构造 token 序列，长度精确可控；每种长度一个批次
+        tokenizer = engine.tokenizer
+        filler = tokenizer.unk_token_id if tokenizer.unk_token_id is not None else engine.pad_token_id
+        warmup = {}
+        for seq_len in self.seq_lengths:
+            seq_len = min(seq_len, engine.max_length)
+            body = [filler] * max(seq_len - tokenizer.num_special_tokens_to_add(), 1)
+            ids = tokenizer.build_inputs_with_special_tokens(body)
+            batch_start = time.perf_counter()
+            engine.predict_logits_ids([ids] * self.batch_size, batch_size=self.batch_size)
+            warmup[seq_len] = time.perf_counter() - batch_start
+
+        # 分词器和 pipeline 路径也各走一遍
+        engine.classify(["预热 warm-up"])
+        get_classifier(model_key)("预热 warm-up")
+
+        total = time.perf_counter() - start
+        metrics.observe("sentiment_preload_seconds", total, model=model_key)
+        return {
+            "load_seconds": load_seconds,
+            "warmup_seconds": sum(warmup.values()),
+            "warmup_by_seq_len": warmup,
+            "total_seconds": total,
+        }
+
+    def run(self):
+        """
+        同步执行预加载
+
+        Returns:
+            {模型键名: 耗时报告或 {"error": ...}}
+        """
+        self.ready.clear()
+        if self.ready_file is not None and self.ready_file.exists():
+            self.ready_file.unlink()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="preload") as executor:
+            futures = {model_key: executor.submit(self._warm_model, model_key) for model_key in self.model_keys}
+            for model_key, future in futures.items():
+                try:
+                    self.report[model_key] = future.result()
+                except Exception as e:
+                    self.report[model_key] = {"error": f"{type(e).__name__}: {e}"}
+
+        if not any("error" in entry for entry in self.report.values()):
+            if self.ready_file is not None:
+                # 先写临时文件再改名，探针不会读到写了一半的文件
+                tmp_path = self.ready_file.with_name(self.ready_file.name + ".tmp")
+                tmp_path.write_text(json.dumps(self.report, ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp_path, self.ready_file)
+            self.ready.set()
+        metrics.set("sentiment_ready", 1 if self.ready.is_set() else 0)
+        return self.report
+
+    def start(self):
+        """在后台线程中预加载（服务可以先开始监听，就绪后再接入流量）"""
+        self._thread = threading.Thread(target=self.run, name="preload", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """等待后台预加载结束，返回是否就绪"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.is_ready()
+
+
+def print_report(report):
+    """打印每个模型的加载和预热耗时"""
+    for model_key, entry in report.items():
+        if "error" in entry:
+            print(f"   ❌ {model_key}: {entry['error']}")
+            continue
+        by_len = ", ".join(f"{seq_len}: {seconds * 1000:.0f} ms" for seq_len, seconds in entry["warmup_by_seq_len"].items())
+        print(f"   ✅ {model_key}: 加载 {entry['load_seconds']:.2f} 秒, 预热 {entry['warmup_seconds']:.2f} 秒（{by_len}）")
+
+
+def main(argv=None):
+    """preload 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="python -m advanced.sentiment_analysis preload",
+        description="并行预加载并预热情感分析模型",
+    )
+    parser.add_argument("models", nargs="*", help="模型键名（默认全部）")
+    parser.add_argument("--seq-lengths", type=int, nargs="+", default=list(DEFAULT_SEQ_LENGTHS),
+                        help="预热批次的序列长度（token 数）")
+    parser.add_argument("--batch-size", type=int, default=8, help="每个预热批次的文本数")
+    parser.add_argument("--ready-file", help="就绪后写入的文件（供编排系统的探针检查）")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("预加载情感分析模型")
+    print("=" * 60)
+    preloader = ModelPreloader(
+        args.models or None,
+        seq_lengths=args.seq_lengths,
+        batch_size=args.batch_size,
+        ready_file=args.ready_file,
+    )
+    start = time.perf_counter()
+    report = preloader.run()
+    print_report(report)
+    print(f"\n总耗时: {time.perf_counter() - start:.2f} 秒")
+    if preloader.is_ready():
+        print("✅ 已就绪" + (f"（就绪文件: {args.ready_file}）" if args.ready_file else ""))
+    else:
+        print("❌ 部分模型加载失败，未就绪")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+预分词语料格式
+同一份语料用多个模型版本反复打分时，只要分词器不变，分词结果就可以复用
+
+目录格式（可以用 np.memmap 直接映射，不需要整体读入内存）:
+    corpus.tok/
+    ├── input_ids.int32   所有文本的 token id 首尾相接的一维 int32 数组
+    ├── offsets.int64     第 i 条文本的 token 位于 input_ids[offsets[i]:offsets[i+1]]
+    └── meta.json         条数、token 总数、最大长度、分词器指纹
+
+运行方式:
+    python -m advanced.sentiment_pretokenize                 # 示例
+    python -m advanced.sentiment_pretokenize reviews.jsonl reviews.tok --model chinese
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from advanced.file_io import staged_dir
+
+IDS_FILE = "input_ids.int32"
+OFFSETS_FILE = "offsets.int64"
+META_FILE = "meta.json"
+
+
+def tokenizer_fingerprint(tokenizer, max_length):
+    """分词器指纹: 词表和截断长度相同，分词结果才能复用"""
+    digest = hashlib.sha256()
+    digest.update(type(tokenizer).__name__.encode())
+    digest.update(str(max_length).encode())
+    for token, index in sorted(tokenizer.get_vocab().items(), key=lambda item: item[1]):
+        digest.update(f"{index}\t{token}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def pretokenize(texts, output_dir, engine, chunk_size=4096):
+    """
+    把文本流分词后写入预分词目录（逐块写出，内存占用与语料大小无关）
+
+    先写到旁边的临时目录 .<目录名>.partial，全部写完后再改名为输出目录；
+    中途失败或被中断时，已有的输出目录保持不变，不会留下与 meta.json 不一致的数据文件（见 file_io.staged_dir）
+
+    Args:
+        texts: 文本的可迭代对象（可以是生成器）
+        output_dir: 输出目录
+        engine: SentimentEngine（提供分词器和截断长度）
+        chunk_size: 每次分词的文本数
+
+    Returns:
+        写入的文本条数
+    """
+    with staged_dir(output_dir) as staging:
+        return _write_corpus(texts, staging, engine, chunk_size)
+
+
+def _write_corpus(texts, output_dir, engine, chunk_size):
+    """把分词结果写入 output_dir，meta.json 最后写入"""
+    count = 0
+    total_tokens = 0
+    max_length = 0
+    with open(output_dir / IDS_FILE, "wb") as ids_file, open(output_dir / OFFSETS_FILE, "wb") as offsets_file:
+        offsets_file.write(np.zeros(1, dtype=np.int64).tobytes())
+
+        def flush(chunk):
+            nonlocal count, total_tokens, max_length
+            sequences = engine.tokenize(chunk)
+            lengths = np.fromiter((len(ids) for ids in sequences), dtype=np.int64, count=len(sequences))
+            flat = np.fromiter(
+                (token for ids in sequences for token in ids), dtype=np.int32, count=int(lengths.sum())
+            )
+            ids_file.write(flat.tobytes())
+            offsets_file.write((total_tokens + np.cumsum(lengths)).tobytes())
+            count += len(sequences)
+            total_tokens += int(lengths.sum())
+            max_length = max(max_length, int(lengths.max()))
+
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+    meta = {
+        "count": count,
+        "total_tokens": total_tokens,
+        "max_length": max_length,
+        "truncation_length": engine.max_length,
+        "model_key": engine.model_key,
+        "tokenizer": tokenizer_fingerprint(engine.tokenizer, engine.max_length),
+    }
+    with open(output_dir / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return count
+
+
+class TokenizedCorpus:
+    """只读的预分词语料（内存映射）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.offsets = np.memmap(self.path / OFFSETS_FILE, dtype=np.int64, mode="r")
+        # 空语料时 input_ids 文件长度为 0，np.memmap 不支持映射空文件
+        if self.meta["total_tokens"]:
+            self.input_ids = np.memmap(self.path / IDS_FILE, dtype=np.int32, mode="r")
+        else:
+            self.input_ids = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def __getitem__(self, index):
+        return self.input_ids[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def lengths(self):
+        """每条文本的 token 数（即 attention mask 中 1 的个数）"""
+        return np.diff(self.offsets)
+
+    def iter_chunks(self, chunk_size=4096):
+        """逐块 yield token id 序列列表（每条是 input_ids 上的只读视图）"""
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            yield [self[i] for i in range(start, stop)]
+
+
+def demo():
+    """预分词后直接用引擎打分，对比每次都重新分词"""
+    import tempfile
+    from advanced.sentiment_engine import SentimentEngine
+
+    print("=" * 60)
+    print("预分词语料")
+    print("=" * 60)
+
+    texts = [
+        "这个餐厅的菜品非常美味，环境也很优雅。",
+        "快递太慢了，等了整整一周才收到。",
+        "客服回复很快，问题解决得很及时。",
+        "产品质量一般，性价比不高。",
+    ] * 500
+    engine = SentimentEngine("chinese")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        pretokenize(texts, Path(tmp_dir) / "corpus.tok", engine)
+        print(f"\n预分词 {len(texts)} 条: {time.perf_counter() - start:.3f} 秒")
+
+        corpus = TokenizedCorpus(Path(tmp_dir) / "corpus.tok")
+        print(f"token 总数: {corpus.meta['total_tokens']}, 最长: {corpus.meta['max_length']}")
+
+        start = time.perf_counter()
+        from_corpus = [result for chunk in engine.classify_pretokenized(corpus) for result in chunk]
+        print(f"读取预分词结果打分: {time.perf_counter() - start:.3f} 秒")
+
+        start = time.perf_counter()
+        from_texts = engine.classify(texts)
+        print(f"从原始文本打分:     {time.perf_counter() - start:.3f} 秒")
+        print(f"结果一致: {from_corpus == from_texts}")
+        del corpus
+
+
+def main(argv=None):
+    from advanced.sentiment_engine import SentimentEngine
+    from advanced.sentiment_scoring import read_records
+
+    parser = argparse.ArgumentParser(description="把 JSONL / CSV 语料预分词成内存映射格式")
+    parser.add_argument("input", help="输入文件（.jsonl 或 .csv）")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--model", default="chinese", help="模型键名（决定使用的分词器）")
+    parser.add_argument("--text-field", default="text", help="文本字段名")
+    args = parser.parse_args(argv)
+
+    engine = SentimentEngine(args.model)
+    start = time.perf_counter()
+    texts = (text for _, _, text in read_records(args.input, args.text_field))
+    count = pretokenize(texts, args.output, engine)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 预分词完成: {count} 条, {count / max(elapsed, 1e-9):.1f} 条/秒, 保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 不带参数时运行示例
+    if len(sys.argv) > 1:
+        main()
+    else:
+        demo()
@@ -0,0 +1,168 @@
+"""
+模型热重载
+本地模型目录更新后（例如模型仓库切换了 current 版本），不重启进程就换上新模型
+
+做法:
+1. 后台线程轮询各模型目录的版本指纹（只读文件元数据，开销很小），
+   发现变化后在后台线程中加载新模型（也可以手动调用 reload()）
+2. 加载完成后，classifier_cache 一次性把新模型换进缓存，新请求立即使用新模型；
+   加载期间请求继续由旧模型处理，不会出现冷启动
+3. 正在进行的批次继续用旧模型完成，旧模型在没有引用后由垃圾回收释放
+4. 重载耗时、切换时刻和旧模型的释放都记录在指标中:
+   sentiment_model_reload_seconds / sentiment_model_swap_timestamp_seconds /
+   sentiment_model_drain_seconds（见 utils/metrics.py）
+
+运行方式: python -m advanced.sentiment_reload
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import metrics
+
+
+class ModelReloader:
+    """在后台检测模型更新并热重载"""
+
+    def __init__(self, model_keys=None, interval=5.0, cache=None):
+        """
+        Args:
+            model_keys: 要监视的模型键名，默认 MODEL_CONFIGS 中的全部模型
+            interval: 检查模型目录的间隔（秒）
+            cache: ClassifierCache，默认进程级 classifier_cache
+        """
+        from advanced.sentiment_analysis import MODEL_CONFIGS, classifier_cache
+
+        self.model_keys = list(model_keys or MODEL_CONFIGS.keys())
+        self.interval = interval
+        self.cache = cache if cache is not None else classifier_cache
+        # 单个后台线程加载模型: 重载按顺序进行，不和推理争抢太多 CPU
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reload")
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._revisions = {}
+        self.history = []
+
+    def reload(self, model_key):
+        """
+        在后台重载一个模型（同一模型已在排队时不会重复提交）
+
+        Returns:
+            concurrent.futures.Future，结果为本次重载的记录
+        """
+        with self._lock:
+            future = self._pending.get(model_key)
+            if future is None or future.done():
+                future = self._pending[model_key] = self._executor.submit(self._reload, model_key)
+            return future
+
+    def _reload(self, model_key):
+        start = time.perf_counter()
+        record = {"model_key": model_key, "started_at": time.time()}
+        try:
+            record["entries"] = self.cache.reload(model_key)
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = f"error: {type(e).__name__}: {e}"
+            metrics.inc("sentiment_model_reload_errors_total", model=model_key)
+        record["seconds"] = time.perf_counter() - start
+        record["swapped_at"] = time.time()
+        self.history.append(record)
+        return record
+
+    def _fingerprint(self, model_key):
+        from advanced.sentiment_result_cache import model_revision
+        return model_revision(model_key)
+
+    def check(self):
+        """检查一次所有模型目录，有变化的提交后台重载，返回提交的模型列表"""
+        changed = []
+        for model_key in self.model_keys:
+            revision = self._fingerprint(model_key)
+            previous = self._revisions.get(model_key)
+            self._revisions[model_key] = revision
+            if previous is not None and revision != previous:
+                self.reload(model_key)
+                changed.append(model_key)
+        return changed
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ 检查模型更新失败: {e}")
+
+    def start(self):
+        """开始后台监视模型目录"""
+        if self._watcher is None:
+            self.check()  # 记录初始指纹
+            self._watcher = threading.Thread(target=self._watch, name="reload-watcher", daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        """停止监视，等待正在进行的重载完成"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def demo(model_key="chinese"):
+    """持续推理的同时热重载模型，观察请求是否中断"""
+    from advanced.sentiment_analysis import classifier_cache
+    from advanced.sentiment_engine import SentimentEngine
+
+    print("=" * 60)
+    print("模型热重载")
+    print("=" * 60)
+
+    metrics.enable()
+    engine = SentimentEngine(model_key)
+    texts = ["这个餐厅的菜品非常美味，环境也很优雅。", "快递太慢了，等了整整一周才收到。"] * 16
+    stop = threading.Event()
+    counts = {"batches": 0, "errors": 0}
+
+    def traffic():
+        while not stop.is_set():
+            try:
+                engine.classify(texts)
+                counts["batches"] += 1
+            except Exception:
+                counts["errors"] += 1
+
+    worker = threading.Thread(target=traffic)
+    worker.start()
+    try:
+        with ModelReloader([model_key], interval=1.0) as reloader:
+            time.sleep(0.5)
+            print(f"\n1. 后台重载 {model_key}（推理线程继续运行）")
+            record = reloader.reload(model_key).result()
+            print(f"   状态: {record['status']}, 耗时 {record['seconds']:.2f} 秒")
+            time.sleep(0.5)
+    finally:
+        stop.set()
+        worker.join()
+
+    print(f"\n2. 重载期间处理了 {counts['batches']} 个批次，失败 {counts['errors']} 个")
+    print(f"   缓存重载次数: {classifier_cache.stats()['reloads']}")
+    snapshot = metrics.snapshot()
+    for histogram in snapshot["histograms"]:
+        if histogram["name"] in ("sentiment_model_reload_seconds", "sentiment_model_drain_seconds"):
+            print(f"   {histogram['name']}: {histogram['sum']:.3f} 秒（{histogram['count']} 次）")
+    print("\n💡 旧模型在最后一个使用它的批次结束后释放（drain）")
+
+
+if __name__ == "__main__":
+    demo()
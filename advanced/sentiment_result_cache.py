@@ -0,0 +1,372 @@
+"""
+情感分析结果缓存（按内容寻址）
+相同的文本（客服模板回复、重复评论等）只计算一次
+
+缓存键 = sha256(规范化文本, 模型键, 模型版本, top_k, 推理参数)
+- 推理参数: 后端（pytorch / int8 / onnx）、最大长度、长文本聚合方式和窗口 / 步长，任何一项不同都不共用结果
+- 内存层: LRU，进程内最快
+- 磁盘层: SQLite（WAL 模式），多个进程可以共享同一个缓存文件
+- 模型版本由本地模型目录中文件的大小和修改时间计算，
+  MODEL_CONFIGS[...]["local_path"] 下的模型一旦更新，旧结果自动失效
+  （模型在后台重载，换上新模型之前继续使用旧版本的缓存键，请求不会被重载阻塞）
+- 引擎能报告每条结果实际使用的模型版本时（多进程的 ParallelSentimentScorer），按实际版本写入缓存
+- 返回给调用方的是结果的副本，调用方修改结果不会影响缓存
+
+运行方式: python -m advanced.sentiment_result_cache
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.metrics import metrics
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """规范化文本: 全角转半角（NFKC）、去掉首尾空白、合并连续空白"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def model_revision(model_key):
+    """
+    计算本地模型的版本指纹
+
+    只读取文件元数据（文件名、大小、修改时间），不读文件内容，开销很小。
+    """
+    from advanced.sentiment_analysis import MODEL_CONFIGS
+
+    local_path = Path(MODEL_CONFIGS[model_key]["local_path"])
+    digest = hashlib.sha256()
+    if local_path.exists():
+        for path in sorted(local_path.rglob("*")):
+            if path.is_file():
+                stat = path.stat()
+                digest.update(f"{path.relative_to(local_path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(text, model_key, revision, top_k=1, options=None):
+    """
+    计算缓存键
+
+    Args:
+        options: 影响输出的推理参数 dict（如 backend、max_length、long_text）
+    """
+    raw = "\0".join([
+        normalize_text(text), model_key, revision, str(top_k), json.dumps(options or {}, sort_keys=True),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _copy_result(value):
+    """复制一条结果（top_k=1 时是 dict，否则是 dict 列表），避免调用方修改到缓存中的对象"""
+    if isinstance(value, dict):
+        return dict(value)
+    return [dict(item) for item in value]
+
+
+_reloader = None
+_reloader_lock = threading.Lock()
+
+
+def _background_reloader():
+    """进程内共享的后台重载器（同一模型的重载不会重复提交）"""
+    global _reloader
+    with _reloader_lock:
+        if _reloader is None:
+            from advanced.sentiment_reload import ModelReloader
+            _reloader = ModelReloader()
+        return _reloader
+
+
+class PredictionCache:
+    """两级预测结果缓存（内存 LRU + 可选的 SQLite 磁盘层）"""
+
+    def __init__(self, db_path=None, max_memory_entries=100_000):
+        """
+        Args:
+            db_path: SQLite 文件路径，None 表示只用内存缓存
+            max_memory_entries: 内存层最多保存的条目数
+        """
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+            # WAL 模式下读写互不阻塞，适合多进程共享
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " key TEXT PRIMARY KEY,"
+                " model_key TEXT NOT NULL,"
+                " revision TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """批量查询，返回 {键: 结果}（只包含命中的键）"""
+        found = {}
+        memory_hits = 0
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    memory_hits += 1
+                else:
+                    missing.append(key)
+
+            unique_missing = list(dict.fromkeys(missing))
+            if unique_missing and self._db is not None:
+                # SQLite 单条语句的参数个数有上限，分块查询
+                for start in range(0, len(unique_missing), 500):
+                    chunk = unique_missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM predictions WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key])
+
+            # 命中和未命中都按出现次数统计（同一个键出现多次就算多次查询）
+            disk_hits = sum(1 for key in missing if key in found)
+            misses = len(missing) - disk_hits
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+        metrics.inc("sentiment_result_cache_requests_total", memory_hits, result="memory_hit")
+        metrics.inc("sentiment_result_cache_requests_total", disk_hits, result="disk_hit")
+        metrics.inc("sentiment_result_cache_requests_total", misses, result="miss")
+        return found
+
+    def put_many(self, items, model_key, revision):
+        """批量写入 {键: 结果}"""
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None and items:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    [(key, model_key, revision, json.dumps(value, ensure_ascii=False), now)
+                     for key, value in items.items()],
+                )
+                self._db.commit()
+
+    def purge_stale(self, model_key, revision):
+        """删除磁盘层中该模型其他版本的结果，返回删除的条数"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM predictions WHERE model_key = ? AND revision != ?", (model_key, revision)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """返回命中统计"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedSentimentClassifier:
+    """
+    带结果缓存的分类器，提供与 SentimentEngine 相同的 classify(texts, batch_size)
+
+    top_k=1 时使用批量引擎；其他 top_k（如 None 返回所有类别）使用缓存中的 pipeline。
+    """
+
+    # 模型版本指纹的重新检查间隔（秒）
+    REVISION_CHECK_INTERVAL = 5.0
+
+    def __init__(self, model_key="chinese", cache=None, engine=None, top_k=1, backend="pytorch", max_length=512,
+                 long_text=None):
+        """
+        Args:
+            model_key: 模型键名
+            cache: PredictionCache，默认只用内存缓存
+            engine: 计算未命中文本的引擎，默认按下面的参数创建 SentimentEngine
+            top_k: 返回的类别数（None 表示所有类别）
+            backend / max_length / long_text: 推理参数（见 SentimentEngine），传入 engine 时以 engine 的为准
+        """
+        if long_text is not None and top_k != 1:
+            raise ValueError("long_text 只支持 top_k=1")
+        self.model_key = model_key
+        self.top_k = top_k
+        self.cache = cache if cache is not None else PredictionCache()
+        self._engine = engine
+        self.options = {"backend": backend, "max_length": max_length, "long_text": long_text}
+        if engine is not None:
+            self.options = {name: getattr(engine, name, value) for name, value in self.options.items()}
+        self._window = None
+        self._revision = None
+        self._generation = None
+        self._revision_checked = 0.0
+
+    def _get_engine(self):
+        if self._engine is None:
+            from advanced.sentiment_engine import SentimentEngine
+            self._engine = SentimentEngine(self.model_key, **self.options)
+        return self._engine
+
+    def key_options(self):
+        """计入缓存键的推理参数（长文本模式下包括窗口长度和步长）"""
+        if self.options["long_text"] is None:
+            return self.options
+        if self._window is None:
+            window, stride = self._get_engine().window_size()
+            self._window = {**self.options, "window": window, "stride": stride}
+        return self._window
+
+    def _classify_uncached(self, texts, batch_size, revision):
+        """
+        计算未命中的文本
+
+        Returns:
+            (结果列表, 与结果一一对应的模型版本列表)
+        """
+        if self.top_k == 1:
+            engine = self._get_engine()
+            if hasattr(engine, "classify_with_revisions"):
+                # 多进程引擎的工作进程各自加载模型，版本以工作进程报告的为准
+                return engine.classify_with_revisions(texts, batch_size=batch_size)
+            return engine.classify(texts, batch_size=batch_size), [revision] * len(texts)
+
+        from advanced.sentiment_analysis import get_classifier
+        classifier = get_classifier(self.model_key, backend=self.options["backend"], top_k=self.top_k)
+        results = classifier(texts, batch_size=batch_size, truncation=True, max_length=self.options["max_length"])
+        return results, [revision] * len(texts)
+
+    def revision(self):
+        """
+        当前使用的模型版本（定期重新计算，模型文件更新后旧缓存自动失效）
+
+        模型文件变化后只提交后台重载，不在请求路径上加载模型；
+        在 classifier_cache 换上新模型（代数变化）之前继续返回旧版本，
+        保证缓存键的版本与实际计算结果的模型一致。
+        """
+        from advanced.sentiment_analysis import classifier_cache
+
+        now = time.monotonic()
+        generation = classifier_cache.generation(self.model_key)
+        if (self._revision is None or generation != self._generation
+                or now - self._revision_checked >= self.REVISION_CHECK_INTERVAL):
+            revision = model_revision(self.model_key)
+            if self._revision is None:
+                self._revision, self._generation = revision, generation
+            elif revision != self._revision:
+                if generation != self._generation:
+                    # 已经换上新模型（如 activate_revision 或后台重载完成）: 改用新版本的缓存键
+                    self._revision, self._generation = revision, generation
+                    self._window = None
+                    self.cache.purge_stale(self.model_key, revision)
+                else:
+                    # 模型文件已更新但还在用旧模型: 后台重载，完成前继续使用旧版本
+                    _background_reloader().reload(self.model_key)
+            else:
+                self._generation = generation
+            self._revision_checked = now
+        return self._revision
+
+    def classify(self, texts, batch_size=32):
+        """分类（命中缓存的文本不再计算），返回与输入顺序一致的结果"""
+        if isinstance(texts, str):
+            texts = [texts]
+        revision = self.revision()
+        options = self.key_options()
+        keys = [cache_key(text, self.model_key, revision, self.top_k, options) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # 同一批里重复的文本也只计算一次
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        if pending:
+            results, revisions = self._classify_uncached(list(pending.values()), batch_size, revision)
+            by_revision = {}
+            for (key, text), result, used in zip(pending.items(), results, revisions):
+                found[key] = result
+                if used != revision:
+                    # 结果来自另一个版本的模型（如还没重启的工作进程）: 写到那个版本的缓存键下
+                    key = cache_key(text, self.model_key, used, self.top_k, options)
+                by_revision.setdefault(used, {})[key] = _copy_result(result)
+            for used, items in by_revision.items():
+                self.cache.put_many(items, self.model_key, used)
+
+        return [_copy_result(found[key]) for key in keys]
+
+    def close(self):
+        """关闭缓存文件和内部引擎"""
+        self.cache.close()
+        if self._engine is not None and hasattr(self._engine, "close"):
+            self._engine.close()
+
+
+def demo():
+    """演示结果缓存"""
+    print("=" * 60)
+    print("情感分析结果缓存")
+    print("=" * 60)
+
+    texts = [
+        "感谢您的反馈，我们会尽快处理。",
+        "快递太慢了，等了整整一周才收到。",
+        "感谢您的反馈，我们会尽快处理。",
+        "  快递太慢了，等了整整一周才收到。 ",  # 规范化后与第二条相同
+    ] * 100
+
+    classifier = CachedSentimentClassifier("chinese")
+    start = time.perf_counter()
+    classifier.classify(texts)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = classifier.classify(texts)
+    second = time.perf_counter() - start
+
+    print(f"\n第一次: {first * 1000:.1f} ms（只计算了 2 条不同的文本）")
+    print(f"第二次: {second * 1000:.1f} ms（全部命中缓存）")
+    print(f"缓存统计: {classifier.cache.stats()}")
+    print(f"结果示例: {results[0]}")
+
+
+if __name__ == "__main__":
+    demo()
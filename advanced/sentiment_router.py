@@ -0,0 +1,155 @@
+"""
+按语言路由的情感分析
+中英文混合的流量不再全部交给中文模型，而是按文本的语言选择模型
+
+核心做法:
+1. 按字符范围快速判断语言（统计汉字和拉丁字母的数量，不加载任何模型）
+2. 一次调用中，把同一模型的文本归为一组，每个模型只批量运行一次
+3. 按原始输入顺序返回结果，每条结果附带所用的模型键名
+4. 各模型的权重都来自进程级 classifier_cache，常驻内存、与其他入口共享
+
+运行方式: python -m advanced.sentiment_router
+"""
+
+import re
+import threading
+
+from utils.metrics import metrics
+
+# 语言 -> 模型键名（见 MODEL_CONFIGS）
+LANGUAGE_MODELS = {
+    "zh": "chinese",
+    "en": "english",
+}
+
+# CJK 统一汉字（基本区、扩展 A 区、兼容区）
+_CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_LATIN_PATTERN = re.compile(r"[A-Za-z]")
+
+# 一个汉字大致相当于一个英文单词（平均约 4 个字母）
+LATIN_LETTERS_PER_CJK = 4
+
+
+def detect_language(text, default="zh"):
+    """
+    按字符范围判断文本语言
+
+    Args:
+        text: 文本
+        default: 既没有汉字也没有拉丁字母时（如纯数字、表情）返回的语言
+
+    Returns:
+        "zh" 或 "en"
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    latin = len(_LATIN_PATTERN.findall(text))
+    if not cjk and not latin:
+        return default
+    return "zh" if cjk * LATIN_LETTERS_PER_CJK >= latin else "en"
+
+
+class SentimentRouter:
+    """按语言把文本分发给不同模型的情感分析器"""
+
+    def __init__(self, routes=None, default_language="zh", dtype=None, device=None, backend="pytorch",
+                 long_text=None):
+        """
+        Args:
+            routes: 语言 -> 模型键名，默认 LANGUAGE_MODELS
+            default_language: 无法判断语言时使用的语言
+            dtype / device / backend / long_text: 传给每个模型的 SentimentEngine
+        """
+        self.routes = dict(routes or LANGUAGE_MODELS)
+        if default_language not in self.routes:
+            raise ValueError(f"默认语言 {default_language} 没有对应的模型")
+        self.default_language = default_language
+        self._engine_options = {"dtype": dtype, "device": device, "backend": backend, "long_text": long_text}
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def engine(self, model_key):
+        """获取某个模型的批量引擎（第一次使用时创建，权重来自共享缓存）"""
+        with self._lock:
+            engine = self._engines.get(model_key)
+            if engine is None:
+                from advanced.sentiment_engine import SentimentEngine
+                engine = self._engines[model_key] = SentimentEngine(model_key, **self._engine_options)
+            return engine
+
+    def warmup(self):
+        """预先加载所有路由到的模型"""
+        for model_key in dict.fromkeys(self.routes.values()):
+            self.engine(model_key)
+
+    def model_for(self, text):
+        """返回处理该文本的模型键名"""
+        language = detect_language(text, default=self.default_language)
+        return self.routes.get(language, self.routes[self.default_language])
+
+    def route(self, texts):
+        """
+        按模型分组
+
+        Returns:
+            {模型键名: [文本在输入中的下标, ...]}
+        """
+        groups = {}
+        for index, text in enumerate(texts):
+            groups.setdefault(self.model_for(text), []).append(index)
+        return groups
+
+    def classify(self, texts, batch_size=32):
+        """
+        批量情感分类（每个模型只运行一次）
+
+        Returns:
+            与输入顺序一致的 [{"label": ..., "score": ..., "model": 模型键名}, ...]
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        results = [None] * len(texts)
+        for model_key, indices in self.route(texts).items():
+            metrics.inc("sentiment_router_texts_total", len(indices), model=model_key)
+            model_results = self.engine(model_key).classify([texts[i] for i in indices], batch_size=batch_size)
+            for index, result in zip(indices, model_results):
+                result["model"] = model_key
+                results[index] = result
+        return results
+
+
+def demo():
+    """中英文混合文本的路由示例"""
+    print("=" * 60)
+    print("按语言路由的情感分析")
+    print("=" * 60)
+
+    texts = [
+        "这个餐厅的菜品非常美味，环境也很优雅。",
+        "The delivery was late and the package was damaged.",
+        "客服回复很快，问题解决得很及时。",
+        "Absolutely love it, would buy again!",
+        "iPhone 的续航比上一代好多了",
+        "👍👍👍",
+    ]
+
+    print("\n语言检测:")
+    for text in texts:
+        print(f"  {detect_language(text)}  {text}")
+
+    try:
+        router = SentimentRouter()
+        results = router.classify(texts)
+    except Exception as e:
+        print(f"\n❌ 错误: {e}")
+        print("💡 提示: 需要先下载中英文模型（python -m advanced.sentiment_analysis download）")
+        return
+
+    print("\n分析结果:")
+    for text, result in zip(texts, results):
+        print(f"\n文本: {text}")
+        print(f"  模型: {result['model']}  情感: {result['label']} (置信度: {result['score']:.4f})")
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,320 @@
+"""
+流式语料打分
+把任意大小的 JSONL / CSV 文件逐行送进情感分析模型，内存占用与文件大小无关
+
+处理流程是一串生成器（类似 Node.js 的 stream.pipeline）:
+    读取 -> 分批 -> 分类 -> 写出
+
+每写完若干批就把输入/输出的字节偏移保存到检查点文件，
+进程崩溃后重新运行同一条命令即可从检查点继续。
+
+运行方式:
+    python -m advanced.sentiment_analysis score reviews.jsonl scored.jsonl
+    python -m advanced.sentiment_analysis score reviews.csv scored.csv --text-field content
+    python -m advanced.sentiment_analysis score reviews.jsonl scored.jsonl --metrics metrics.prom
+    python -m advanced.sentiment_analysis score mixed.jsonl scored.jsonl --model auto   # 中英文混合
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+from utils.metrics import metrics
+
+
+def detect_format(path):
+    """根据扩展名判断文件格式"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"无法识别的文件格式: {path}（支持 .jsonl / .csv）")
+
+
+def _read_csv_header(f):
+    """读取 CSV 表头，返回 (列名列表, 表头之后的字节偏移)"""
+    header_line = f.readline()
+    header = next(csv.reader([header_line.decode("utf-8-sig")]))
+    return header, len(header_line)
+
+
+def _iter_physical_records(f, offset, csv_mode):
+    """
+    从 offset 开始逐条读取原始记录，yield (记录结束处的字节偏移, 行的原始字节)
+
+    CSV 中带引号的字段可能跨行，这里把引号未闭合的行拼接到一起。
+    解码放在调用方按记录处理，一行编码错误不会中断整个文件。
+    """
+    f.seek(offset)
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        if csv_mode:
+            while line.count(b'"') % 2 == 1:
+                more = f.readline()
+                if not more:
+                    break
+                line += more
+        offset += len(line)
+        yield offset, line
+
+
+def read_records(path, text_field="text", start_offset=None):
+    """
+    读取阶段: 逐条 yield (结束偏移, 记录字典, 待分类文本)
+
+    Args:
+        path: 输入文件
+        text_field: 文本所在的字段/列名
+        start_offset: 从哪个字节偏移开始读（用于断点续跑）
+    """
+    fmt = detect_format(path)
+    with open(path, "rb") as f:
+        header = None
+        if fmt == "csv":
+            header, header_end = _read_csv_header(f)
+            if text_field not in header:
+                raise ValueError(f"CSV 中没有 {text_field!r} 列，现有列: {header}")
+            if start_offset is None:
+                start_offset = header_end
+        offset = start_offset or 0
+
+        for end_offset, raw in _iter_physical_records(f, offset, csv_mode=fmt == "csv"):
+            try:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if not line.strip():
+                    continue
+                if fmt == "csv":
+                    record = dict(zip(header, next(csv.reader([line]))))
+                else:
+                    record = json.loads(line)
+                text = record[text_field]
+            except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, StopIteration) as e:
+                print(f"   ⚠️ 跳过无法解析的记录（偏移 {end_offset}）: {e}")
+                continue
+            yield end_offset, record, str(text)
+
+
+def batched(records, batch_size):
+    """分批阶段: 把记录流切成固定大小的列表（最后一批可能不满）"""
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def classify_batches(batches, engine, batch_size=32):
+    """分类阶段: yield (批次, 对应的分类结果)"""
+    for batch in batches:
+        texts = [text for _, _, text in batch]
+        yield batch, engine.classify(texts, batch_size=batch_size)
+
+
+class _Checkpoint:
+    """检查点文件: 记录已处理的输入/输出字节偏移和行数"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self):
+        if not self.path.exists():
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, state):
+        # 先写临时文件再改名，避免写到一半时崩溃留下损坏的检查点
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path.exists():
+            self.path.unlink()
+
+
+class _ResultWriter:
+    """写出阶段: 按输入格式追加写出带 label/score 的记录"""
+
+    def __init__(self, path, fmt, output_offset):
+        self.fmt = fmt
+        # 截断到检查点记录的位置，丢弃崩溃前写了一半的结果
+        mode = "r+b" if output_offset else "wb"
+        self.file = open(path, mode)
+        self.file.truncate(output_offset)
+        self.file.seek(output_offset)
+        self._header_written = output_offset > 0
+
+    def write(self, records):
+        buffer = io.StringIO()
+        if self.fmt == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            if not self._header_written:
+                writer.writerow(list(records[0].keys()))
+                self._header_written = True
+            for record in records:
+                writer.writerow(list(record.values()))
+        else:
+            for record in records:
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write("\n")
+        self.file.write(buffer.getvalue().encode("utf-8"))
+
+    def tell(self):
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def score_file(input_path, output_path, model_key="chinese", text_field="text",
+               batch_size=32, chunk_size=1024, checkpoint_every=10, engine=None):
+    """
+    流式打分整个文件
+
+    Args:
+        input_path: 输入 JSONL / CSV 文件
+        output_path: 输出文件（格式与输入相同，多出 label / score 两个字段）
+        model_key: 模型键名
+        text_field: 文本字段名
+        batch_size: 模型每次前向计算的文本数
+        chunk_size: 每次从文件读取的记录数（引擎在其中按长度分桶）
+        checkpoint_every: 每写多少个 chunk 保存一次检查点
+        engine: 自定义引擎（默认 SentimentEngine(model_key)）
+
+    Returns:
+        本次运行处理的行数
+    """
+    fmt = detect_format(input_path)
+    checkpoint = _Checkpoint(str(output_path) + ".checkpoint")
+    state = checkpoint.load() or {"input_offset": None, "output_offset": 0, "rows": 0}
+    if state["rows"]:
+        print(f"   ↩️ 从检查点继续: 已完成 {state['rows']} 行")
+
+    if engine is None:
+        from advanced.sentiment_engine import SentimentEngine
+        engine = SentimentEngine(model_key)
+
+    records = read_records(input_path, text_field, start_offset=state["input_offset"])
+    results = classify_batches(batched(records, chunk_size), engine, batch_size)
+    writer = _ResultWriter(output_path, fmt, state["output_offset"])
+
+    done_before = state["rows"]
+    processed = 0
+    start = last_report = time.perf_counter()
+    try:
+        for chunk_index, (batch, predictions) in enumerate(results, 1):
+            scored = []
+            for (_, record, _), prediction in zip(batch, predictions):
+                record = dict(record)
+                record["label"] = prediction["label"]
+                record["score"] = round(prediction["score"], 6)
+                scored.append(record)
+            writer.write(scored)
+            processed += len(batch)
+
+            if chunk_index % checkpoint_every == 0:
+                checkpoint.save({
+                    "input_offset": batch[-1][0],
+                    "output_offset": writer.tell(),
+                    "rows": done_before + processed,
+                })
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"   已处理 {done_before + processed} 行, {processed / (now - start):.1f} 行/秒")
+                last_report = now
+    finally:
+        writer.close()
+
+    checkpoint.remove()
+    elapsed = time.perf_counter() - start
+    print(f"✅ 完成: 本次处理 {processed} 行（累计 {done_before + processed} 行）, "
+          f"耗时 {elapsed:.1f} 秒, {processed / max(elapsed, 1e-9):.1f} 行/秒")
+    print(f"   结果保存到: {output_path}")
+    return processed
+
+
+def write_metrics(path):
+    """把指标快照写入文件（.prom 为 Prometheus 文本格式，否则为 JSON）"""
+    with open(path, "w", encoding="utf-8") as f:
+        if str(path).endswith(".prom"):
+            f.write(metrics.to_prometheus())
+        else:
+            json.dump(metrics.snapshot(), f, ensure_ascii=False, indent=2)
+    print(f"   指标已保存到: {path}")
+
+
+def main(argv=None):
+    """score 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="python -m advanced.sentiment_analysis score",
+        description="流式对 JSONL / CSV 文件做情感分析打分（支持断点续跑）",
+    )
+    parser.add_argument("input", help="输入文件（.jsonl 或 .csv）")
+    parser.add_argument("output", help="输出文件（格式与输入相同）")
+    parser.add_argument("--model", default="chinese", help="模型键名（默认 chinese；auto 表示按语言选择中文/英文模型）")
+    parser.add_argument("--text-field", default="text", help="文本字段名（默认 text）")
+    parser.add_argument("--batch-size", type=int, default=32, help="每批前向计算的文本数")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="每次读取的记录数")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="每多少个 chunk 保存检查点")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数（大于 1 时使用多进程分片）")
+    parser.add_argument("--cache", help="结果缓存的 SQLite 文件（重复文本直接复用之前的结果）")
+    parser.add_argument("--long-text", choices=["mean", "max", "weighted"],
+                        help="长文本按滑动窗口切分并聚合（默认直接截断）")
+    parser.add_argument("--metrics", help="开启各阶段耗时统计，结束时写入该文件（.prom 为 Prometheus 文本，否则为 JSON）")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+
+    if args.model == "auto" and (args.workers > 1 or args.cache):
+        parser.error("--model auto 暂不支持与 --workers / --cache 同时使用")
+
+    engine = None
+    if args.model == "auto":
+        from advanced.sentiment_router import SentimentRouter
+        engine = SentimentRouter(long_text=args.long_text)
+    elif args.workers > 1:
+        from advanced.sentiment_parallel import ParallelSentimentScorer
+        engine = ParallelSentimentScorer(args.model, workers=args.workers, long_text=args.long_text)
+    elif args.long_text:
+        from advanced.sentiment_engine import SentimentEngine
+        engine = SentimentEngine(args.model, long_text=args.long_text)
+    if args.cache:
+        from advanced.sentiment_result_cache import CachedSentimentClassifier, PredictionCache
+        engine = CachedSentimentClassifier(args.model, cache=PredictionCache(args.cache), engine=engine)
+
+    try:
+        score_file(
+            args.input,
+            args.output,
+            model_key=args.model,
+            text_field=args.text_field,
+            batch_size=args.batch_size,
+            chunk_size=args.chunk_size,
+            checkpoint_every=args.checkpoint_every,
+            engine=engine,
+        )
+    finally:
+        # 多进程打分器和结果缓存需要释放进程池 / 数据库连接
+        if hasattr(engine, "close"):
+            engine.close()
+        if args.metrics:
+            write_metrics(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
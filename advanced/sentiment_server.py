@@ -0,0 +1,234 @@
+"""
+异步微批处理情感分析服务
+对比 Node.js 中用 Promise 排队、定时 flush 的批处理写法
+
+很多协程各自提交单条文本，服务在后台把它们合并成小批次:
+- 攒满 max_batch_size 条，或者等待超过 max_wait_ms，就立即处理一批
+- 模型在单独的工作线程中运行，不阻塞事件循环
+- 处理完成后逐个 resolve 调用方的 future
+- stop() 后还没有结果的请求都会收到异常，不会一直等下去；stop() 之后可以再次 start()
+
+运行方式: python -m advanced.sentiment_server
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import SIZE_BUCKETS, metrics
+
+
+def _percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MicroBatchServer:
+    """异步微批处理服务（类似 async with 用法的资源管理器）"""
+
+    # 延迟百分位数只统计最近这么多个请求（长时间运行时内存不随请求数增长）
+    STATS_WINDOW = 10_000
+
+    def __init__(self, engine=None, model_key="chinese", max_batch_size=32, max_wait_ms=5.0):
+        """
+        Args:
+            engine: 带 classify(texts, batch_size) 方法的引擎，默认创建 SentimentEngine
+            model_key: 未传 engine 时使用的模型键名
+            max_batch_size: 单批最多文本数
+            max_wait_ms: 第一条请求到达后最多等待多久（毫秒）再处理
+        """
+        if engine is None:
+            from advanced.sentiment_engine import SentimentEngine
+            engine = SentimentEngine(model_key)
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._executor = None
+        self._inflight = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空统计（例如去掉预热请求）"""
+        self.requests = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=self.STATS_WINDOW)
+
+    async def start(self):
+        """启动后台攒批任务（stop() 之后可以再次启动）"""
+        if self._worker is None:
+            # 单个工作线程: 同一时刻只跑一个批次，其余请求在队列里继续攒批
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        """停止后台任务并关闭工作线程，还在等待结果的请求收到 RuntimeError"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        # 正在处理的批次和队列中剩下的请求都不会再有结果
+        pending = [future for _, future, _ in self._inflight]
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("服务已停止"))
+        self._inflight = []
+        self._queue = None
+
+        executor, self._executor = self._executor, None
+        # 等正在运行的批次结束（不阻塞事件循环）
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown, True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def classify(self, text):
+        """
+        提交单条文本，等待所在批次处理完成
+
+        Returns:
+            {"label": ..., "score": ...}
+        """
+        if self._worker is None:
+            raise RuntimeError("服务未启动，请先调用 start() 或使用 async with")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self):
+        """等到第一条请求后，在 max_wait 时间内尽量攒满一批"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 队列里已有的请求直接取走，不用等待
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        """后台循环: 攒批 -> 在工作线程中推理 -> 回填结果"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # 调用方可能已经取消（例如超时），这些请求不再计算
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            metrics.set("sentiment_server_queue_depth", self._queue.qsize())
+            metrics.observe("sentiment_server_batch_size", len(batch), buckets=SIZE_BUCKETS)
+
+            texts = [text for text, _, _ in batch]
+            # 在这里被取消（stop()）时由 stop() 给这一批请求设置异常
+            self._inflight = batch
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.engine.classify, texts, len(texts)
+                )
+            except Exception as e:
+                self._inflight = []
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self._inflight = []
+
+            now = time.perf_counter()
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future, enqueued), result in zip(batch, results):
+                self.latencies.append(now - enqueued)
+                metrics.observe("sentiment_server_request_seconds", now - enqueued)
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        """返回延迟和批次统计（毫秒，百分位数按最近 STATS_WINDOW 个请求计算）"""
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "p50_ms": _percentile(latencies_ms, 50),
+            "p99_ms": _percentile(latencies_ms, 99),
+            "max_ms": max(latencies_ms) if latencies_ms else 0.0,
+        }
+
+
+async def demo():
+    """模拟突发并发请求"""
+    print("=" * 60)
+    print("异步微批处理情感分析服务")
+    print("=" * 60)
+
+    texts = [
+        "今天天气真好，心情很愉快！",
+        "这部电影太糟糕了，完全不值得看。",
+        "产品还不错，但价格有点贵。",
+        "服务态度很好，推荐大家来试试。",
+    ] * 50
+
+    async with MicroBatchServer(max_batch_size=32, max_wait_ms=5) as server:
+        # 先跑一次，避免把模型加载时间算进来
+        await server.classify("预热")
+        server.reset_stats()
+
+        print(f"\n1. 突发请求: {len(texts)} 个协程同时提交（类似 Promise.all）")
+        start = time.perf_counter()
+        results = await asyncio.gather(*(server.classify(text) for text in texts))
+        elapsed = time.perf_counter() - start
+
+        stats = server.stats()
+        print(f"   耗时: {elapsed:.3f} 秒, 吞吐: {len(texts) / elapsed:.1f} 条/秒")
+        print(f"   批次数: {stats['batches']}, 平均批大小: {stats['avg_batch_size']:.1f}")
+        print(f"   延迟 p50: {stats['p50_ms']:.1f} ms, p99: {stats['p99_ms']:.1f} ms")
+        print(f"   第一条结果: {results[0]}")
+
+    print("\n2. 对比: 逐条同步调用")
+    engine = server.engine
+    start = time.perf_counter()
+    for text in texts:
+        engine.classify([text])
+    elapsed = time.perf_counter() - start
+    print(f"   耗时: {elapsed:.3f} 秒, 吞吐: {len(texts) / elapsed:.1f} 条/秒")
+    print()
+
+    print("💡 提示:")
+    print("   - 模型在工作线程中运行（run_in_executor），事件循环不会被阻塞")
+    print("   - max_wait_ms 越大批次越满，但单条请求的延迟也越高")
+
+
+def run_demo():
+    """运行异步示例"""
+    asyncio.run(demo())
+
+
+if __name__ == "__main__":
+    run_demo()
@@ -0,0 +1,2 @@
+# 性能基准测试包
+# 运行方式: python -m benchmarks.<模块名>
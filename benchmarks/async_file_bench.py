@@ -0,0 +1,104 @@
+"""
+异步文件读取基准测试
+读取大量小文件（默认 10000 个），对比三种方式的耗时和对事件循环的影响
+
+对比项目:
+- sync: 在协程中直接 open().read()，整个读取期间事件循环被阻塞
+- to_thread: 每个文件一个 asyncio.to_thread 任务，一次性全部提交给默认线程池
+- async_file_io: AsyncFileIO.read_many（有上限的线程池 + 并发数限制）
+
+“最大卡顿”是读取期间一个每 1 ms 唤醒一次的心跳协程观察到的最大延迟，
+反映其他协程（例如处理网络请求的协程）最多要等多久。
+
+运行方式:
+    python -m benchmarks.async_file_bench
+    python -m benchmarks.async_file_bench --files 10000 --size 2048 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from advanced.async_file_io import AsyncFileIO
+
+
+def create_files(directory, count, size):
+    """在 directory 中创建 count 个约 size 字节的文本文件"""
+    line = "异步文件读取基准测试 async file io benchmark\n"
+    content = (line * (size // len(line.encode("utf-8")) + 1))[:size // 3]
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+async def read_sync(paths, concurrency):
+    return [read_file(path) for path in paths]
+
+
+async def read_to_thread(paths, concurrency):
+    return await asyncio.gather(*(asyncio.to_thread(read_file, path) for path in paths))
+
+
+async def read_async_file_io(paths, concurrency):
+    async with AsyncFileIO(max_concurrency=concurrency) as file_io:
+        return await file_io.read_many(paths)
+
+
+async def measure(func, paths, concurrency):
+    """运行一种读取方式，同时用心跳协程测量事件循环的最大卡顿"""
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal max_lag
+        while not done.is_set():
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - expected)
+
+    monitor = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)  # 让心跳先开始
+    start = time.perf_counter()
+    contents = await func(paths, concurrency)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await monitor
+    assert len(contents) == len(paths)
+    return elapsed, max_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步文件读取基准测试（sync / to_thread / AsyncFileIO）")
+    parser.add_argument("--files", type=int, default=10_000, help="文件数量")
+    parser.add_argument("--size", type=int, default=1024, help="每个文件的大小（字节）")
+    parser.add_argument("--concurrency", type=int, default=64, help="AsyncFileIO 同时进行的读取数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"异步读取 {args.files} 个小文件（每个约 {args.size} 字节）")
+    print("=" * 60)
+    cases = [("sync", read_sync), ("to_thread", read_to_thread), ("async_file_io", read_async_file_io)]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_files(directory, args.files, args.size)
+        print(f"\n{'方式':<16}{'耗时(秒)':>10}{'文件/秒':>12}{'最大卡顿(ms)':>14}")
+        for name, func in cases:
+            elapsed, max_lag = asyncio.run(measure(func, paths, args.concurrency))
+            print(f"{name:<16}{elapsed:>10.2f}{len(paths) / elapsed:>12,.0f}{max_lag * 1000:>14.1f}")
+
+    print("\n💡 sync 在读取期间阻塞事件循环；to_thread 一次创建上万个任务，每个文件切换一次线程；")
+    print("   AsyncFileIO 限制并发数并按批读取，吞吐量接近 sync，事件循环保持响应")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+精简分类器（FastSentimentClassifier）与 pipeline 的单条延迟对比
+测量精简路径相对 pipeline 的加速，以及它与“仅前向计算”（延迟下限）之间还差多少
+（在微型模型上约为 pipeline 的 1.0–1.4 倍；模型越大，前向计算占比越高，加速越小）
+
+对比项目:
+- pipeline(text): transformers pipeline 逐条调用
+- engine.classify([text]): SentimentEngine
+- fast.predict_one(text): 精简分类器
+- 仅前向计算: 用预先构造好的张量直接调用模型（延迟下限）
+
+运行方式:
+    python -m benchmarks.fast_path
+    python -m benchmarks.fast_path --model chinese --runs 500 --length 16
+"""
+
+import argparse
+import statistics
+import time
+
+from advanced.sentiment_analysis import classifier_cache, get_classifier, torch
+from advanced.sentiment_engine import SentimentEngine
+from advanced.sentiment_fast import FastSentimentClassifier
+from benchmarks.sentiment_bench import synthetic_texts
+from benchmarks.tiny_model import TINY_MODEL_KEY, register_tiny_model
+
+
+def measure(func, texts, warmup=20):
+    """逐条调用 func，返回延迟统计（微秒）"""
+    for text in texts[:warmup]:
+        func(text)
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        func(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="精简分类器与 pipeline 的单条延迟对比")
+    parser.add_argument("--model", default=TINY_MODEL_KEY, help="模型键名（默认使用微型随机模型）")
+    parser.add_argument("--runs", type=int, default=300, help="每种方式调用的次数")
+    parser.add_argument("--length", type=int, default=16, help="文本字数")
+    args = parser.parse_args()
+
+    if args.model == TINY_MODEL_KEY:
+        register_tiny_model()
+
+    texts = synthetic_texts(args.runs, args.length, seed=2)
+    classifier = get_classifier(args.model)
+    engine = SentimentEngine(args.model)
+    fast = FastSentimentClassifier(args.model, max_length=128, max_batch_size=1)
+
+    # 前向计算的延迟下限: 输入张量提前构造好，只调用模型
+    model, tokenizer = classifier_cache.get_model(args.model)
+    inputs = tokenizer(texts[0], return_tensors="pt").to(model.device)
+
+    def forward_only(_text):
+        with torch.inference_mode():
+            return model(**inputs).logits
+
+    print("=" * 60)
+    print(f"单条文本延迟（模型: {args.model}，文本 {args.length} 字，每种 {args.runs} 次）")
+    print("=" * 60)
+    candidates = [
+        ("pipeline(text)", classifier),
+        ("engine.classify([text])", lambda text: engine.classify([text])),
+        ("fast.predict_one(text)", fast.predict_one),
+        ("仅前向计算", forward_only),
+    ]
+    results = {name: measure(func, texts) for name, func in candidates}
+
+    baseline = results["pipeline(text)"]["mean"]
+    print(f"\n{'方式':<26}{'平均(µs)':>12}{'P50(µs)':>12}{'P99(µs)':>12}{'加速':>8}")
+    for name, stats in results.items():
+        print(f"{name:<26}{stats['mean']:>12.0f}{stats['p50']:>12.0f}{stats['p99']:>12.0f}"
+              f"{baseline / stats['mean']:>7.1f}x")
+
+    overhead = results["fast.predict_one(text)"]["mean"] - results["仅前向计算"]["mean"]
+    print(f"\n💡 精简路径在前向计算之外的开销约 {overhead:.0f} µs/条")
+
+    # 精简路径与 pipeline 的预测结果应一致
+    labels = fast.label_map.labels
+    mismatches = sum(
+        labels[fast.predict_one(text)[0]] != classifier(text)[0]["label"] for text in texts[:50]
+    )
+    print("✅ 前 50 条预测与 pipeline 一致" if mismatches == 0 else f"⚠️ {mismatches} 条预测与 pipeline 不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+大文件读取基准测试
+在生成的日志文件（默认 1 GB）上对比 readlines() 与流式读取的吞吐量和峰值内存
+
+对比项目（每种方式在单独的子进程中运行，峰值内存互不影响）:
+- readlines: f.readlines() 一次读入全部行
+- iter_lines: 惰性逐行读取（64 KB / 1 MB 缓冲区）
+- iter_chunks: 1 MB 二进制块，只统计换行符
+- line_index: 建立行偏移索引后随机读取 10000 行
+
+运行方式:
+    python -m benchmarks.file_io_bench
+    python -m benchmarks.file_io_bench --size-mb 100 --path /tmp/app.log --methods iter_lines line_index
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from advanced.file_io import LineIndex, iter_chunks, iter_lines
+from benchmarks.memory import peak_rss_mb
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+METHODS = ["readlines", "iter_lines_64k", "iter_lines_1m", "iter_chunks", "line_index"]
+
+
+def generate_log_file(path, size_mb):
+    """生成约 size_mb MB 的日志文件（已存在且大小足够时直接复用）"""
+    path = Path(path)
+    target = size_mb * 1024 * 1024
+    if path.exists() and path.stat().st_size >= target:
+        return path
+    print(f"   生成 {size_mb} MB 测试文件: {path}")
+    users = ["alice", "bob", "张三", "李四", "王五"]
+    written, line_no = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            lines = []
+            for _ in range(100_000):
+                line_no += 1
+                lines.append(
+                    f"2024-05-01 12:{line_no // 60 % 60:02d}:{line_no % 60:02d} INFO request_id={line_no} "
+                    f"user={users[line_no % len(users)]} path=/api/v1/items/{line_no % 9973} took={line_no % 997}ms\n"
+                )
+            block = "".join(lines)
+            f.write(block)
+            written += len(block.encode("utf-8"))
+    return path
+
+
+def run_method(method, path):
+    """在当前进程中执行一种读取方式，返回 {"seconds", "lines", 以及额外信息}"""
+    start = time.perf_counter()
+    result = {}
+    if method == "readlines":
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        result["lines"] = len(lines)
+    elif method.startswith("iter_lines"):
+        buffer_size = 64 * 1024 if method.endswith("64k") else 1024 * 1024
+        result["lines"] = sum(1 for _ in iter_lines(path, buffer_size=buffer_size))
+    elif method == "iter_chunks":
+        result["lines"] = sum(chunk.count(b"\n") for chunk in iter_chunks(path))
+    elif method == "line_index":
+        with LineIndex(path) as index:
+            result["build_seconds"] = time.perf_counter() - start
+            result["lines"] = len(index)
+            rng = random.Random(0)
+            lookup_start = time.perf_counter()
+            for _ in range(10_000):
+                index[rng.randrange(len(index))]
+            result["lookup_us"] = (time.perf_counter() - lookup_start) / 10_000 * 1e6
+    else:
+        raise ValueError(f"未知的读取方式: {method}")
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def measure(method, path):
+    """在新的子进程中运行一种读取方式（峰值内存只反映这一种方式）"""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.file_io_bench", "--run", method, "--path", str(path)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大文件读取基准测试（readlines vs 流式读取）")
+    parser.add_argument("--size-mb", type=int, default=1024, help="测试文件大小（MB）")
+    parser.add_argument("--path", help="测试文件路径（默认放在系统临时目录，重复运行时复用）")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS, help="要测量的读取方式")
+    parser.add_argument("--run", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    path = Path(args.path or os.path.join(tempfile.gettempdir(), f"file_io_bench_{args.size_mb}mb.log"))
+    if args.run:
+        print(json.dumps(run_method(args.run, path)))
+        return
+
+    print("=" * 60)
+    print(f"大文件读取基准测试（{args.size_mb} MB）")
+    print("=" * 60)
+    generate_log_file(path, args.size_mb)
+    size_mb = path.stat().st_size / 1024 / 1024
+
+    print(f"\n{'方式':<18}{'耗时(秒)':>10}{'MB/秒':>10}{'峰值内存(MB)':>14}{'行数':>12}")
+    for method in args.methods:
+        result = measure(method, path)
+        rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] else "-"
+        print(f"{method:<18}{result['seconds']:>10.2f}{size_mb / result['seconds']:>10.0f}{rss:>14}"
+              f"{result['lines']:>12}")
+        if method == "line_index":
+            print(f"   建索引 {result['build_seconds']:.2f} 秒，随机读取一行 {result['lookup_us']:.1f} µs")
+    print("\n💡 readlines() 的峰值内存随文件大小增长；流式读取只占一个缓冲区")
+    print("   line_index 的峰值内存包含 mmap 映射的文件页（属于页缓存，内存紧张时由系统回收）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+JSON 编解码基准测试
+在类似 json_handling 中 users / metadata 结构的嵌套数据上，测量各后端的编码 / 解码速度（MB/秒）和输出体积
+
+对比项目:
+- 基线: json.dumps(data, ensure_ascii=False, indent=2)（原来的写法）
+- 每个已安装的后端（orjson / ujson / json）× 紧凑 / 缩进两种格式
+
+MB/秒按输出的 JSON 字节数计算。
+
+运行方式:
+    python -m benchmarks.json_bench
+    python -m benchmarks.json_bench --users 50000 --repeats 5
+"""
+
+import argparse
+import functools
+import json
+import random
+import time
+
+from utils.json_codec import JsonCodec, available_backends
+
+
+def make_payload(num_users, seed=0):
+    """生成嵌套的 users / metadata 数据"""
+    rng = random.Random(seed)
+    cities = ["北京", "上海", "深圳", "杭州", "Chengdu"]
+    users = [
+        {
+            "id": i,
+            "name": f"用户{i}",
+            "email": f"user{i}@example.com",
+            "active": rng.random() > 0.3,
+            "score": round(rng.uniform(0, 100), 3),
+            "tags": rng.sample(["python", "node", "ai", "数据", "后端", "前端"], 3),
+            "address": {
+                "city": rng.choice(cities),
+                "zip": f"{rng.randint(100000, 999999)}",
+                "geo": [rng.random(), rng.random()],
+            },
+            "last_login": None if i % 7 == 0 else f"2024-05-{i % 28 + 1:02d}T12:00:00Z",
+        }
+        for i in range(num_users)
+    ]
+    return {"users": users, "metadata": {"total": num_users, "page": 1, "generated_by": "json_bench"}}
+
+
+def best_of(func, repeats):
+    """运行 repeats 次，返回 (最短耗时, 最后一次的结果)"""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 编解码基准测试（标准库 vs orjson / ujson，紧凑 vs 缩进）")
+    parser.add_argument("--users", type=int, default=20_000, help="users 数组的长度")
+    parser.add_argument("--repeats", type=int, default=5, help="每项重复次数（取最快的一次）")
+    args = parser.parse_args()
+
+    data = make_payload(args.users)
+    print("=" * 60)
+    print(f"JSON 编解码基准测试（{args.users} 个用户，后端: {', '.join(available_backends())}）")
+    print("=" * 60)
+
+    cases = [("基线 json indent=2", lambda: json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"), json.loads)]
+    for backend in available_backends():
+        codec = JsonCodec(backend)
+        for indent, mode in ((None, "紧凑"), (2, "缩进")):
+            cases.append((f"{backend} {mode}", functools.partial(codec.dumpb, data, indent), codec.loads))
+
+    print(f"\n{'方式':<22}{'体积(KB)':>10}{'编码 MB/秒':>12}{'解码 MB/秒':>12}")
+    baseline = None
+    for name, encode, decode in cases:
+        encode_seconds, payload = best_of(encode, args.repeats)
+        decode_seconds, decoded = best_of(lambda: decode(payload), args.repeats)
+        assert decoded == data, f"{name} 解码结果与原数据不一致"
+        size_mb = len(payload) / 1024 / 1024
+        baseline = baseline or encode_seconds
+        print(f"{name:<22}{len(payload) / 1024:>10.0f}{size_mb / encode_seconds:>12.1f}{size_mb / decode_seconds:>12.1f}"
+              f"   （编码耗时为基线的 {encode_seconds / baseline:.0%}）")
+
+    print("\n💡 紧凑格式省掉缩进和换行；MB/秒按各自的输出体积计算，总耗时看“编码耗时”一列")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+基准测试共用的内存测量
+
+所有基准测试都用这里的 peak_rss_mb()，不同脚本报告的峰值内存可以直接比较。
+"""
+
+import sys
+from pathlib import Path
+
+
+def peak_rss_mb():
+    """
+    当前进程自身的峰值常驻内存（MB），无法测量时返回 None
+
+    Linux 上读 /proc/self/status 的 VmHWM: ru_maxrss 在 exec 后保留父进程的峰值，
+    在子进程中测量会偏大；其他系统退回 ru_maxrss（macOS 单位是字节，其他是 KB），Windows 上没有。
+    """
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,72 @@
+"""
+多进程扩展性基准测试
+测量 ParallelSentimentScorer 在 1/2/4/8/16 个工作进程下的吞吐量
+
+默认使用微型随机模型（见 tiny_model.py），离线即可运行。
+
+运行方式:
+    python -m benchmarks.parallel_scaling
+    python -m benchmarks.parallel_scaling --workers 1 2 4 --texts 4000 --model chinese
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from advanced import sentiment_analysis
+from advanced.sentiment_parallel import ParallelSentimentScorer
+from benchmarks.tiny_model import TINY_MODEL_KEY, register_tiny_model
+
+SAMPLE_TEXTS = [
+    "很好！",
+    "快递太慢了，等了整整一周才收到。",
+    "这个餐厅的菜品非常美味，环境也很优雅，服务员态度热情周到，下次还会再来。",
+    "产品质量一般，性价比不高，客服回复也很慢，包装还有破损，整体体验比较差。",
+]
+
+
+def run(model_key, worker_counts, num_texts, batch_size, shard_size):
+    """依次测量每个进程数下的吞吐量，返回 [(进程数, 线程数, 条/秒), ...]"""
+    texts = (SAMPLE_TEXTS * (num_texts // len(SAMPLE_TEXTS) + 1))[:num_texts]
+    rows = []
+    for workers in worker_counts:
+        with ParallelSentimentScorer(model_key, workers=workers, shard_size=shard_size) as scorer:
+            # 模型加载不计入吞吐量
+            scorer.warmup()
+            start = time.perf_counter()
+            scorer.classify(texts, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        rows.append((workers, scorer.threads_per_worker, len(texts) / elapsed))
+        print(f"   {workers:>3} 个进程 x {scorer.threads_per_worker:>2} 线程: {rows[-1][2]:10.1f} 条/秒")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程情感分析扩展性基准测试")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="要测量的进程数")
+    parser.add_argument("--texts", type=int, default=8000, help="文本数量")
+    parser.add_argument("--batch-size", type=int, default=32, help="每批文本数")
+    parser.add_argument("--shard-size", type=int, default=256, help="每个分片的文本数")
+    parser.add_argument("--model", default=TINY_MODEL_KEY, help="模型键名（默认使用微型随机模型）")
+    parser.add_argument("--model-path", help="覆盖模型的本地路径")
+    args = parser.parse_args()
+
+    if args.model == TINY_MODEL_KEY:
+        register_tiny_model()
+    if args.model_path:
+        sentiment_analysis.MODEL_CONFIGS[args.model]["local_path"] = Path(args.model_path)
+
+    print("=" * 60)
+    print(f"多进程扩展性基准测试（CPU 核数: {os.cpu_count()}）")
+    print("=" * 60)
+    rows = run(args.model, args.workers, args.texts, args.batch_size, args.shard_size)
+
+    baseline = rows[0][2]
+    print("\n进程数  线程数     条/秒    加速比")
+    for workers, threads, throughput in rows:
+        print(f"{workers:>6}  {threads:>6}  {throughput:>8.1f}  {throughput / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
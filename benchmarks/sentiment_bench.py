@@ -0,0 +1,252 @@
+"""
+情感分析推理基准测试
+测量冷启动加载时间、单条延迟、不同批大小/序列长度的吞吐量、峰值内存和线程扩展性
+
+默认使用微型随机模型（见 tiny_model.py），离线即可运行；
+结果保存为 JSON，可以和之前的结果对比，发现性能回退时以非零状态码退出。
+
+运行方式:
+    python -m benchmarks.sentiment_bench --output results.json
+    python -m benchmarks.sentiment_bench --compare baseline.json --threshold 0.1
+    python -m benchmarks.sentiment_bench --profile hot_path.prof      # cProfile，可用 snakeviz 查看
+    py-spy record -o profile.svg -- python -m benchmarks.sentiment_bench --hot-loop 30
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from advanced import sentiment_analysis
+from advanced.sentiment_engine import SentimentEngine
+from benchmarks.memory import peak_rss_mb
+from benchmarks.tiny_model import TINY_MODEL_KEY, register_tiny_model
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 在全新的子进程中测量“导入 + 加载模型”的总耗时
+COLD_LOAD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+from pathlib import Path
+from advanced import sentiment_analysis
+key, path = sys.argv[1], sys.argv[2]
+sentiment_analysis.MODEL_CONFIGS[key] = {"name": key, "local_path": Path(path), "display_name": key}
+sentiment_analysis.classifier_cache.get_model(key)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def synthetic_texts(count, length, seed=0):
+    """生成指定字数的随机中文文本（微型模型中每个汉字是一个 token）"""
+    rng = random.Random(seed)
+    return ["".join(chr(rng.randint(0x4E00, 0x4E00 + 3000)) for _ in range(length)) for _ in range(count)]
+
+
+def measure_cold_load(model_key, runs=3):
+    """冷启动: 新进程中导入 torch/transformers 并加载模型的耗时（秒，取中位数）"""
+    model_path = str(sentiment_analysis.MODEL_CONFIGS[model_key]["local_path"])
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_LOAD_CODE, model_key, model_path],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+        timings.append(json.loads(result.stdout.strip().splitlines()[-1])["seconds"])
+    return statistics.median(timings)
+
+
+def measure_warm_latency(engine, runs=200):
+    """预热后单条文本的延迟（毫秒）"""
+    texts = synthetic_texts(runs, 32, seed=1)
+    engine.classify(texts[:10])
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        engine.classify([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def measure_throughput(engine, batch_sizes, seq_lengths, num_texts, repeats=3):
+    """不同批大小和序列长度下的吞吐量（条/秒，取 repeats 次中最快的一次以减少噪声）"""
+    rows = []
+    for seq_len in seq_lengths:
+        texts = synthetic_texts(num_texts, seq_len, seed=seq_len)
+        engine.classify(texts[:max(batch_sizes)], batch_size=max(batch_sizes))
+        for batch_size in batch_sizes:
+            elapsed = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                engine.classify(texts, batch_size=batch_size)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            rows.append({"batch_size": batch_size, "seq_len": seq_len, "texts_per_sec": num_texts / elapsed})
+            print(f"   batch={batch_size:<4} seq_len={seq_len:<4} {rows[-1]['texts_per_sec']:10.1f} 条/秒")
+    return rows
+
+
+def measure_thread_scaling(engine, num_texts, batch_size=32, seq_len=64):
+    """不同 torch 线程数下的吞吐量"""
+    torch = sentiment_analysis.torch
+    original = torch.get_num_threads()
+    cpu_count = os.cpu_count() or 1
+    thread_counts = [n for n in (1, 2, 4, 8, 16, 32) if n <= cpu_count] or [1]
+    texts = synthetic_texts(num_texts, seq_len, seed=2)
+    rows = []
+    try:
+        for threads in thread_counts:
+            torch.set_num_threads(threads)
+            engine.classify(texts[:batch_size], batch_size=batch_size)
+            start = time.perf_counter()
+            engine.classify(texts, batch_size=batch_size)
+            rows.append({"threads": threads, "texts_per_sec": num_texts / (time.perf_counter() - start)})
+            print(f"   threads={threads:<3} {rows[-1]['texts_per_sec']:10.1f} 条/秒")
+    finally:
+        torch.set_num_threads(original)
+    return rows
+
+
+def run_hot_path(engine, seconds=None, iterations=None, batch_size=32, seq_len=64):
+    """反复运行批量推理的热路径（用于 cProfile / py-spy 采样）"""
+    texts = synthetic_texts(256, seq_len, seed=3)
+    deadline = time.perf_counter() + seconds if seconds else None
+    count = 0
+    while (deadline is None or time.perf_counter() < deadline) and (iterations is None or count < iterations):
+        engine.classify(texts, batch_size=batch_size)
+        count += 1
+    return count
+
+
+def run_benchmarks(model_key, quick=False):
+    """运行全部基准测试，返回结果字典"""
+    batch_sizes = [1, 8, 32] if quick else [1, 8, 32, 64]
+    seq_lengths = [16, 64] if quick else [16, 64, 256]
+    num_texts = 128 if quick else 512
+
+    print("1. 冷启动加载")
+    cold = measure_cold_load(model_key, runs=1 if quick else 3)
+    print(f"   {cold:.3f} 秒")
+
+    engine = SentimentEngine(model_key)
+    print("2. 单条延迟")
+    latency = measure_warm_latency(engine, runs=50 if quick else 200)
+    print(f"   p50 {latency['p50']:.2f} ms, p99 {latency['p99']:.2f} ms")
+
+    print("3. 批量吞吐量")
+    throughput = measure_throughput(engine, batch_sizes, seq_lengths, num_texts)
+
+    print("4. 线程扩展性")
+    scaling = measure_thread_scaling(engine, num_texts)
+
+    torch = sentiment_analysis.torch
+    return {
+        "meta": {
+            "model_key": model_key,
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": sentiment_analysis.transformers.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cold_load_seconds": cold,
+        "warm_latency_ms": latency,
+        "throughput": throughput,
+        "thread_scaling": scaling,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_results(current, baseline, threshold=0.1):
+    """
+    与基线结果比较，返回回退项列表
+
+    延迟/加载时间增加超过 threshold，或吞吐量下降超过 threshold，视为回退。
+    """
+    checks = [
+        ("冷启动加载（秒）", baseline["cold_load_seconds"], current["cold_load_seconds"], "lower"),
+        ("单条延迟 p50（ms）", baseline["warm_latency_ms"]["p50"], current["warm_latency_ms"]["p50"], "lower"),
+    ]
+    baseline_throughput = {(row["batch_size"], row["seq_len"]): row["texts_per_sec"] for row in baseline["throughput"]}
+    for row in current["throughput"]:
+        key = (row["batch_size"], row["seq_len"])
+        if key in baseline_throughput:
+            name = f"吞吐量 batch={key[0]} seq_len={key[1]}（条/秒）"
+            checks.append((name, baseline_throughput[key], row["texts_per_sec"], "higher"))
+
+    regressions = []
+    print(f"\n{'指标':<36}{'基线':>12}{'当前':>12}{'变化':>10}")
+    for name, old, new, better in checks:
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold if better == "lower" else change < -threshold
+        flag = "  ❌" if regressed else ""
+        print(f"{name:<36}{old:>12.3f}{new:>12.3f}{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="情感分析推理基准测试")
+    parser.add_argument("--model", default=TINY_MODEL_KEY, help="模型键名（默认使用微型随机模型）")
+    parser.add_argument("--output", help="结果保存为 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--threshold", type=float, default=0.1, help="回退判定阈值（默认 10%%）")
+    parser.add_argument("--quick", action="store_true", help="缩小测试规模，快速运行")
+    parser.add_argument("--profile", help="用 cProfile 记录热路径，保存到该文件")
+    parser.add_argument("--hot-loop", type=float, metavar="SECONDS",
+                        help="只循环运行热路径指定秒数（配合 py-spy record 使用）")
+    args = parser.parse_args()
+
+    if args.model == TINY_MODEL_KEY:
+        register_tiny_model()
+
+    if args.hot_loop:
+        count = run_hot_path(SentimentEngine(args.model), seconds=args.hot_loop)
+        print(f"热路径运行了 {count} 次")
+        return
+
+    if args.profile:
+        engine = SentimentEngine(args.model)
+        run_hot_path(engine, iterations=2)
+        profiler = cProfile.Profile()
+        profiler.runcall(run_hot_path, engine, iterations=20)
+        profiler.dump_stats(args.profile)
+        print(f"cProfile 结果已保存到 {args.profile}（python -m pstats {args.profile} 查看）")
+        return
+
+    print("=" * 60)
+    print(f"情感分析推理基准测试（模型: {args.model}）")
+    print("=" * 60)
+    results = run_benchmarks(args.model, quick=args.quick)
+    print(f"\n峰值内存: {results['peak_rss_mb']:.1f} MB" if results["peak_rss_mb"] else "")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 项性能回退")
+            sys.exit(1)
+        print("\n✅ 没有发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
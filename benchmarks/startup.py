@@ -0,0 +1,100 @@
+"""
+启动耗时基准测试
+用 `python -X importtime` 测量 main.py 的冷启动导入耗时
+
+超出预算，或者启动时意外导入了 torch / transformers 等重量级依赖时，
+以非零状态码退出，方便在 CI 中发现启动性能回退。
+
+运行方式: python -m benchmarks.startup [--budget-ms 300] [--runs 5] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 启动阶段不允许出现的重量级模块（应由 sentiment_analysis 延迟导入）
+HEAVY_MODULES = ("torch", "transformers", "numpy", "tokenizers", "safetensors")
+
+
+def measure_import_time(module="main"):
+    """
+    在全新的子进程中导入模块，解析 -X importtime 的输出
+
+    Returns:
+        (总耗时毫秒, {模块名: (self 微秒, cumulative 微秒)})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # 格式: "import time:       123 |        456 |   package.module"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    total_ms = timings[module][1] / 1000
+    return total_ms, timings
+
+
+def report(budget_ms=300.0, runs=5, top=15, module="main"):
+    """运行多次取中位数，打印报告，返回是否通过"""
+    print("=" * 60)
+    print(f"启动耗时基准测试: import {module}")
+    print("=" * 60)
+
+    totals = []
+    timings = {}
+    for _ in range(runs):
+        total_ms, timings = measure_import_time(module)
+        totals.append(total_ms)
+
+    median_ms = statistics.median(totals)
+    print(f"\n运行次数: {runs}")
+    print(f"耗时中位数: {median_ms:.1f} ms (最小 {min(totals):.1f} ms, 最大 {max(totals):.1f} ms)")
+    print(f"预算: {budget_ms:.1f} ms")
+
+    print(f"\n累计耗时最多的 {top} 个模块（最后一次运行）:")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {cumulative_us / 1000:8.2f} ms  (self {self_us / 1000:6.2f} ms)  {name}")
+
+    passed = True
+    heavy = sorted(name for name in timings if name.split(".")[0] in HEAVY_MODULES)
+    if heavy:
+        roots = sorted({name.split(".")[0] for name in heavy})
+        print(f"\n❌ 启动时导入了重量级模块: {', '.join(roots)}")
+        passed = False
+    if median_ms > budget_ms:
+        print(f"\n❌ 启动耗时 {median_ms:.1f} ms 超出预算 {budget_ms:.1f} ms")
+        passed = False
+    if passed:
+        print("\n✅ 启动耗时在预算以内")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 冷启动耗时基准测试")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="导入耗时预算（毫秒）")
+    parser.add_argument("--runs", type=int, default=5, help="重复测量次数")
+    parser.add_argument("--top", type=int, default=15, help="显示最慢的模块数量")
+    parser.add_argument("--module", default="main", help="要测量的模块")
+    args = parser.parse_args()
+
+    passed = report(args.budget_ms, args.runs, args.top, args.module)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+基准测试用的微型随机模型
+不需要联网下载，任何机器上都能跑基准测试
+
+模型结构与真实的 BERT 分类模型相同，只是层数和宽度很小、权重随机初始化，
+所以测出来的数字只适合比较代码路径的开销和相对变化，不代表真实模型的绝对性能。
+"""
+
+import string
+import tempfile
+from pathlib import Path
+
+TINY_MODEL_KEY = "tiny"
+
+# 默认缓存位置，多次运行基准测试时复用
+DEFAULT_TINY_MODEL_DIR = Path(tempfile.gettempdir()) / "python-for-ai-tiny-sentiment-model"
+
+
+def _build_vocab():
+    """特殊 token + ASCII 字符 + 常用汉字（CJK 基本区的前 3500 个字）"""
+    special = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    ascii_tokens = list(string.ascii_lowercase + string.digits + string.punctuation)
+    cjk = [chr(code) for code in range(0x4E00, 0x4E00 + 3500)]
+    punctuation = list("，。！？、；：“”‘’（）《》")
+    return list(dict.fromkeys(special + ascii_tokens + punctuation + cjk))
+
+
+def create_tiny_model(path=None, hidden_size=64, num_layers=2, max_length=512, seed=0):
+    """
+    创建微型 BERT 情感分类模型并保存到本地（已存在时直接复用）
+
+    Returns:
+        模型目录
+    """
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    path = Path(path or DEFAULT_TINY_MODEL_DIR)
+    if (path / "config.json").exists():
+        return path
+    path.mkdir(parents=True, exist_ok=True)
+
+    vocab = _build_vocab()
+    vocab_file = path / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab), encoding="utf-8")
+    tokenizer = BertTokenizerFast(vocab_file=str(vocab_file), model_max_length=max_length)
+
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=max(1, hidden_size // 32),
+        intermediate_size=hidden_size * 4,
+        max_position_embeddings=max_length,
+        num_labels=2,
+        id2label={0: "negative", 1: "positive"},
+        label2id={"negative": 0, "positive": 1},
+    )
+    torch.manual_seed(seed)
+    model = BertForSequenceClassification(config).eval()
+
+    tokenizer.save_pretrained(str(path))
+    model.save_pretrained(str(path))
+    return path
+
+
+def register_tiny_model(key=TINY_MODEL_KEY, path=None):
+    """创建微型模型并注册到 MODEL_CONFIGS，之后可以像其他模型一样用 key 加载"""
+    from advanced.sentiment_analysis import MODEL_CONFIGS
+
+    model_dir = create_tiny_model(path)
+    MODEL_CONFIGS[key] = {
+        "name": key,
+        "local_path": model_dir,
+        "display_name": "基准测试用微型随机模型",
+    }
+    return key
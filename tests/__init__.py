@@ -0,0 +1,2 @@
+# 测试包
+# 运行方式: python -m pytest -q tests
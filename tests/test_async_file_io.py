@@ -0,0 +1,78 @@
+"""
+AsyncFileIO.iter_lines 的并发限制和取消测试，以及关闭时不阻塞事件循环
+
+运行方式: python -m pytest -q tests/test_async_file_io.py
+"""
+
+import asyncio
+import time
+
+from advanced.async_file_io import AsyncFileIO
+
+
+def _write_lines(path, count):
+    path.write_text("".join(f"line {i}\n" for i in range(count)), encoding="utf-8")
+    return path
+
+
+def test_iterating_more_files_than_concurrency_limit(tmp_path):
+    paths = [_write_lines(tmp_path / f"{name}.txt", 50) for name in "abc"]
+
+    async def main():
+        # 同时迭代 3 个文件，并发上限只有 1: 信号量跨越 yield 时这里会死锁
+        async with AsyncFileIO(max_workers=2, max_concurrency=1) as file_io:
+            iterators = [file_io.iter_lines(path, batch_lines=10) for path in paths]
+            rows = []
+            for _ in range(50):
+                rows.append([await iterator.__anext__() for iterator in iterators])
+            for iterator in iterators:
+                await iterator.aclose()
+            return rows
+
+    rows = asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert rows[0] == ["line 0"] * 3
+    assert rows[-1] == ["line 49"] * 3
+
+
+def test_cancel_waits_for_pending_read(tmp_path):
+    path = _write_lines(tmp_path / "big.txt", 200_000)
+
+    async def main():
+        async with AsyncFileIO(max_concurrency=1) as file_io:
+            async def consume():
+                async for _ in file_io.iter_lines(path, batch_lines=100_000):
+                    pass
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            # 信号量已经归还，文件仍然可以读取
+            return await asyncio.wait_for(file_io.read_text(path), timeout=5)
+
+    assert asyncio.run(main()).startswith("line 0\n")
+
+
+def test_close_does_not_block_event_loop():
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        async with AsyncFileIO(max_workers=1) as file_io:
+            # 退出时线程池中还有一个 0.3 秒的操作没做完
+            pending = file_io._run(time.sleep, 0.3)
+        ticks_during_close = ticks
+        task.cancel()
+        await pending
+        return ticks_during_close
+
+    assert asyncio.run(main()) >= 10
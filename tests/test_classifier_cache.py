@@ -0,0 +1,103 @@
+"""
+ClassifierCache 的并发加载测试（用 sleep 代替真实的模型加载，不需要 torch）
+
+运行方式: python -m pytest -q tests/test_classifier_cache.py
+"""
+
+import threading
+import time
+
+from advanced.sentiment_analysis import ClassifierCache, _LoadedModel
+
+
+class SlowCache(ClassifierCache):
+    """加载一个模型需要 delay 秒，并记录同时进行的加载数"""
+
+    def __init__(self, delay=0.3):
+        super().__init__(max_memory_mb=0)
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self._count_lock = threading.Lock()
+
+    def _load_model(self, model_key, dtype, device, backend):
+        with self._count_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(model_key)
+        time.sleep(self.delay)
+        with self._count_lock:
+            self.active -= 1
+        return _LoadedModel(f"model-{model_key}", f"tokenizer-{model_key}", 0, self.delay, None)
+
+
+def _load_in_threads(cache, keys):
+    results = {}
+
+    def load(index, key):
+        results[index] = cache.get_model(key)
+
+    threads = [threading.Thread(target=load, args=(index, key)) for index, key in enumerate(keys)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [results[index] for index in range(len(keys))]
+
+
+def test_different_models_load_concurrently():
+    cache = SlowCache()
+    start = time.perf_counter()
+    _load_in_threads(cache, ["chinese", "english"])
+    assert cache.peak == 2
+    assert time.perf_counter() - start < 2 * cache.delay
+
+
+def test_same_model_loads_once():
+    cache = SlowCache()
+    results = _load_in_threads(cache, ["chinese"] * 4)
+    assert cache.calls == ["chinese"]
+    assert all(result == ("model-chinese", "tokenizer-chinese") for result in results)
+
+
+def test_cache_hit_not_blocked_by_other_load():
+    cache = SlowCache(delay=0.5)
+    cache.get_model("chinese")
+    loader = threading.Thread(target=cache.get_model, args=("english",))
+    loader.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    cache.get_model("chinese")
+    assert time.perf_counter() - start < 0.1
+    loader.join()
+
+
+def test_failed_load_is_not_cached():
+    class FailingCache(SlowCache):
+        def _load_model(self, model_key, dtype, device, backend):
+            super()._load_model(model_key, dtype, device, backend)
+            raise FileNotFoundError(model_key)
+
+    cache = FailingCache(delay=0.01)
+    for _ in range(2):
+        try:
+            cache.get_model("chinese")
+        except FileNotFoundError:
+            pass
+    assert cache.calls == ["chinese", "chinese"]
+
+
+def test_failed_reload_keeps_old_model():
+    class FlakyCache(SlowCache):
+        def _load_model(self, model_key, dtype, device, backend):
+            if self.calls:
+                self.calls.append(model_key)
+                raise FileNotFoundError(f"{model_key}-{backend}")
+            return super()._load_model(model_key, dtype, device, backend)
+
+    cache = FlakyCache(delay=0.01)
+    before = cache.get_model("chinese", backend="int8")
+    assert cache.reload("chinese") == 0
+    assert cache.get_model("chinese", backend="int8") == before
+    assert cache.calls == ["chinese", "chinese"]
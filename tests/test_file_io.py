@@ -0,0 +1,169 @@
+"""
+file_io 原子写入和逐行读取测试
+
+运行方式: python -m pytest -q tests/test_file_io.py
+"""
+
+import asyncio
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from advanced import file_io
+from advanced.async_file_io import iter_lines as async_iter_lines
+from advanced.file_io import BatchedWriter, LineIndex, atomic_replace, iter_lines, staged_dir, write_atomic
+from advanced.json_handling import iter_jsonl, write_jsonl
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查权限位")
+def test_new_file_uses_umask(tmp_path):
+    path = tmp_path / "new.txt"
+    write_atomic(path, "内容")
+    assert path.read_text(encoding="utf-8") == "内容"
+    assert _mode(path) == 0o666 & ~file_io._get_umask()
+
+
+@pytest.fixture
+def umask_027(monkeypatch):
+    """临时把进程 umask 改成 027，并清空 file_io 缓存的值"""
+    old = os.umask(0o027)
+    monkeypatch.setattr(file_io, "_umask", None)
+    yield
+    os.umask(old)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查权限位")
+@pytest.mark.parametrize("from_proc", [True, False])
+def test_umask_read_lazily(tmp_path, monkeypatch, umask_027, from_proc):
+    if not from_proc:
+        # 没有 /proc 的系统: 退回先设置再恢复
+        monkeypatch.setattr(file_io, "_read_proc_umask", lambda: None)
+    elif file_io._read_proc_umask() is None:
+        pytest.skip("没有 /proc/self/status")
+    write_atomic(tmp_path / "new.txt", "内容")
+    assert _mode(tmp_path / "new.txt") == 0o640
+    assert os.umask(0o027) == 0o027
+
+
+def test_import_does_not_touch_umask():
+    code = (
+        "import os\n"
+        "calls = []\n"
+        "real_umask = os.umask\n"
+        "os.umask = lambda mask: calls.append(mask) or real_umask(mask)\n"
+        "import advanced.file_io\n"
+        "assert calls == [], calls\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True, timeout=60)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查权限位")
+@pytest.mark.parametrize("fsync", [True, False])
+def test_replace_keeps_existing_mode(tmp_path, fsync):
+    path = tmp_path / "data.txt"
+    path.write_text("old", encoding="utf-8")
+    os.chmod(path, 0o640)
+    write_atomic(path, "new", fsync=fsync)
+    assert path.read_text(encoding="utf-8") == "new"
+    assert _mode(path) == 0o640
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查权限位")
+def test_write_jsonl_keeps_existing_mode(tmp_path):
+    path = tmp_path / "items.jsonl"
+    path.write_text("", encoding="utf-8")
+    os.chmod(path, 0o644)
+    assert write_jsonl(path, [{"id": 1}, {"id": 2}]) == 2
+    assert list(iter_jsonl(path)) == [{"id": 1}, {"id": 2}]
+    assert _mode(path) == 0o644
+
+
+def test_failure_keeps_original_and_removes_temp_file(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("old", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_replace(path) as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("half")
+            raise RuntimeError("中断")
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+
+@pytest.mark.parametrize("content", [
+    b"a\r\nb\rc\nd",
+    b"a\n\r\n\nb\r\r\n",
+    b"\r",
+    b"",
+    "中文\r\n行\n".encode("utf-8"),
+])
+def test_iter_lines_matches_line_index(tmp_path, content):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(content)
+
+    async def read_async():
+        return [line async for line in async_iter_lines(path)]
+
+    with LineIndex(path) as index:
+        indexed = [index[i] for i in range(len(index))]
+    assert list(iter_lines(path)) == indexed
+    assert asyncio.run(read_async()) == indexed
+    assert "".join(iter_lines(path, keepends=True)).encode("utf-8") == content
+
+
+def test_batched_writer_commits_by_size(tmp_path):
+    path = tmp_path / "events.log"
+    path.write_text("old\n", encoding="utf-8")
+    with BatchedWriter(path, max_bytes=10, max_delay=None) as writer:
+        writer.write_line("abcd")
+        assert writer.commits == 0
+        writer.writelines(["efgh", "ijkl"])
+        assert writer.commits == 1
+        writer.write("m")
+    assert writer.commits == 2
+    # 追加模式: 原有内容保留
+    assert path.read_text(encoding="utf-8") == "old\nabcd\nefgh\nijkl\nm"
+    with pytest.raises(ValueError):
+        writer.write_line("closed")
+
+
+def test_batched_writer_commits_by_delay(tmp_path):
+    path = tmp_path / "events.log"
+    with BatchedWriter(path, max_bytes=1 << 20, max_delay=0.05, fsync=True) as writer:
+        writer.write_line("first")
+        deadline = time.monotonic() + 5
+        while writer.commits == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text(encoding="utf-8") == "first\n"
+    assert writer.commits == 1
+
+
+def test_staged_dir_replaces_existing_directory(tmp_path):
+    path = tmp_path / "corpus.tok"
+    path.mkdir()
+    (path / "old.bin").write_bytes(b"old")
+    with staged_dir(path) as staging:
+        assert staging.name == ".corpus.tok.partial"
+        (staging / "new.bin").write_bytes(b"new")
+        # with 块结束之前旧目录保持不变
+        assert sorted(os.listdir(path)) == ["old.bin"]
+    assert sorted(os.listdir(path)) == ["new.bin"]
+    assert os.listdir(tmp_path) == ["corpus.tok"]
+
+
+def test_staged_dir_failure_keeps_original(tmp_path):
+    path = tmp_path / "corpus.tok"
+    with pytest.raises(RuntimeError):
+        with staged_dir(path) as staging:
+            (staging / "half.bin").write_bytes(b"half")
+            raise RuntimeError("中断")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,68 @@
+"""
+JsonCodec 在各个已安装后端上的行为一致性测试
+
+运行方式: python -m pytest -q tests/test_json_codec.py
+"""
+
+import dataclasses
+import datetime
+import json
+
+import pytest
+
+from utils.json_codec import JsonCodec, available_backends
+
+BACKENDS = available_backends()
+
+BIG_INTS = [
+    2 ** 64,
+    -(2 ** 63) - 1,
+    123456789012345678901234567890,
+    2 ** 64 - 1,
+    -(2 ** 63),
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_big_int_round_trip(backend, as_bytes):
+    codec = JsonCodec(backend)
+    data = {"ids": BIG_INTS, "nested": [{"value": BIG_INTS[0]}], "text": "大整数"}
+    encoded = codec.dumpb(data) if as_bytes else codec.dumps(data)
+    decoded = codec.loads(encoded)
+    assert decoded == data
+    assert all(type(value) is int for value in decoded["ids"])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("indent", [None, 0, 2, 4])
+def test_output_matches_stdlib(backend, indent):
+    data = {"name": "张三", "tags": ["a", "b"], "score": 1.5, "ok": True, "none": None, "empty": {}}
+    separators = (",", ":") if indent is None else None
+    expected = json.dumps(data, ensure_ascii=False, indent=indent, separators=separators)
+    assert JsonCodec(backend).dumps(data, indent) == expected
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("value", [datetime.datetime(2024, 5, 1, 12, 0), datetime.date(2024, 5, 1), Point(1, 2)])
+def test_unsupported_types_raise_like_stdlib(backend, value):
+    with pytest.raises(TypeError):
+        JsonCodec(backend).dumps({"value": value})
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decode_error_type(backend):
+    with pytest.raises(json.JSONDecodeError):
+        JsonCodec(backend).loads('{"a": ')
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_long_float_digits_are_not_big_ints(backend):
+    text = '[0.12345678901234567890, 1e-1234567890123456789, 12345678901234567890.5, -12345678901234567890]'
+    assert JsonCodec(backend).loads(text) == json.loads(text)
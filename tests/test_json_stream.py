@@ -0,0 +1,53 @@
+"""
+iter_json_array 增量解析测试
+
+运行方式: python -m pytest -q tests/test_json_stream.py
+"""
+
+import io
+import json
+
+import pytest
+
+from advanced.json_handling import _JsonStream, iter_json_array
+
+
+class CountingReader(io.StringIO):
+    """记录 read() 的调用次数"""
+
+    reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_values_split_across_chunks(tmp_path, chunk_size):
+    data = {"meta": {"n": 1}, "users": [
+        {"id": 12345, "score": -1.5e3, "name": "张三\\n", "tags": ["a", "b"]},
+        1e-7,
+        "\\u4e2d\\u6587",
+        None, True, False, 9876543210,
+    ]}
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    assert list(iter_json_array(path, key="users", chunk_size=chunk_size)) == data["users"]
+
+
+def test_malformed_value_fails_without_reading_to_eof():
+    text = "[1, {bad}, " + ", ".join(["2"] * 100_000) + "]"
+    reader = CountingReader(text)
+    stream = _JsonStream(reader, 64)
+    values = stream.iter_array()
+    assert next(values) == 1
+    with pytest.raises(ValueError, match="第 5 个字符"):
+        next(values)
+    assert reader.reads <= 2
+
+
+def test_truncated_file_reports_error(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('[1, 2, "abc', encoding="utf-8")
+    with pytest.raises(ValueError, match="JSON 格式错误"):
+        list(iter_json_array(path, chunk_size=4))
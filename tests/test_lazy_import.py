@@ -0,0 +1,40 @@
+"""
+torch / transformers 的延迟导入测试（在新的子进程中检查 sys.modules）
+
+运行方式: python -m pytest -q tests/test_lazy_import.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120, check=True,
+    ).stdout.split()
+
+
+def test_import_does_not_load_torch():
+    loaded = _run(
+        "import sys\n"
+        "import main\n"
+        "from advanced import sentiment_analysis\n"
+        "print(*[name for name in ('torch', 'transformers') if name in sys.modules])\n"
+    )
+    assert loaded == []
+
+
+def test_first_attribute_access_loads_module():
+    output = _run(
+        "import importlib.util, sys\n"
+        "if importlib.util.find_spec('torch') is None:\n"
+        "    print('skip'); sys.exit()\n"
+        "from advanced.sentiment_analysis import torch\n"
+        "before = 'torch' in sys.modules\n"
+        "torch.float16\n"
+        "print(before, 'torch' in sys.modules)\n"
+    )
+    assert output in (["skip"], ["False", "True"])
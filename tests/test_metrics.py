@@ -0,0 +1,74 @@
+"""
+utils.metrics 的开关和导出格式测试
+
+运行方式: python -m pytest -q tests/test_metrics.py
+"""
+
+import json
+import threading
+
+import pytest
+
+from utils.metrics import SIZE_BUCKETS, Metrics
+
+
+def test_disabled_records_nothing():
+    registry = Metrics(enabled=False)
+    registry.inc("requests_total", model="chinese")
+    registry.set("queue_depth", 3)
+    registry.observe("batch_size", 8, buckets=SIZE_BUCKETS)
+    with registry.span("stage_seconds", stage="forward") as span:
+        pass
+    # 关闭时 span 是共享的空对象，不分配新对象
+    assert span is registry.span("other_seconds")
+    assert registry.snapshot() == {"counters": [], "gauges": [], "histograms": []}
+    assert registry.to_prometheus() == "\n"
+
+
+@pytest.mark.parametrize("value, enabled", [("", False), ("0", False), ("false", False), ("1", True)])
+def test_enabled_from_environment(monkeypatch, value, enabled):
+    monkeypatch.setenv("PYTHON_FOR_AI_METRICS", value)
+    assert Metrics().enabled is enabled
+
+
+def test_disable_keeps_recorded_values():
+    registry = Metrics(enabled=True)
+    registry.inc("requests_total")
+    registry.disable()
+    registry.inc("requests_total")
+    assert registry.snapshot()["counters"] == [{"name": "requests_total", "labels": {}, "value": 1}]
+
+
+def test_counters_are_thread_safe():
+    registry = Metrics(enabled=True)
+
+    def work():
+        for _ in range(1000):
+            registry.inc("requests_total", model="chinese")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.snapshot()["counters"][0]["value"] == 8000
+
+
+def test_histogram_snapshot_and_prometheus():
+    registry = Metrics(enabled=True)
+    for value in (1, 3, 3, 2000):
+        registry.observe("batch_size", value, buckets=SIZE_BUCKETS, model="chinese")
+    snapshot = registry.snapshot()
+    json.dumps(snapshot)
+    histogram = snapshot["histograms"][0]
+    assert histogram["count"] == 4
+    assert histogram["max"] == 2000
+    assert histogram["buckets"]["1"] == 1
+    assert histogram["buckets"]["4"] == 2
+    assert histogram["buckets"]["+Inf"] == 1
+
+    text = registry.to_prometheus()
+    # 分桶是累计值
+    assert 'batch_size_bucket{model="chinese",le="4"} 3' in text
+    assert 'batch_size_bucket{model="chinese",le="+Inf"} 4' in text
+    assert 'batch_size_count{model="chinese"} 4' in text
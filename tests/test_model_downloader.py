@@ -0,0 +1,170 @@
+"""
+ModelDownloader 的续传、416 和校验测试（用内存中的假下载源，不需要联网）
+
+运行方式: python -m pytest -q tests/test_model_downloader.py
+"""
+
+import hashlib
+import io
+import os
+import stat
+import urllib.error
+from email.message import Message
+
+import pytest
+
+from advanced.model_downloader import (
+    MANIFEST_FILE, DownloadError, HubSource, MirrorSource, ModelDownloader,
+)
+
+FILES = {
+    "config.json": b'{"model_type": "bert"}',
+    "model.safetensors": bytes(range(256)) * 4096,
+}
+
+
+def _entry(path, data, size=True):
+    entry = {"path": path, "sha256": hashlib.sha256(data).hexdigest()}
+    if size:
+        entry["size"] = len(data)
+    return entry
+
+
+class FakeSource:
+    """内存中的下载源，记录每次 open 的偏移；served 可以替换成损坏的内容"""
+
+    def __init__(self, files, size=True):
+        self.files = dict(files)
+        self.served = dict(files)
+        self.size = size
+        self.opened = []
+
+    def list_files(self):
+        return [_entry(path, data, self.size) for path, data in self.files.items()]
+
+    def open(self, path, offset=0):
+        self.opened.append((path, offset))
+        return io.BytesIO(self.served[path][offset:])
+
+
+def test_download_commits_target_dir(tmp_path):
+    source = FakeSource(FILES)
+    target = ModelDownloader(source, tmp_path / "model").download()
+    assert {path: (target / path).read_bytes() for path in FILES} == FILES
+    assert (target / MANIFEST_FILE).exists()
+    assert not (tmp_path / ".model.partial").exists()
+
+
+def test_resume_from_partial_file(tmp_path):
+    source = FakeSource(FILES)
+    downloader = ModelDownloader(source, tmp_path / "model")
+    data = FILES["model.safetensors"]
+    downloader.partial_dir.mkdir()
+    (downloader.partial_dir / "model.safetensors").write_bytes(data[:1000])
+
+    target = downloader.download()
+    assert ("model.safetensors", 1000) in source.opened
+    assert (target / "model.safetensors").read_bytes() == data
+
+
+def test_complete_partial_file_is_not_downloaded_again(tmp_path):
+    source = FakeSource(FILES)
+    downloader = ModelDownloader(source, tmp_path / "model")
+    downloader.partial_dir.mkdir()
+    (downloader.partial_dir / "model.safetensors").write_bytes(FILES["model.safetensors"])
+    downloader.download()
+    assert [path for path, _ in source.opened] == ["config.json"]
+
+
+def test_checksum_mismatch_deletes_file(tmp_path):
+    source = FakeSource(FILES)
+    source.served["model.safetensors"] = b"\0" * len(FILES["model.safetensors"])
+    downloader = ModelDownloader(source, tmp_path / "model")
+    with pytest.raises(DownloadError, match="sha256"):
+        downloader.download()
+    assert not (downloader.partial_dir / "model.safetensors").exists()
+    assert not (tmp_path / "model").exists()
+
+    # 下载源恢复正常后重试成功
+    source.served = dict(FILES)
+    assert (downloader.download() / "model.safetensors").read_bytes() == FILES["model.safetensors"]
+
+
+def test_oversized_partial_file_restarts(tmp_path):
+    source = FakeSource(FILES)
+    downloader = ModelDownloader(source, tmp_path / "model")
+    downloader.partial_dir.mkdir()
+    (downloader.partial_dir / "config.json").write_bytes(FILES["config.json"] + b"garbage")
+    downloader.download()
+    assert ("config.json", 0) in source.opened
+
+
+class RangeHubSource(HubSource):
+    """不联网的 HubSource: 按 Range 请求头返回数据，超出文件大小时像服务器一样返回 416"""
+
+    def __init__(self, data):
+        super().__init__("owner/model", endpoint="http://hub.invalid")
+        self.data = data
+
+    def _request(self, url, headers=None):
+        offset = int(headers["Range"][len("bytes="):-1]) if headers else 0
+        if offset >= len(self.data):
+            message = Message()
+            message["Content-Range"] = f"bytes */{len(self.data)}"
+            raise urllib.error.HTTPError(url, 416, "Range Not Satisfiable", message, io.BytesIO())
+        response = io.BytesIO(self.data[offset:])
+        response.status = 206 if offset else 200
+        return response
+
+
+@pytest.mark.parametrize("local, expect_resumed", [(FILES["config.json"], True), (b"x" * 30, False)])
+def test_hub_416_on_complete_file(tmp_path, local, expect_resumed):
+    data = FILES["config.json"]
+    source = RangeHubSource(data)
+    downloader = ModelDownloader(source, tmp_path / "model")
+    downloader.partial_dir.mkdir()
+    path = downloader.partial_dir / "config.json"
+    path.write_bytes(local)
+
+    # 清单中没有大小时，下载器只能发出 Range 请求，由 416 得知文件已经完整
+    entry = _entry("config.json", data, size=False)
+    _, resumed_from = downloader._download_file(entry)
+    assert path.read_bytes() == data
+    # 本地文件比服务器上的大: 416 的总大小对不上，从头重新下载
+    assert (resumed_from == len(data)) is expect_resumed
+
+
+def test_hub_416_with_corrupt_complete_file(tmp_path):
+    data = FILES["config.json"]
+    downloader = ModelDownloader(RangeHubSource(data), tmp_path / "model")
+    downloader.partial_dir.mkdir()
+    path = downloader.partial_dir / "config.json"
+    path.write_bytes(b"x" * len(data))
+    with pytest.raises(DownloadError, match="sha256"):
+        downloader._download_file(_entry("config.json", data, size=False))
+    assert not path.exists()
+
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() == 0, reason="需要非 root 的 POSIX 用户才能测试只读目录")
+def test_mirror_without_manifest_is_not_written(tmp_path):
+    mirror = tmp_path / "mirror" / "owner" / "model"
+    mirror.mkdir(parents=True)
+    for path, data in FILES.items():
+        (mirror / path).write_bytes(data)
+    mirror.chmod(stat.S_IRUSR | stat.S_IXUSR)
+    try:
+        target = ModelDownloader(MirrorSource(tmp_path / "mirror", "owner/model"), tmp_path / "model").download()
+    finally:
+        mirror.chmod(stat.S_IRWXU)
+    assert not (mirror / MANIFEST_FILE).exists()
+    assert (target / "model.safetensors").read_bytes() == FILES["model.safetensors"]
+
+
+def test_mirror_manifest_is_computed_in_memory(tmp_path):
+    mirror = tmp_path / "mirror" / "owner" / "model"
+    mirror.mkdir(parents=True)
+    for path, data in FILES.items():
+        (mirror / path).write_bytes(data)
+    entries = MirrorSource(tmp_path / "mirror", "owner/model").list_files()
+    assert sorted(entry["path"] for entry in entries) == sorted(FILES)
+    assert not (mirror / MANIFEST_FILE).exists()
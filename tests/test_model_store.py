@@ -0,0 +1,90 @@
+"""
+ModelStore 的版本切换和清理测试（只操作临时目录，不需要模型文件）
+
+运行方式: python -m pytest -q tests/test_model_store.py
+"""
+
+import os
+import time
+
+import pytest
+
+from advanced.model_store import ModelStore, _replace_link
+
+
+def _make_revision(store, model_key, name):
+    path = store.revision_path(model_key, name)
+    path.mkdir(parents=True)
+    (path / "config.json").write_text("{}", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(root=tmp_path / "models", keep_revisions=2)
+
+
+def test_replace_link_switches_atomically(tmp_path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    old.mkdir()
+    new.mkdir()
+    link = tmp_path / "current"
+    _replace_link(link, old)
+    assert os.path.realpath(link) == str(old.resolve())
+    _replace_link(link, new)
+    assert os.path.realpath(link) == str(new.resolve())
+    # 使用相对路径，没有留下临时链接
+    assert not os.path.isabs(os.readlink(link))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["current", "new", "old"]
+
+
+def test_activate_requires_complete_revision(store):
+    store.revision_path("chinese", "broken").mkdir(parents=True)
+    with pytest.raises(FileNotFoundError):
+        store.activate("chinese", "broken")
+    assert store.current_revision("chinese") is None
+
+
+def test_activate_removes_least_recently_used(store, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    for name in ("r1", "r2", "r3"):
+        _make_revision(store, "chinese", name)
+        store.revision_path("chinese", f"{name}-int8").mkdir()
+    assert store.activate("chinese", "r1") == ["r2"]    # 都没启用过时按版本名保留最新的 r3
+    _make_revision(store, "chinese", "r2")
+    assert store.activate("chinese", "r2") == ["r3"]    # 从未启用的版本先删
+    _make_revision(store, "chinese", "r3")
+    assert store.activate("chinese", "r3") == ["r1"]    # r1 最久未使用
+    assert store.current_revision("chinese") == "r3"
+    assert [name for name, _ in store.list_revisions("chinese")] == ["r3", "r2"]
+    # 变体目录和版本一起删除
+    assert not store.revision_path("chinese", "r1-int8").exists()
+
+
+def test_gc_never_removes_current(store):
+    for name in ("a", "b"):
+        _make_revision(store, "chinese", name)
+    store.activate("chinese", "b")
+    store.activate("chinese", "a")
+    assert store.gc("chinese", keep=1) == ["b"]
+    assert store.current_revision("chinese") == "a"
+    assert [name for name, _ in store.list_revisions("chinese")] == ["a"]
+
+
+def test_list_revisions_skips_variants_and_staging(store):
+    _make_revision(store, "chinese", "r1")
+    store.revision_path("chinese", "r1-onnx").mkdir()
+    store.revision_path("chinese", ".r2.partial").mkdir()
+    assert [name for name, _ in store.list_revisions("chinese")] == ["r1"]
+
+
+def test_import_directory(store, tmp_path):
+    source = tmp_path / "legacy"
+    source.mkdir()
+    (source / "config.json").write_text("{}", encoding="utf-8")
+    revision = store.import_directory("chinese", source, revision="imported")
+    assert revision == "imported"
+    assert store.current_revision("chinese") == "imported"
+    assert (store.current_path("chinese") / "config.json").exists()
+    assert store.model_keys() == ["chinese"]
@@ -0,0 +1,115 @@
+"""
+safetensors 转换和只读 mmap 加载的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_model_weights.py
+"""
+
+import json
+import struct
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from advanced import model_weights, sentiment_analysis  # noqa: E402
+from advanced.model_downloader import MANIFEST_FILE, write_manifest  # noqa: E402
+from advanced.model_store import ModelStore  # noqa: E402
+from advanced.sentiment_analysis import MODEL_CONFIGS  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-weights-test"
+
+
+@pytest.fixture(scope="module")
+def tiny_dir(tmp_path_factory):
+    return create_tiny_model(tmp_path_factory.mktemp("tiny"))
+
+
+def _bin_model(tiny_dir, path):
+    """把微型模型另存为旧的 pytorch_model.bin 格式"""
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(str(tiny_dir))
+    model.save_pretrained(str(path), safe_serialization=False)
+    transformers.AutoTokenizer.from_pretrained(str(tiny_dir)).save_pretrained(str(path))
+    return path
+
+
+def _logits(model, tiny_dir):
+    tokenizer = transformers.AutoTokenizer.from_pretrained(str(tiny_dir))
+    inputs = tokenizer(["这个餐厅很好", "快递太慢了"], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        return model(**inputs).logits
+
+
+def test_mmap_model_matches_from_pretrained(tiny_dir):
+    expected = transformers.AutoModelForSequenceClassification.from_pretrained(str(tiny_dir)).eval()
+    model = model_weights.load_mmap_model(tiny_dir)
+    assert model is not None and not model.training
+    assert torch.allclose(_logits(model, tiny_dir), _logits(expected, tiny_dir))
+
+
+def test_mmap_without_safetensors_returns_none(tiny_dir, tmp_path):
+    path = _bin_model(tiny_dir, tmp_path / "bin")
+    assert model_weights.safetensors_files(path) == []
+    assert model_weights.load_mmap_model(path) is None
+
+
+def test_unknown_dtype_falls_back(tiny_dir, tmp_path):
+    # 把第一个参数的类型改成不支持的名称，重新写出头部
+    data = (tiny_dir / model_weights.SAFETENSORS_FILE).read_bytes()
+    header_size = struct.unpack("<Q", data[:8])[0]
+    header = json.loads(data[8:8 + header_size])
+    name = next(key for key in header if key != "__metadata__")
+    header[name]["dtype"] = "F8_E4M3"
+    new_header = json.dumps(header).encode("utf-8")
+    new_header += b" " * (-len(new_header) % 8)
+
+    path = tmp_path / "model"
+    path.mkdir()
+    (path / "config.json").write_bytes((tiny_dir / "config.json").read_bytes())
+    (path / model_weights.SAFETENSORS_FILE).write_bytes(
+        struct.pack("<Q", len(new_header)) + new_header + data[8 + header_size:])
+    with pytest.warns(UserWarning, match="F8_E4M3"):
+        assert model_weights.load_mmap_model(path) is None
+
+
+def test_convert_to_safetensors_rewrites_manifest(tiny_dir, tmp_path):
+    path = _bin_model(tiny_dir, tmp_path / "bin")
+    write_manifest(path)
+    assert model_weights.convert_to_safetensors(path)
+
+    assert not list(path.glob("pytorch_model*.bin"))
+    assert model_weights.safetensors_files(path) == [path / model_weights.SAFETENSORS_FILE]
+    manifest = json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    assert model_weights.SAFETENSORS_FILE in json.dumps(manifest)
+    assert "pytorch_model.bin" not in json.dumps(manifest)
+    # 已经是 safetensors 时跳过
+    assert not model_weights.convert_to_safetensors(path)
+
+
+def test_convert_model_creates_new_revision(tiny_dir, tmp_path, monkeypatch):
+    store = ModelStore(root=tmp_path / "models", keep_revisions=3)
+    store.import_directory(MODEL_KEY, _bin_model(tiny_dir, tmp_path / "bin"), revision="r1")
+    monkeypatch.setattr(sentiment_analysis, "model_store", store)
+    monkeypatch.setitem(MODEL_CONFIGS, MODEL_KEY, {
+        "name": MODEL_KEY,
+        "local_path": store.current_path(MODEL_KEY),
+        "display_name": "权重转换测试用微型模型",
+    })
+
+    revision = model_weights.convert_model(MODEL_KEY)
+    assert revision and store.current_revision(MODEL_KEY) == revision
+    assert model_weights.safetensors_files(store.current_path(MODEL_KEY))
+    # 原来的版本保持不变
+    assert (store.revision_path(MODEL_KEY, "r1") / "pytorch_model.bin").exists()
+    assert not model_weights.safetensors_files(store.revision_path(MODEL_KEY, "r1"))
+    # 再次转换时不需要做任何事
+    assert model_weights.convert_model(MODEL_KEY) is None
+
+
+def test_memory_report_counts_pages():
+    report = model_weights.memory_report()
+    if report is None:
+        pytest.skip("需要 /proc/<pid>/smaps")
+    assert report["rss"] > 0
+    assert report["private"] + report["shared"] <= report["rss"] + 4
@@ -0,0 +1,26 @@
+"""
+直接运行 advanced/sentiment_analysis.py（README 中的运行方式）的测试
+
+运行方式: python -m pytest -q tests/test_sentiment_analysis_script.py
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "advanced" / "sentiment_analysis.py"
+
+
+def test_run_script_from_other_directory(tmp_path):
+    env = dict(os.environ, SENTIMENT_MODEL_STORE=str(tmp_path / "models"))
+    # 不依赖 PYTHONPATH 或当前目录找到仓库中的包
+    env.pop("PYTHONPATH", None)
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), "score", "--help"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
+    # 只打印帮助，不会创建模型仓库目录
+    assert not (tmp_path / "models").exists()
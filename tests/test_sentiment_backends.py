@@ -0,0 +1,68 @@
+"""
+int8 / onnx 变体导出的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_sentiment_backends.py
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced import sentiment_backends  # noqa: E402
+from advanced.model_store import ModelStore  # noqa: E402
+from advanced.sentiment_analysis import MODEL_CONFIGS  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-export-test"
+
+
+def _fail(*args, **kwargs):
+    raise OSError("磁盘已满")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """临时模型仓库，当前版本 r1 是微型模型"""
+    store = ModelStore(root=tmp_path / "models", keep_revisions=3)
+    store.import_directory(MODEL_KEY, create_tiny_model(tmp_path / "tiny"), revision="r1")
+    monkeypatch.setitem(MODEL_CONFIGS, MODEL_KEY, {
+        "name": MODEL_KEY,
+        "local_path": store.current_path(MODEL_KEY),
+        "display_name": "导出测试用微型模型",
+    })
+    return store
+
+
+def test_export_int8_creates_variant(store):
+    output_dir = sentiment_backends.export_int8(MODEL_KEY)
+    assert output_dir == store.revision_path(MODEL_KEY, "r1-int8")
+    assert (output_dir / sentiment_backends.QUANTIZED_WEIGHTS).exists()
+    assert (output_dir / "config.json").exists()
+    model, _ = sentiment_backends.load_backend_model(MODEL_KEY, "int8")
+    assert model is not None
+
+
+def test_failed_export_leaves_no_variant(store, monkeypatch):
+    # 分词器和配置已经写出，权重写到一半失败
+    monkeypatch.setattr(torch, "save", _fail)
+    with pytest.raises(OSError):
+        sentiment_backends.export_int8(MODEL_KEY)
+    revisions = store.model_dir(MODEL_KEY) / "revisions"
+    assert sorted(path.name for path in revisions.iterdir()) == ["r1"]
+
+
+def test_export_variants_retries_after_failure(store, monkeypatch):
+    sentiment_backends.export_int8(MODEL_KEY)
+    store.import_directory(MODEL_KEY, store.revision_path(MODEL_KEY, "r1"), revision="r2", activate=False)
+    r2 = store.revision_path(MODEL_KEY, "r2")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(sentiment_backends, "_quantize", _fail)
+        with pytest.raises(OSError):
+            sentiment_backends.export_variants(MODEL_KEY, r2)
+    assert not store.revision_path(MODEL_KEY, "r2-int8").exists()
+
+    # 失败后不会被当成已导出而跳过
+    assert sentiment_backends.export_variants(MODEL_KEY, r2) == ["int8"]
+    assert (store.revision_path(MODEL_KEY, "r2-int8") / sentiment_backends.QUANTIZED_WEIGHTS).exists()
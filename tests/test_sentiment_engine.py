@@ -0,0 +1,91 @@
+"""
+批量推理引擎的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_sentiment_engine.py
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced.sentiment_analysis import MODEL_CONFIGS  # noqa: E402
+from advanced.sentiment_engine import SentimentEngine  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-engine-test"
+TEXTS = ["好", "这个餐厅的菜品非常美味，环境也很优雅。", "快递太慢了。", "客服回复很快，问题解决得很及时。" * 3]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tiny_model(tmp_path_factory):
+    MODEL_CONFIGS[MODEL_KEY] = {
+        "name": MODEL_KEY,
+        "local_path": create_tiny_model(tmp_path_factory.mktemp("tiny")),
+        "display_name": "引擎测试用微型模型",
+    }
+    yield
+    del MODEL_CONFIGS[MODEL_KEY]
+
+
+def _scores(results):
+    return [(result["label"], round(result["score"], 5)) for result in results]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 32])
+def test_batching_keeps_input_order(batch_size):
+    engine = SentimentEngine(MODEL_KEY)
+    one_by_one = [engine.classify([text])[0] for text in TEXTS]
+    assert _scores(engine.classify(TEXTS, batch_size=batch_size)) == _scores(one_by_one)
+
+
+def test_string_and_empty_input():
+    engine = SentimentEngine(MODEL_KEY)
+    assert _scores(engine.classify(TEXTS[1])) == _scores(engine.classify([TEXTS[1]]))
+    assert engine.classify([]) == []
+    assert len(engine.classify_batch([])) == 0
+
+
+def test_classify_batch_matches_classify():
+    engine = SentimentEngine(MODEL_KEY)
+    batch = engine.classify_batch(TEXTS, batch_size=2)
+    assert _scores(batch.to_dicts()) == _scores(engine.classify(TEXTS))
+
+
+def test_truncates_to_max_length():
+    engine = SentimentEngine(MODEL_KEY, max_length=16)
+    assert max(len(ids) for ids in engine.tokenize(["很" * 100])) == 16
+
+
+def test_long_text_windows():
+    engine = SentimentEngine(MODEL_KEY, max_length=16, long_text="mean")
+    window, step = engine.window_size()
+    assert (window, step) == (14, 11)    # 16 - [CLS] [SEP]，默认重叠 1/4
+    windows, owners, lengths = engine.split_windows(["短", "很" * 40])
+    assert owners == [0, 1, 1, 1, 1]
+    assert lengths == [1, 14, 14, 14, 7]
+    assert max(len(ids) for ids in windows) == 16
+
+    results = engine.classify(["短", "很" * 40])
+    assert [result["windows"] for result in results] == [1, 4]
+    # 不超过窗口长度的文本与普通模式结果相同
+    plain = SentimentEngine(MODEL_KEY, max_length=16)
+    assert _scores([results[0]]) == _scores(plain.classify(["短"]))
+
+
+@pytest.mark.parametrize("aggregate", ["mean", "max", "weighted"])
+def test_long_text_probabilities_normalized(aggregate):
+    engine = SentimentEngine(MODEL_KEY, max_length=16)
+    probs, counts = engine.predict_proba_long(["很" * 40, "好"], aggregate=aggregate)
+    assert counts.tolist() == [4, 1]
+    assert probs.sum(dim=-1).tolist() == pytest.approx([1.0, 1.0])
+
+
+def test_long_text_rejects_bad_options():
+    engine = SentimentEngine(MODEL_KEY, max_length=16)
+    with pytest.raises(ValueError):
+        engine.window_size(overlap=14)
+    with pytest.raises(ValueError):
+        engine.classify_long(["好"], aggregate="median")
+    with pytest.raises(ValueError):
+        SentimentEngine(MODEL_KEY, long_text="median")
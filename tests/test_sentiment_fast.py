@@ -0,0 +1,75 @@
+"""
+FastSentimentClassifier 的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_sentiment_fast.py
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced.sentiment_analysis import MODEL_CONFIGS, classifier_cache  # noqa: E402
+from advanced.sentiment_engine import SentimentEngine  # noqa: E402
+from advanced.sentiment_fast import FastSentimentClassifier  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-fast-test"
+TEXTS = ["好", "这个餐厅的菜品非常美味，环境也很优雅。", "快递太慢了。", "客服回复很快，问题解决得很及时。" * 3]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tiny_model(tmp_path_factory):
+    MODEL_CONFIGS[MODEL_KEY] = {
+        "name": MODEL_KEY,
+        "local_path": create_tiny_model(tmp_path_factory.mktemp("tiny")),
+        "display_name": "精简分类器测试用微型模型",
+    }
+    yield
+    del MODEL_CONFIGS[MODEL_KEY]
+
+
+def _scores(results):
+    return [(result["label"], round(result["score"], 5)) for result in results]
+
+
+def test_matches_engine():
+    fast = FastSentimentClassifier(MODEL_KEY, max_length=128)
+    engine = SentimentEngine(MODEL_KEY, max_length=128)
+    assert _scores(fast.classify(TEXTS, batch_size=3)) == _scores(engine.classify(TEXTS))
+
+
+def test_buffers_do_not_leak_between_calls():
+    fast = FastSentimentClassifier(MODEL_KEY, max_batch_size=4)
+    expected = fast.predict(TEXTS[:1])
+    # 更长、更多的批次写满缓冲区后，短批次的结果不受影响
+    fast.predict(TEXTS)
+    assert fast.predict(TEXTS[:1]) == expected
+    label_id, score = fast.predict_one(TEXTS[0])
+    assert ([label_id], [score]) == expected
+
+
+def test_empty_and_oversized_input():
+    fast = FastSentimentClassifier(MODEL_KEY, max_batch_size=2)
+    assert fast.predict([]) == ([], [])
+    assert fast.classify([]) == []
+    with pytest.raises(ValueError):
+        fast.predict(TEXTS)
+    # classify 自动按 max_batch_size 分批
+    assert len(fast.classify(TEXTS, batch_size=10)) == len(TEXTS)
+
+
+def test_truncates_to_max_length():
+    fast = FastSentimentClassifier(MODEL_KEY, max_length=16)
+    assert max(len(ids) for ids in fast._encode(fast._binding, ["很" * 100, "好"])) == 16
+    label_id, score = fast.predict_one("很" * 100)
+    assert 0 <= label_id < 2 and 0 < score <= 1
+
+
+def test_rebinds_after_reload():
+    fast = FastSentimentClassifier(MODEL_KEY)
+    expected = fast.predict(TEXTS)
+    old_model = fast._binding.model
+    classifier_cache.reload(MODEL_KEY)
+    assert fast.predict(TEXTS)[0] == expected[0]
+    assert fast._binding.model is not old_model
@@ -0,0 +1,59 @@
+"""
+多进程情感分析的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+进程池用 spawn 启动，每个工作进程都要导入 torch，这里只开两个进程并共用一个进程池。
+
+运行方式: python -m pytest -q tests/test_sentiment_parallel.py
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced.sentiment_analysis import MODEL_CONFIGS  # noqa: E402
+from advanced.sentiment_engine import SentimentEngine  # noqa: E402
+from advanced.sentiment_parallel import ParallelSentimentScorer  # noqa: E402
+from advanced.sentiment_result_cache import model_revision  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-parallel-test"
+TEXTS = [f"第 {i} 条评论，{'很好' if i % 2 else '很差'}" for i in range(7)]
+
+
+@pytest.fixture(scope="module")
+def scorer(tmp_path_factory):
+    MODEL_CONFIGS[MODEL_KEY] = {
+        "name": MODEL_KEY,
+        "local_path": create_tiny_model(tmp_path_factory.mktemp("tiny")),
+        "display_name": "多进程测试用微型模型",
+    }
+    with ParallelSentimentScorer(MODEL_KEY, workers=2, threads_per_worker=1, shard_size=2) as scorer:
+        yield scorer
+    del MODEL_CONFIGS[MODEL_KEY]
+
+
+def _scores(results):
+    return [(result["label"], round(result["score"], 5)) for result in results]
+
+
+def test_warmup_starts_every_worker(scorer):
+    pids = scorer.warmup(timeout=120)
+    assert len(pids) == 2
+
+
+def test_matches_single_process_order(scorer):
+    expected = SentimentEngine(MODEL_KEY).classify(TEXTS)
+    # 7 条文本切成 4 个分片，结果按输入顺序合并
+    assert _scores(scorer.classify(TEXTS, batch_size=3)) == _scores(expected)
+
+
+def test_string_and_empty_input(scorer):
+    assert len(scorer.classify(TEXTS[0])) == 1
+    assert scorer.classify([]) == []
+
+
+def test_revisions_come_from_workers(scorer):
+    results, revisions = scorer.classify_with_revisions(TEXTS)
+    assert len(revisions) == len(results) == len(TEXTS)
+    assert set(revisions) == {model_revision(MODEL_KEY)}
@@ -0,0 +1,55 @@
+"""
+标签映射和列式结果后处理的测试
+
+运行方式: python -m pytest -q tests/test_sentiment_postprocess.py
+"""
+
+import pytest
+
+from advanced.sentiment_postprocess import LabelMap, SentimentBatch, display_label, softmax
+
+torch = pytest.importorskip("torch")
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("POSITIVE", "正面"),
+    ("negative (stars 1, 2 and 3)", "负面"),
+    ("Neutral", "中性"),
+    ("LABEL_0", "LABEL_0"),
+    ("体育", "体育"),
+    ("positivity", "positivity"),
+])
+def test_display_label(label, expected):
+    assert display_label(label) == expected
+
+
+def test_label_map_accepts_string_keys():
+    label_map = LabelMap({"1": "POSITIVE", "0": "NEGATIVE"})
+    assert label_map.labels == ("NEGATIVE", "POSITIVE")
+    assert label_map.display_names == ("负面", "正面")
+    assert len(label_map) == 2
+
+
+def test_batch_matches_pipeline_format():
+    label_map = LabelMap({0: "NEGATIVE", 1: "POSITIVE", 2: "neutral"})
+    logits = torch.tensor([[0.0, 2.0, 1.0], [3.0, 0.0, 0.0]], dtype=torch.float16)
+    batch = SentimentBatch(softmax(logits), label_map)
+
+    assert len(batch) == 2
+    assert batch.labels == ["POSITIVE", "NEGATIVE"]
+    assert batch.display_labels == ["正面", "负面"]
+    top1 = batch.to_dicts()
+    assert [row["label"] for row in top1] == ["POSITIVE", "NEGATIVE"]
+    assert top1[0]["score"] == pytest.approx(batch.scores[0].max())
+    assert batch.scores.sum(axis=-1) == pytest.approx([1.0, 1.0])
+
+    ranked = batch.to_dicts(top_k=None)
+    assert [item["label"] for item in ranked[0]] == ["POSITIVE", "neutral", "NEGATIVE"]
+    assert [len(row) for row in batch.to_dicts(top_k=2)] == [2, 2]
+
+
+def test_empty_batch():
+    batch = SentimentBatch(softmax(torch.empty((0, 2))), LabelMap({0: "NEGATIVE", 1: "POSITIVE"}))
+    assert len(batch) == 0
+    assert batch.to_dicts() == []
+    assert batch.to_dicts(top_k=None) == []
@@ -0,0 +1,62 @@
+"""
+模型预加载与就绪探针的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_sentiment_preload.py
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced.sentiment_analysis import MODEL_CONFIGS  # noqa: E402
+from advanced.sentiment_preload import ModelPreloader  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-preload-test"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tiny_model(tmp_path_factory):
+    MODEL_CONFIGS[MODEL_KEY] = {
+        "name": MODEL_KEY,
+        # 最大长度 64，检查超长的预热长度会被截断
+        "local_path": create_tiny_model(tmp_path_factory.mktemp("tiny"), max_length=64),
+        "display_name": "预加载测试用微型模型",
+    }
+    yield
+    del MODEL_CONFIGS[MODEL_KEY]
+
+
+def test_run_writes_ready_file(tmp_path):
+    ready_file = tmp_path / "ready"
+    preloader = ModelPreloader([MODEL_KEY], seq_lengths=(8, 256), batch_size=2, ready_file=ready_file)
+    assert not preloader.is_ready()
+
+    report = preloader.run()
+    assert preloader.is_ready()
+    entry = report[MODEL_KEY]
+    assert sorted(entry["warmup_by_seq_len"]) == [8, 64]
+    assert entry["total_seconds"] >= entry["load_seconds"]
+    assert sorted(json.loads(ready_file.read_text(encoding="utf-8"))) == [MODEL_KEY]
+    assert not (tmp_path / "ready.tmp").exists()
+
+
+def test_failed_model_is_not_ready(tmp_path):
+    ready_file = tmp_path / "ready"
+    ready_file.write_text("{}", encoding="utf-8")
+    preloader = ModelPreloader([MODEL_KEY, "no-such-model"], seq_lengths=(8,), ready_file=ready_file)
+
+    report = preloader.run()
+    assert not preloader.is_ready()
+    assert "KeyError" in report["no-such-model"]["error"]
+    assert "error" not in report[MODEL_KEY]
+    # 上一次的就绪文件被删除
+    assert not ready_file.exists()
+
+
+def test_start_and_wait():
+    preloader = ModelPreloader([MODEL_KEY], seq_lengths=(8,)).start()
+    assert preloader.wait(timeout=120)
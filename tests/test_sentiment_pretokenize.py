@@ -0,0 +1,65 @@
+"""
+预分词语料打分的测试（用 benchmarks.tiny_model 的微型模型，不需要联网）
+
+运行方式: python -m pytest -q tests/test_sentiment_pretokenize.py
+"""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from advanced.sentiment_analysis import MODEL_CONFIGS, classifier_cache  # noqa: E402
+from advanced.sentiment_engine import SentimentEngine  # noqa: E402
+from advanced.sentiment_pretokenize import TokenizedCorpus, pretokenize  # noqa: E402
+from benchmarks.tiny_model import create_tiny_model  # noqa: E402
+
+MODEL_KEY = "tiny-pretokenize-test"
+TEXTS = ["这个餐厅的菜品非常美味。", "快递太慢了。", "客服回复很快。", "产品质量一般，性价比不高。"] * 5
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    """两个分词器相同、权重不同的微型模型，当前使用第一个"""
+    first = create_tiny_model(tmp_path / "first", seed=0)
+    second = create_tiny_model(tmp_path / "second", seed=1)
+    monkeypatch.setitem(MODEL_CONFIGS, MODEL_KEY, {
+        "name": MODEL_KEY, "local_path": first, "display_name": "预分词测试用微型模型",
+    })
+    return first, second
+
+
+def _scores(results):
+    return [round(result["score"], 5) for result in results]
+
+
+def test_pretokenized_matches_classify(models, tmp_path):
+    engine = SentimentEngine(MODEL_KEY)
+    pretokenize(TEXTS, tmp_path / "corpus.tok", engine)
+    corpus = TokenizedCorpus(tmp_path / "corpus.tok")
+    results = [result for chunk in engine.classify_pretokenized(corpus, chunk_size=3) for result in chunk]
+    assert _scores(results) == _scores(engine.classify(TEXTS))
+
+
+def test_reload_during_iteration_keeps_model(models, tmp_path):
+    _, second = models
+    engine = SentimentEngine(MODEL_KEY)
+    old_scores = _scores(engine.classify(TEXTS))
+    pretokenize(TEXTS, tmp_path / "corpus.tok", engine)
+    corpus = TokenizedCorpus(tmp_path / "corpus.tok")
+
+    chunks = engine.classify_pretokenized(corpus, chunk_size=4)
+    results = list(next(chunks))
+    # 迭代到一半时热替换成另一个模型
+    MODEL_CONFIGS[MODEL_KEY]["local_path"] = second
+    assert classifier_cache.reload(MODEL_KEY) == 1
+    # 其他调用已经切换到新模型
+    new_scores = _scores(engine.classify(TEXTS))
+    assert new_scores != old_scores
+    for chunk in chunks:
+        results.extend(chunk)
+    assert _scores(results) == old_scores
+
+    # 下一次迭代使用新模型
+    results = [result for chunk in engine.classify_pretokenized(corpus, chunk_size=4) for result in chunk]
+    assert _scores(results) == new_scores
@@ -0,0 +1,92 @@
+"""
+ModelReloader 的测试（用假缓存代替 classifier_cache，不需要 torch）
+
+运行方式: python -m pytest -q tests/test_sentiment_reload.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from advanced.sentiment_reload import ModelReloader
+
+
+class FakeCache:
+    """记录 reload 调用；release 之前 reload 一直阻塞"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def reload(self, model_key):
+        self.release.wait(10)
+        self.calls.append(model_key)
+        if self.fail:
+            raise OSError("模型文件损坏")
+        return 1
+
+
+@pytest.fixture
+def fingerprints(monkeypatch):
+    """可以在测试中修改的版本指纹"""
+    revisions = {"chinese": "r1", "english": "r1"}
+    monkeypatch.setattr(ModelReloader, "_fingerprint", lambda self, model_key: revisions[model_key])
+    return revisions
+
+
+def test_check_reloads_changed_models(fingerprints):
+    cache = FakeCache()
+    reloader = ModelReloader(["chinese", "english"], cache=cache)
+    # 第一次只记录初始指纹
+    assert reloader.check() == []
+
+    fingerprints["english"] = "r2"
+    assert reloader.check() == ["english"]
+    assert reloader.check() == []
+    reloader.stop()
+    assert cache.calls == ["english"]
+    assert reloader.history[0]["status"] == "ok"
+    assert reloader.history[0]["entries"] == 1
+
+
+def test_pending_reload_is_not_repeated(fingerprints):
+    cache = FakeCache()
+    cache.release.clear()
+    reloader = ModelReloader(["chinese"], cache=cache)
+    first = reloader.reload("chinese")
+    assert reloader.reload("chinese") is first
+
+    cache.release.set()
+    first.result(timeout=10)
+    # 上一次完成后可以再次提交
+    second = reloader.reload("chinese")
+    assert second is not first
+    second.result(timeout=10)
+    reloader.stop()
+    assert cache.calls == ["chinese", "chinese"]
+
+
+def test_failed_reload_is_recorded(fingerprints):
+    reloader = ModelReloader(["chinese"], cache=FakeCache(fail=True))
+    record = reloader.reload("chinese").result(timeout=10)
+    reloader.stop()
+    assert record["status"].startswith("error: OSError")
+    assert "entries" not in record
+
+
+def test_watcher_picks_up_changes(fingerprints):
+    cache = FakeCache()
+    with ModelReloader(["chinese"], interval=0.01, cache=cache) as reloader:
+        fingerprints["chinese"] = "r2"
+        future = None
+        for _ in range(500):
+            future = reloader._pending.get("chinese")
+            if future is not None:
+                break
+            time.sleep(0.01)
+        assert future is not None
+        future.result(timeout=10)
+    assert cache.calls == ["chinese"]
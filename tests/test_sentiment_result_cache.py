@@ -0,0 +1,115 @@
+"""
+CachedSentimentClassifier 的测试（用假引擎代替模型，不需要 torch）
+
+运行方式: python -m pytest -q tests/test_sentiment_result_cache.py
+"""
+
+import pytest
+
+from advanced.sentiment_analysis import MODEL_CONFIGS
+from advanced.sentiment_result_cache import (
+    CachedSentimentClassifier, PredictionCache, cache_key, model_revision,
+)
+
+MODEL_KEY = "fake-result-cache-test"
+
+
+class FakeEngine:
+    """按文本长度给出结果，记录计算过的文本"""
+
+    backend = "pytorch"
+    max_length = 512
+    long_text = None
+
+    def __init__(self):
+        self.calls = []
+
+    def classify(self, texts, batch_size=32):
+        self.calls.extend(texts)
+        return [{"label": "positive", "score": len(text) / 100} for text in texts]
+
+
+class FakeParallelEngine(FakeEngine):
+    """模拟还在运行旧版本模型的工作进程"""
+
+    def __init__(self, revision):
+        super().__init__()
+        self.revision = revision
+
+    def classify_with_revisions(self, texts, batch_size=32):
+        return self.classify(texts, batch_size), [self.revision] * len(texts)
+
+
+@pytest.fixture(autouse=True)
+def model_dir(tmp_path, monkeypatch):
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setitem(MODEL_CONFIGS, MODEL_KEY, {
+        "name": MODEL_KEY, "local_path": model_dir, "display_name": "结果缓存测试用假模型",
+    })
+    return model_dir
+
+
+def test_duplicates_computed_once():
+    engine = FakeEngine()
+    classifier = CachedSentimentClassifier(MODEL_KEY, engine=engine)
+    results = classifier.classify(["好评", " 好评 ", "差评", "好评"])
+    assert engine.calls == ["好评", "差评"]
+    assert results[0] == results[1] == results[3]
+    classifier.classify(["差评"])
+    assert engine.calls == ["好评", "差评"]
+
+
+def test_mutating_results_does_not_change_cache():
+    classifier = CachedSentimentClassifier(MODEL_KEY, engine=FakeEngine())
+    first = classifier.classify(["好评", "好评"])
+    # 如 SentimentRouter 会给结果加上 "model" 字段
+    first[0]["model"] = "chinese"
+    first[1]["score"] = -1
+    second = classifier.classify(["好评"])
+    second[0]["label"] = "negative"
+    assert classifier.classify(["好评"]) == [{"label": "positive", "score": 0.02}]
+
+
+def test_results_stored_under_worker_revision(tmp_path):
+    cache = PredictionCache(tmp_path / "cache.sqlite")
+    engine = FakeParallelEngine(revision="old-revision")
+    classifier = CachedSentimentClassifier(MODEL_KEY, cache=cache, engine=engine)
+    current = model_revision(MODEL_KEY)
+    assert classifier.classify(["好评"]) == [{"label": "positive", "score": 0.02}]
+
+    options = classifier.key_options()
+    assert cache.get_many([cache_key("好评", MODEL_KEY, current, 1, options)]) == {}
+    stale_key = cache_key("好评", MODEL_KEY, "old-revision", 1, options)
+    assert cache.get_many([stale_key]) == {stale_key: {"label": "positive", "score": 0.02}}
+    # 当前版本的结果还没有算过，下次仍然重新计算
+    classifier.classify(["好评"])
+    assert engine.calls == ["好评", "好评"]
+
+    # 工作进程换上当前版本后正常命中
+    engine.revision = current
+    classifier.classify(["好评"])
+    classifier.classify(["好评"])
+    assert engine.calls == ["好评"] * 3
+    cache.close()
+
+
+def test_long_text_results_not_shared_with_truncated():
+    class LongTextEngine(FakeEngine):
+        long_text = "mean"
+
+        def window_size(self):
+            return 14, 11
+
+    cache = PredictionCache()
+    truncated = CachedSentimentClassifier(MODEL_KEY, cache=cache, engine=FakeEngine())
+    long_text = CachedSentimentClassifier(MODEL_KEY, cache=cache, engine=LongTextEngine())
+    truncated.classify(["好评"])
+    long_text.classify(["好评"])
+    assert long_text.key_options() == {
+        "backend": "pytorch", "max_length": 512, "long_text": "mean", "window": 14, "stride": 11,
+    }
+    assert cache.stats()["misses"] == 2
+    with pytest.raises(ValueError):
+        CachedSentimentClassifier(MODEL_KEY, top_k=None, long_text="mean")
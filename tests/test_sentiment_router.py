@@ -0,0 +1,93 @@
+"""
+SentimentRouter 的测试（用假引擎代替模型，不需要 torch）
+
+运行方式: python -m pytest -q tests/test_sentiment_router.py
+"""
+
+import pytest
+
+from advanced.sentiment_router import SentimentRouter, detect_language
+
+
+class FakeEngine:
+    """记录每次调用的文本，结果里带上模型名"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def classify(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return [{"label": "positive", "score": 0.9, "text": text} for text in texts]
+
+
+@pytest.fixture
+def router():
+    router = SentimentRouter()
+    # 预先放入假引擎，避免创建真正的 SentimentEngine
+    router._engines = {"chinese": FakeEngine("chinese"), "english": FakeEngine("english")}
+    return router
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("这部电影很好看", "zh"),
+    ("This movie is great", "en"),
+    ("今天的 meeting 很顺利", "zh"),
+    ("The 火锅 was absolutely delicious tonight", "en"),
+    ("12345 !!!", "zh"),
+    ("", "zh"),
+])
+def test_detect_language(text, expected):
+    assert detect_language(text) == expected
+
+
+def test_detect_language_default():
+    assert detect_language("😀 123", default="en") == "en"
+
+
+def test_route_groups_by_model(router):
+    texts = ["好评", "great", "差评", "bad", "2024"]
+    assert router.route(texts) == {"chinese": [0, 2, 4], "english": [1, 3]}
+
+
+def test_classify_keeps_input_order(router):
+    texts = ["好评", "great", "差评", "bad"]
+    results = router.classify(texts, batch_size=8)
+
+    assert [r["text"] for r in results] == texts
+    assert [r["model"] for r in results] == ["chinese", "english", "chinese", "english"]
+    # 每个模型只运行一次
+    assert router._engines["chinese"].calls == [["好评", "差评"]]
+    assert router._engines["english"].calls == [["great", "bad"]]
+
+
+def test_classify_single_string(router):
+    results = router.classify("hello world")
+    assert len(results) == 1 and results[0]["model"] == "english"
+
+
+def test_unrouted_language_falls_back_to_default():
+    router = SentimentRouter(routes={"zh": "chinese"})
+    assert router.model_for("hello world") == "chinese"
+
+
+def test_default_language_must_have_model():
+    with pytest.raises(ValueError):
+        SentimentRouter(routes={"en": "english"})
+
+
+def test_engine_created_once(monkeypatch):
+    import advanced.sentiment_engine as sentiment_engine
+
+    created = []
+
+    def fake_engine(model_key, **options):
+        created.append((model_key, options["backend"]))
+        return FakeEngine(model_key)
+
+    monkeypatch.setattr(sentiment_engine, "SentimentEngine", fake_engine)
+    router = SentimentRouter(backend="int8")
+    router.warmup()
+    router.warmup()
+    assert router.engine("chinese") is router.engine("chinese")
+    assert created == [("chinese", "int8"), ("english", "int8")]
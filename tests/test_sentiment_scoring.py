@@ -0,0 +1,94 @@
+"""
+流式语料打分的测试（用假引擎代替模型）
+
+运行方式: python -m pytest -q tests/test_sentiment_scoring.py
+"""
+
+import csv
+import json
+
+import pytest
+
+from advanced.sentiment_scoring import read_records, score_file
+
+
+class FakeEngine:
+    """按文本长度打分；fail_after 次调用之后抛出异常，模拟进程中途崩溃"""
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def classify(self, texts, batch_size=32):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("崩溃")
+        return [{"label": "long" if len(text) > 2 else "short", "score": len(text) / 10} for text in texts]
+
+
+def _write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": i, "text": "好" * (i % 5 + 1)}, ensure_ascii=False) + "\n")
+    return path
+
+
+def test_read_jsonl_skips_bad_records(tmp_path, capsys):
+    path = tmp_path / "input.jsonl"
+    path.write_bytes(
+        b'{"text": "\xe5\xa5\xbd"}\n'
+        b"\n"
+        b'{"text": "\xff\xfe bad utf-8"}\n'
+        b"not json\n"
+        b'{"other": 1}\n'
+        b'{"text": 42}\r\n'
+    )
+    texts = [text for _, _, text in read_records(path)]
+    assert texts == ["好", "42"]
+    assert capsys.readouterr().out.count("跳过") == 3
+
+
+def test_read_csv_multiline_field(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text('\ufeffid,content\n1,"第一行\n第二行"\n2,"带,逗号"\n', encoding="utf-8")
+    records = list(read_records(path, text_field="content"))
+    assert [text for _, _, text in records] == ["第一行\n第二行", "带,逗号"]
+    assert records[0][1] == {"id": "1", "content": "第一行\n第二行"}
+    # 偏移指向记录结束处，可以从这里继续读
+    resumed = list(read_records(path, text_field="content", start_offset=records[0][0]))
+    assert [text for _, _, text in resumed] == ["带,逗号"]
+    with pytest.raises(ValueError):
+        list(read_records(path, text_field="text"))
+
+
+def test_score_jsonl(tmp_path):
+    input_path = _write_jsonl(tmp_path / "input.jsonl", 10)
+    output_path = tmp_path / "output.jsonl"
+    assert score_file(input_path, output_path, engine=FakeEngine(), chunk_size=3) == 10
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [row["id"] for row in rows] == list(range(10))
+    assert rows[0] == {"id": 0, "text": "好", "label": "short", "score": 0.1}
+    assert not (tmp_path / "output.jsonl.checkpoint").exists()
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_resume_after_crash(tmp_path, suffix):
+    input_path = tmp_path / f"input{suffix}"
+    if suffix == ".csv":
+        with open(input_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "text"])
+            writer.writerows([i, "好" * (i % 5 + 1)] for i in range(20))
+    else:
+        _write_jsonl(input_path, 20)
+    expected = tmp_path / f"expected{suffix}"
+    score_file(input_path, expected, engine=FakeEngine(), chunk_size=3)
+
+    output_path = tmp_path / f"output{suffix}"
+    # 每 2 个 chunk 保存一次检查点，第 5 个 chunk 时崩溃: 第 5 个之前写出的结果有一部分不在检查点里
+    with pytest.raises(RuntimeError):
+        score_file(input_path, output_path, engine=FakeEngine(fail_after=4), chunk_size=3, checkpoint_every=2)
+    assert (tmp_path / f"output{suffix}.checkpoint").exists()
+
+    assert score_file(input_path, output_path, engine=FakeEngine(), chunk_size=3, checkpoint_every=2) == 8
+    assert output_path.read_bytes() == expected.read_bytes()
@@ -0,0 +1,73 @@
+"""
+MicroBatchServer 的停止 / 重启测试（用假引擎代替模型）
+
+运行方式: python -m pytest -q tests/test_sentiment_server.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from advanced.sentiment_server import MicroBatchServer
+
+
+class FakeEngine:
+    """classify 返回文本长度；gate 未打开时阻塞，模拟正在运行的批次"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def classify(self, texts, batch_size=32):
+        self.gate.wait(5)
+        return [{"label": "len", "score": len(text)} for text in texts]
+
+
+def test_stop_fails_pending_requests():
+    async def main():
+        engine = FakeEngine()
+        engine.gate.clear()
+        server = MicroBatchServer(engine=engine, max_batch_size=2, max_wait_ms=1)
+        await server.start()
+        requests = [asyncio.create_task(server.classify(str(i))) for i in range(5)]
+        await asyncio.sleep(0.05)  # 第一批已经在工作线程中运行，其余在队列里
+        stopping = asyncio.create_task(server.stop())
+        await asyncio.sleep(0.05)
+        engine.gate.set()
+        await stopping
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(main())
+    assert len(results) == 5
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_restart_after_stop():
+    async def main():
+        server = MicroBatchServer(engine=FakeEngine(), max_wait_ms=1)
+        async with server:
+            first = await server.classify("ab")
+        with pytest.raises(RuntimeError):
+            await server.classify("x")
+        async with server:
+            second = await server.classify("abc")
+        return first, second, server.stats()
+
+    first, second, stats = asyncio.run(main())
+    assert first["score"] == 2 and second["score"] == 3
+    assert stats["requests"] == 2 and stats["batches"] == 2
+
+
+def test_latency_window_is_bounded():
+    async def main():
+        server = MicroBatchServer(engine=FakeEngine(), max_batch_size=64, max_wait_ms=1)
+        server.STATS_WINDOW = 10
+        server.reset_stats()
+        async with server:
+            await asyncio.gather(*(server.classify("x") for _ in range(100)))
+        return server
+
+    server = asyncio.run(main())
+    assert len(server.latencies) == 10
+    assert server.stats()["requests"] == 100
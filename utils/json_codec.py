@@ -0,0 +1,168 @@
+"""
+JSON 编解码门面
+安装了 orjson 或 ujson 时自动使用更快的实现，否则使用标准库 json，调用方式不变
+
+- 默认输出紧凑格式（没有任何空白），indent=2 时输出缩进格式
+  （缩进让体积和耗时都接近翻倍，只在给人看的时候使用）
+- 与 json.dumps(..., ensure_ascii=False) 一致: 中文等字符原样输出，不转义成 \\uXXXX
+- 快速后端不支持的输入（如超过 64 位的整数、非 2 空格的缩进）自动交给标准库处理；
+  解析时含 19 位以上整数字面量的输入也交给标准库，大整数不会被解析成 float
+- datetime / dataclass 与标准库一样抛出 TypeError（不使用 orjson 的原生序列化）
+- 解析错误统一抛出 json.JSONDecodeError
+
+与标准库的已知差异（输出都是合法 JSON，解析结果相同，但字节不一定相同）:
+- 浮点数写法: orjson 输出 1e16 / 1e-7，标准库输出 1e+16 / 1e-07
+- NaN / Infinity: orjson 输出 null，标准库输出非标准的 NaN / Infinity
+- Enum / UUID: orjson 可以直接序列化，标准库抛出 TypeError
+
+选择后端: 环境变量 PYTHON_FOR_AI_JSON=orjson / ujson / json，默认按 orjson → ujson → json 的顺序
+
+用法:
+    from utils.json_codec import codec
+
+    text = codec.dumps({"name": "张三"})            # '{"name":"张三"}'
+    data = codec.loads(text)
+    codec.dumpb(data, indent=2)                       # UTF-8 字节，可直接写入二进制文件
+
+运行方式: python -m benchmarks.json_bench
+"""
+
+import importlib
+import json
+import os
+import re
+
+BACKENDS = ("orjson", "ujson", "json")
+
+# 把每个字节映射成字符类别: 数字 -> "0"，浮点数标记 . e E + -> "."，"-" 不变，其他 -> 空格
+# 之后用 bytes.find 查找长数字串（都在 C 里完成，比正则快一个数量级）
+_CLASS_TABLE = bytearray(b" " * 256)
+for _byte in b"0123456789":
+    _CLASS_TABLE[_byte] = ord("0")
+for _byte in b".eE+":
+    _CLASS_TABLE[_byte] = ord(".")
+_CLASS_TABLE[ord("-")] = ord("-")
+_CLASS_TABLE = bytes(_CLASS_TABLE)
+# 19 位数字就可能超出 64 位整数范围（如 -9223372036854775809）
+_LONG_RUN = b"0" * 19
+
+
+def _has_big_int(data):
+    """
+    data 中是否有可能超出 64 位范围的整数字面量
+
+    浮点数的小数部分和指数（如 0.12345678901234567890、1e-1234567890123456789）不算；
+    字符串里的长数字串会被误判，只是多走一次标准库，结果不受影响。
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    classes = b" " + bytes(data).translate(_CLASS_TABLE)
+    start = classes.find(_LONG_RUN)
+    while start != -1:
+        end = start + len(_LONG_RUN)
+        while classes[end:end + 1] == b"0":
+            end += 1
+        before = classes[start - 1:start]
+        is_integer = before == b" " or (before == b"-" and classes[start - 2:start - 1] != b".")
+        if is_integer and classes[end:end + 1] != b".":
+            return True
+        start = classes.find(_LONG_RUN, end)
+    return False
+
+
+def _is_installed(name):
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends():
+    """当前环境中可以使用的后端（按优先级排序）"""
+    return [name for name in BACKENDS if _is_installed(name)]
+
+
+class JsonCodec:
+    """统一接口的 JSON 编解码器"""
+
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend: "orjson" / "ujson" / "json"，None 表示自动选择第一个可用的
+        """
+        backend = backend or os.environ.get("PYTHON_FOR_AI_JSON")
+        if not backend:
+            # 找到第一个可用的就停止，不多导入其他后端
+            backend = next(name for name in BACKENDS if _is_installed(name))
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的 JSON 后端: {backend}（可选: {', '.join(BACKENDS)}）")
+        try:
+            self._module = importlib.import_module(backend)
+        except ImportError:
+            raise ImportError(f"JSON 后端 {backend} 未安装: pip install {backend}") from None
+        self.backend = backend
+
+    def __repr__(self):
+        return f"JsonCodec(backend={self.backend!r})"
+
+    def _stdlib_dumps(self, obj, indent):
+        # indent=0 与标准库一样: 每个元素单独一行但不缩进
+        separators = (",", ":") if indent is None else None
+        return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators)
+
+    def dumps(self, obj, indent=None):
+        """序列化为 str（indent=None 为紧凑格式）"""
+        if self.backend == "orjson":
+            return self.dumpb(obj, indent).decode("utf-8")
+        if self.backend == "ujson" and indent is None:
+            try:
+                return self._module.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+            except (TypeError, OverflowError):
+                pass
+        return self._stdlib_dumps(obj, indent)
+
+    def dumpb(self, obj, indent=None):
+        """序列化为 UTF-8 编码的 bytes（orjson 原生输出 bytes，省掉一次编码）"""
+        if self.backend == "orjson" and indent in (None, 2):
+            option = (self._module.OPT_NON_STR_KEYS | self._module.OPT_PASSTHROUGH_DATETIME
+                      | self._module.OPT_PASSTHROUGH_DATACLASS)
+            if indent:
+                option |= self._module.OPT_INDENT_2
+            try:
+                return self._module.dumps(obj, option=option)
+            except TypeError:
+                # orjson.JSONEncodeError 是 TypeError 的子类（如超过 64 位的整数、datetime）
+                pass
+        elif self.backend == "ujson":
+            return self.dumps(obj, indent).encode("utf-8")
+        return self._stdlib_dumps(obj, indent).encode("utf-8")
+
+    def loads(self, data):
+        """解析 str 或 bytes，格式错误时抛出 json.JSONDecodeError"""
+        if self.backend != "json":
+            if _has_big_int(data):
+                # 快速后端会把超出 64 位的整数解析成 float 或直接报错，交给标准库
+                return json.loads(data)
+        if self.backend == "orjson":
+            # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+            return self._module.loads(data)
+        if self.backend == "ujson":
+            try:
+                return self._module.loads(data)
+            except ValueError as e:
+                text = data.decode("utf-8", errors="replace") if isinstance(data, (bytes, bytearray)) else data
+                raise json.JSONDecodeError(str(e), text, 0) from None
+        return json.loads(data)
+
+    def dump(self, obj, f, indent=None):
+        """写入文本文件对象（类似 json.dump）"""
+        f.write(self.dumps(obj, indent))
+
+    def load(self, f):
+        """从文件对象读取（类似 json.load，文本或二进制模式均可）"""
+        return self.loads(f.read())
+
+
+# 进程级默认编解码器
+codec = JsonCodec()
@@ -0,0 +1,201 @@
+"""
+轻量级指标收集（计数器、仪表盘、直方图、计时 span）
+类似 Node.js 中的 prom-client，但只用标准库
+
+默认关闭，关闭时每次调用只多一次布尔判断；
+设置环境变量 PYTHON_FOR_AI_METRICS=1 或调用 metrics.enable() 开启。
+
+用法:
+    from utils.metrics import metrics
+
+    metrics.enable()
+    metrics.inc("requests_total", model="chinese")
+    metrics.observe("batch_size", 32, buckets=SIZE_BUCKETS)
+    with metrics.span("stage_seconds", stage="tokenize"):
+        ...
+    print(metrics.to_prometheus())   # Prometheus 文本格式
+    print(metrics.snapshot())        # 可直接 json.dumps 的字典
+"""
+
+import bisect
+import os
+import threading
+import time
+
+# 耗时直方图的默认分桶（秒）
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 批大小、队列长度等数量直方图的分桶
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class _Histogram:
+    """固定分桶的直方图"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+
+class _NullSpan:
+    """关闭时使用的空 span（单例，不做任何事）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """计时 span: 退出时把耗时记录到直方图"""
+
+    __slots__ = ("_metrics", "_name", "_labels", "_start")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Metrics:
+    """指标注册表"""
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get("PYTHON_FOR_AI_METRICS", "") not in ("", "0", "false")
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def inc(self, name, value=1, **labels):
+        """计数器加 value"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """设置仪表盘的当前值（如队列长度）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        """向直方图记录一个值（分桶在第一次记录时确定）"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def span(self, name, **labels):
+        """
+        计时上下文管理器，耗时（秒）记录到名为 name 的直方图
+
+            with metrics.span("stage_seconds", stage="forward"):
+                model(...)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def snapshot(self):
+        """返回所有指标的字典快照"""
+        with self._lock:
+            def labeled(key):
+                name, labels = key
+                return {"name": name, "labels": dict(labels)}
+
+            return {
+                "counters": [{**labeled(k), "value": v} for k, v in self._counters.items()],
+                "gauges": [{**labeled(k), "value": v} for k, v in self._gauges.items()],
+                "histograms": [
+                    {
+                        **labeled(k),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "mean": h.sum / h.count if h.count else 0.0,
+                        "max": h.max,
+                        "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts)),
+                    }
+                    for k, h in self._histograms.items()
+                ],
+            }
+
+    def to_prometheus(self):
+        """导出为 Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0]):
+                cumulative = 0
+                for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+# 进程级共享的指标注册表
+metrics = Metrics()